@@ -31,7 +31,9 @@ from operating_platform.dataset.visual.visual_dataset import visualize_dataset
 
 # from operating_platform.core._client import Coordinator
 from operating_platform.core.daemon import Daemon
-from operating_platform.core.record import Record, RecordConfig
+from operating_platform.robot.components.color_convert import plan
+from operating_platform.robot.transport.codec import decode_preview
+from operating_platform.core.record import Record, RecordConfig, check_frame_policy
 from operating_platform.core.replay import DatasetReplayConfig, ReplayConfig, replay
 
 DEFAULT_FPS = 30
@@ -119,12 +121,15 @@ def cameras_to_stream_json(cameras: dict[str, int]):
     return json.dumps(result)
 
 class Coordinator:
-    def __init__(self, daemon: Daemon, server_url="http://localhost:8088"):
+    def __init__(self, daemon: Daemon, server_url="http://localhost:8088", record_options: dict | None = None):
         self.server_url = server_url
         self.sio = socketio.Client()
         self.session = requests.Session()
 
         self.daemon = daemon
+        # 采集时的帧检查选项 (max_stream_age_s, stale_frame_policy, invalid_frame_policy)，
+        # start_collection 消息中的同名字段优先
+        self.record_options = dict(record_options or {})
 
         self.running = False
         self.last_heartbeat_time = 0
@@ -208,6 +213,10 @@ class Coordinator:
             except Exception as e:
                 print(f"发送响应失败 [{data.get('cmd')}]: {e}")
             
+        elif data.get('cmd') == 'stream_health':
+            # 各数据流的接收频率、抖动、距上次更新时间和中断次数
+            self.send_response('stream_health', "success", {"data": self.daemon.stream_health()})
+
         elif data.get('cmd') == 'start_collection':
             print("处理开始采集命令...")
             msg = data.get('msg')
@@ -217,6 +226,17 @@ class Coordinator:
                 print("Replay is running, cannot start collection.")
                 return
 
+            # 消息中的帧检查选项优先，非法取值直接拒绝，不打断正在进行的采集
+            record_options = {key: msg.get(key, value) for key, value in self.record_options.items()}
+            try:
+                for key in ("stale_frame_policy", "invalid_frame_policy"):
+                    if key in record_options:
+                        check_frame_policy(key, record_options[key])
+            except ValueError as e:
+                self.send_response('start_collection', "fail")
+                print(f"Invalid collection options: {e}")
+                return
+
             if self.recording == True:
                 # self.send_response('start_collection', "fail")
 
@@ -264,7 +284,7 @@ class Coordinator:
             # resume 变量现在可用于后续逻辑
             print(f"Resume mode: {'Enabled' if resume else 'Disabled'}")
 
-            record_cfg = RecordConfig(fps=DEFAULT_FPS, repo_id=repo_id, video=self.daemon.robot.use_videos, resume=resume, root=target_dir)
+            record_cfg = RecordConfig(fps=DEFAULT_FPS, repo_id=repo_id, video=self.daemon.robot.use_videos, resume=resume, root=target_dir, **record_options)
             self.record = Record(fps=DEFAULT_FPS, robot=self.daemon.robot, daemon=self.daemon, record_cfg = record_cfg, record_cmd=msg)
             
             # 发送响应
@@ -483,11 +503,22 @@ class Coordinator:
             json = stream_info_data,
         )
 
-    def update_stream(self, name, frame):
+    def update_stream(self, name, frame, order="bgr8"):
+        # 直接按帧的通道顺序编码，RGB 观测不需要先转成 BGR
+        jpeg_frame = plan(order, "jpeg", quality=80)(frame)
+        if jpeg_frame is not None:
+            self.update_stream_encoded(name, jpeg_frame.tobytes())
+
+    def update_stream_preview(self, name, data, metadata):
+        """Streams a camera preview, as-is when the camera already encoded it as JPEG."""
+        if metadata.get("encoding", "jpeg").lower() in ("jpeg", "jpg"):
+            self.update_stream_encoded(name, bytes(data))
+            return
+        frame = decode_preview(data, metadata)
+        if frame is not None:
+            self.update_stream(name, frame)
 
-        _, jpeg_frame = cv2.imencode('.jpg', frame, 
-                            [int(cv2.IMWRITE_JPEG_QUALITY), 80])
-        frame_data = jpeg_frame.tobytes()
+    def update_stream_encoded(self, name, frame_data):
 
         stream_id = self.cameras[name]
         # Build URL
@@ -504,8 +535,16 @@ class Coordinator:
 @dataclass
 class ControlPipelineConfig:
     robot: RobotConfig
+    # 服务端发起的采集使用的帧检查选项，含义见 RecordConfig; start_collection 消息中的同名字段优先
+    max_stream_age_s: float | None = None
+    stale_frame_policy: str = "flag"
+    invalid_frame_policy: str = "flag"
     # control: ControlConfig
 
+    def __post_init__(self):
+        check_frame_policy("stale_frame_policy", self.stale_frame_policy)
+        check_frame_policy("invalid_frame_policy", self.invalid_frame_policy)
+
     @classmethod
     def __get_path_fields__(cls) -> list[str]:
         """This enables the parser to load config from the policy using `--policy.path=local/dir`"""
@@ -522,7 +561,14 @@ def main(cfg: ControlPipelineConfig):
     daemon = Daemon(fps=DEFAULT_FPS)
     daemon.start(cfg.robot)
 
-    coordinator = Coordinator(daemon)
+    coordinator = Coordinator(
+        daemon,
+        record_options={
+            "max_stream_age_s": cfg.max_stream_age_s,
+            "stale_frame_policy": cfg.stale_frame_policy,
+            "invalid_frame_policy": cfg.invalid_frame_policy,
+        },
+    )
     coordinator.start()
 
     coordinator.stream_info(daemon.cameras_info)
@@ -532,14 +578,19 @@ def main(cfg: ControlPipelineConfig):
         while True:
             daemon.update()
             observation = daemon.get_observation()
+            # 相机节点发布了预览 (已缩小、已编码为 jpeg) 时直接推流，不再编码全分辨率的观测图像
+            previews = daemon.get_previews()
             # print("get observation")
-            if observation is not None:
+            if previews:
+                for name, (data, metadata) in previews.items():
+                    coordinator.update_stream_preview(name, data, metadata)
+            elif observation is not None:
                 image_keys = [key for key in observation if "image" in key]
                 for i, key in enumerate(image_keys, start=1):
-                    img = cv2.cvtColor(observation[key].numpy(), cv2.COLOR_RGB2BGR) 
+                    img = observation[key].numpy()
 
                     name = key[len("observation.images."):]
-                    coordinator.update_stream(name, img)
+                    coordinator.update_stream(name, img, order="rgb8")
 
                     # if not is_headless():
                     #     # print(f"will show image, name:{name}")
@@ -5,11 +5,15 @@ import torch
 import logging
 import threading
 
-from typing import Any
+from collections import deque
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Mapping
 from termcolor import colored
 
 from operating_platform.robot.robots.configs import RobotConfig
 from operating_platform.robot.robots.utils import make_robot_from_config, Robot, busy_wait, safe_disconnect
+from operating_platform.robot.transport.channel import invalid_streams, stream_ages, stream_metrics
 
 
 def log_control_info(robot: Robot, dt_s, episode_index=None, frame_index=None, fps=None):
@@ -52,13 +56,49 @@ def log_control_info(robot: Robot, dt_s, episode_index=None, frame_index=None, f
             if key in robot.logs:
                 log_dt(f"dt_R_camera_{name}", robot.logs[key])
 
+        # 各接收数据流的到达频率: 相机低于 fps 标黄，中断的数据流标红
+        for event_id, metrics in stream_metrics(robot.logs).items():
+            if "rate_hz" not in metrics:
+                continue
+            info_str = f"rx_{event_id}:{metrics['rate_hz']:3.1f}hz"
+            if metrics.get("stalled"):
+                info_str = colored(f"{info_str} stalled {metrics['age_s']:.2f}s", "red")
+            elif metrics.get("frame_status", "ok") not in ("", "ok"):
+                info_str = colored(f"{info_str} {metrics['frame_status']}", "red")
+            elif fps is not None and event_id in robot.cameras and metrics["rate_hz"] < fps - 1:
+                info_str = colored(info_str, "yellow")
+            log_items.append(info_str)
+
     info_str = " ".join(log_items)
     logging.info(info_str)
 
 
+# 保留最近发布的快照个数，供稍慢的消费者补取
+DEFAULT_SNAPSHOT_HISTORY = 8
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    One published observation set. Immutable: the dicts are read-only views, so the daemon hands the same
+    object to every reader without copying. The tensors themselves are shared and must not be modified in place.
+    """
+
+    frame_id: int
+    observation: Mapping[str, torch.Tensor]
+    action: Mapping[str, torch.Tensor] | None
+    # False when the robot timed out waiting for new images and reused the previous ones
+    fresh: bool
+    # time.perf_counter() at publication
+    published_t: float
+    # seconds since each received stream last delivered, at publication
+    stream_ages: Mapping[str, float] = field(default_factory=dict)
+    # streams whose latest frame was flagged by the camera (black, frozen, ...), with the frame status
+    invalid_frames: Mapping[str, str] = field(default_factory=dict)
+
 
 class Daemon:
-    def __init__(self, fps: int | None = None):
+    def __init__(self, fps: int | None = None, snapshot_history: int = DEFAULT_SNAPSHOT_HISTORY):
         # self.record = False
         # self.evaluate
         self.fps = fps
@@ -67,11 +107,18 @@ class Daemon:
         # self.thread = threading.Thread(target=self.process, daemon=True)
         self.running = True
 
+        # 读路径不加锁: 发布时整体替换引用 (赋值在 Python 中是原子的)，读者拿到的快照不会再被修改。
+        # 锁只用于唤醒 wait_for_frame 的等待者。
         self.data_lock = threading.Lock()
-        self.pre_action: Any | dict[str, torch.Tensor] = None
-        self.obs_action: Any | dict[str, torch.Tensor] = None
-        self.observation: Any | dict[str, torch.Tensor] = None
+        self.frame_ready = threading.Condition(self.data_lock)
+        self.pre_action: Mapping[str, Any] | None = None
+        self.snapshot: Snapshot | None = None
+        self.snapshots: deque[Snapshot] = deque(maxlen=snapshot_history)
 
+        # 每组新观测发布一次，frame_id 递增; Record 等待新的 frame_id 而不是按自己的定时器轮询
+        self.frame_id = 0
+        # 机械臂等待新图像超时、沿用旧图像组出的帧
+        self.stale_frames = 0
 
     def start(self, config: RobotConfig):
         try:
@@ -97,6 +144,7 @@ class Daemon:
         # while self.running:
         start_loop_t = time.perf_counter()
 
+        # teleop_step 阻塞到各相机都有新的一帧 (或超时)
         observation, action = self.robot.teleop_step(record_data=True)
 
         # if observation is not None:
@@ -104,8 +152,13 @@ class Daemon:
 
         # if action is not None:
         #     self.obs_action = action.copy()
-        self.set_observation(observation)
-        self.set_obs_action(action)
+        self.publish(
+            observation,
+            action,
+            fresh=self.robot.logs.get("observation_fresh", True),
+            stream_ages=stream_ages(self.robot.logs),
+            invalid_frames=invalid_streams(self.robot.logs),
+        )
 
 
         pre_action = self.get_pre_action()
@@ -131,41 +184,82 @@ class Daemon:
     
     
     def set_pre_action(self, value: Any | dict[str, torch.Tensor]):
-        with self.data_lock:
-            if value is None:
-                return
-            self.pre_action = value.copy()
-    
-    def set_obs_action(self, value: Any | dict[str, torch.Tensor]):
-        with self.data_lock:
-            if value is None:
-                return
-            self.obs_action = value.copy()
-
-    def set_observation(self, value: Any | dict[str, torch.Tensor]):
-        with self.data_lock:
-            if value is None:
-                return
-            self.observation = value.copy()
-
-    def get_pre_action(self) -> Any | dict[str, torch.Tensor]:
-        with self.data_lock:
-            if self.pre_action is None:
-                return None
-            return self.pre_action.copy()
-
-    def get_obs_action(self) -> Any | dict[str, torch.Tensor]:
-        with self.data_lock:
-            if self.obs_action is None:
-                return None
-            return self.obs_action.copy()
-    
-    def get_observation(self) -> Any | dict[str, torch.Tensor]:
-        with self.data_lock:
-            if self.observation is None:
-                return None
-            return self.observation.copy()
-
+        if value is None:
+            return
+        # 只在写入时拷贝一次，读者共享同一个只读视图
+        self.pre_action = MappingProxyType(dict(value))
+
+    def publish(
+        self,
+        observation: Any | dict[str, torch.Tensor],
+        action: Any | dict[str, torch.Tensor],
+        fresh: bool = True,
+        stream_ages: dict[str, float] | None = None,
+        invalid_frames: dict[str, str] | None = None,
+    ):
+        """
+        Publishes one observation set as a new `Snapshot` and wakes up `wait_for_frame`. The dicts are taken
+        over, not copied: teleop_step builds new ones every tick.
+        """
+        if observation is None:
+            return
+        with self.frame_ready:
+            self.frame_id += 1
+            snapshot = Snapshot(
+                frame_id=self.frame_id,
+                observation=MappingProxyType(observation),
+                action=MappingProxyType(action) if action is not None else None,
+                fresh=fresh,
+                published_t=time.perf_counter(),
+                stream_ages=MappingProxyType(stream_ages or {}),
+                invalid_frames=MappingProxyType(invalid_frames or {}),
+            )
+            self.snapshots.append(snapshot)
+            self.snapshot = snapshot
+            if not fresh:
+                self.stale_frames += 1
+            self.frame_ready.notify_all()
+
+    def stream_health(self) -> dict[str, dict[str, Any]]:
+        """Receive telemetry of every stream (rate, jitter histogram, age, stalls, ...), grouped by event_id."""
+        return stream_metrics(self.robot.logs)
+
+    def get_snapshot(self) -> Snapshot | None:
+        return self.snapshot
+
+    def get_snapshots(self, last_frame_id: int) -> list[Snapshot]:
+        """Retained snapshots newer than `last_frame_id`, oldest first."""
+        # deque 的拷贝本身是原子的，不需要加锁
+        return [snapshot for snapshot in list(self.snapshots) if snapshot.frame_id > last_frame_id]
+
+    def wait_for_frame(self, last_frame_id: int, timeout: float | None = None) -> list[Snapshot]:
+        """
+        Blocks until a frame newer than `last_frame_id` is published and returns the retained snapshots newer
+        than it, oldest first (empty on timeout). Frames that already fell out of the history are missing,
+        callers detect them from the gap in frame ids.
+        """
+        snapshot = self.snapshot
+        if snapshot is None or snapshot.frame_id <= last_frame_id:
+            with self.frame_ready:
+                if not self.frame_ready.wait_for(lambda: self.frame_id > last_frame_id, timeout):
+                    return []
+        return self.get_snapshots(last_frame_id)
+
+    def get_pre_action(self) -> Mapping[str, Any] | None:
+        return self.pre_action
+
+    def get_obs_action(self) -> Mapping[str, torch.Tensor] | None:
+        snapshot = self.snapshot
+        return snapshot.action if snapshot is not None else None
+
+    def get_previews(self) -> dict[str, tuple[bytes, dict]]:
+        """Latest downscaled preview of each camera (see camera_preprocess.send_preview), empty if none."""
+        get_previews = getattr(self.robot, "get_previews", None)
+        return get_previews() if get_previews is not None else {}
+
+    def get_observation(self) -> Mapping[str, torch.Tensor] | None:
+        snapshot = self.snapshot
+        return snapshot.observation if snapshot is not None else None
 
 def daemon():
     robot_daemon = Daemon()
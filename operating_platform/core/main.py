@@ -31,6 +31,7 @@ from operating_platform.dataset.visual.visual_dataset import visualize_dataset
 
 # from operating_platform.core._client import Coordinator
 from operating_platform.core.daemon import Daemon
+from operating_platform.robot.transport.codec import decode_preview
 from operating_platform.core.record import Record, RecordConfig
 from operating_platform.core.replay import DatasetReplayConfig, ReplayConfig, replay
 
@@ -195,6 +196,9 @@ def main(cfg: ControlPipelineConfig):
         num_episodes=cfg.record.num_episodes,
         episode_duration_s=cfg.record.episode_duration_s,
         inter_episode_sleep_s=cfg.record.inter_episode_sleep_s,
+        max_stream_age_s=cfg.record.max_stream_age_s,
+        stale_frame_policy=cfg.record.stale_frame_policy,
+        invalid_frame_policy=cfg.record.invalid_frame_policy,
     )
     record = Record(fps=cfg.record.fps, robot=daemon.robot, daemon=daemon, record_cfg = record_cfg, record_cmd=msg)
             
@@ -210,8 +214,17 @@ def main(cfg: ControlPipelineConfig):
         while True:
             daemon.update()
             observation = daemon.get_observation()
+            # 相机节点发布了预览时只解码缩小后的预览，不再转换全分辨率的观测图像
+            previews = daemon.get_previews()
             # print("get observation")
-            if observation is not None:
+            if previews:
+                if not is_headless():
+                    for name, (data, metadata) in previews.items():
+                        img = decode_preview(data, metadata)
+                        if img is not None:
+                            cv2.imshow(name, img)
+                    cv2.waitKey(1)
+            elif observation is not None:
                 image_keys = [key for key in observation if "image" in key]
                 for i, key in enumerate(image_keys, start=1):
                     img = cv2.cvtColor(observation[key].numpy(), cv2.COLOR_RGB2BGR) 
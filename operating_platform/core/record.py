@@ -8,7 +8,9 @@ from operating_platform.robot.robots.configs import RobotConfig
 from operating_platform.robot.robots.utils import Robot, busy_wait, safe_disconnect, make_robot_from_config
 
 from operating_platform.dataset.dorobot_dataset import *
-from operating_platform.core.daemon import Daemon
+from operating_platform.core.daemon import Daemon, Snapshot
+from operating_platform.robot.transport.channel import FRAME_ID_KEY, FRAME_LATENCY_KEY, FRAME_VALID_KEY, SENSOR_NS_KEY
+from operating_platform.robot.transport.sync import SYNC_SKEW_KEY
 import draccus
 from operating_platform.utils import parser
 from operating_platform.utils.utils import has_method, init_logging, log_say, get_current_git_branch, git_branch_log, get_container_ip_from_hosts
@@ -18,6 +20,7 @@ from operating_platform.utils.data_file import (
     get_data_duration, 
     get_data_size ,
     update_dataid_json,
+    update_episode_manifest,
     update_common_record_json,
     delete_dataid_json
 )
@@ -62,6 +65,15 @@ def sanity_check_dataset_robot_compatibility(
 #         )
 
 
+# stale_frame_policy / invalid_frame_policy 的取值
+FRAME_POLICIES = ("flag", "drop")
+
+
+def check_frame_policy(name: str, policy: str) -> None:
+    if policy not in FRAME_POLICIES:
+        raise ValueError(f"`{name}` is expected to be one of {FRAME_POLICIES}, but {policy!r} is provided.")
+
+
 @dataclass
 class RecordConfig():
     # Dataset identifier. By convention it should match '{hf_username}/{dataset_name}' (e.g. `lerobot/test`).
@@ -108,6 +120,20 @@ class RecordConfig():
     # Sleep seconds between episodes (useful to stabilize devices)
     inter_episode_sleep_s: float = 0.0
 
+    # A frame is stale when one of the robot's streams last delivered more than this many seconds before the
+    # frame was published (e.g. a camera or an arm stopped sending). None disables the check.
+    max_stream_age_s: float | None = None
+    # What to do with stale frames: "flag" records and counts them, "drop" counts them without recording.
+    stale_frame_policy: str = "flag"
+    # What to do with frames a camera flagged as invalid (black, overexposed, frozen, missing): "flag" records
+    # and counts them (the per-camera validity is also stored in `observation.frame_valid`), "drop" counts
+    # them without recording.
+    invalid_frame_policy: str = "flag"
+
+    def __post_init__(self):
+        check_frame_policy("stale_frame_policy", self.stale_frame_policy)
+        check_frame_policy("invalid_frame_policy", self.invalid_frame_policy)
+
 
 class Record:
     def __init__(self, fps: int, robot: Robot, daemon: Daemon, record_cfg: RecordConfig, record_cmd):
@@ -125,6 +151,14 @@ class Record:
         self.has_unsaved_frames = False
         self.rotate_event = threading.Event()
 
+        # 每个 frame_id 只写入一次; 统计当前 episode 中跳过 (frame_id 不连续) 和重复 (图像未更新) 的帧
+        self.last_frame_id = daemon.frame_id
+        self.frame_counts = {"recorded": 0, "skipped": 0, "duplicate": 0, "stale": 0, "invalid": 0}
+        # 当前 episode 中导致帧过期的数据流及次数
+        self.stale_streams: dict[str, int] = {}
+        # 当前 episode 中各相机无效帧的状态及次数，例如 {"image_top": {"frozen": 3}}
+        self.invalid_streams: dict[str, dict[str, int]] = {}
+
         if self.record_cfg.resume:
             self.dataset = DoRobotDataset(
                 record_cfg.repo_id,
@@ -172,23 +206,53 @@ class Record:
                         print("[Record] save on rotate failed:", e)
                 # Reset unsaved flag after rotation attempt (saved or empty)
                 self.has_unsaved_frames = False
+                self.reset_frame_counts()
                 self.rotate_event.clear()
 
             if self.dataset is not None:
-                start_loop_t = time.perf_counter()
-
-                observation = self.daemon.get_observation()
-                action = self.daemon.get_obs_action()
-
-                frame = {**observation, **action, "task": self.record_cfg.single_task}
-                self.dataset.add_frame(frame)
-                self.has_unsaved_frames = True
-
-                dt_s = time.perf_counter() - start_loop_t
-
-                if self.fps is not None:
-                    busy_wait(1 / self.fps - dt_s)
-
+                # 短超时，保证 rotate_event 和 stop 能及时得到处理。
+                # 落后时一次取回 Daemon 保留的所有新快照，尽量不跳帧
+                for snapshot in self.daemon.wait_for_frame(self.last_frame_id, timeout=0.1):
+                    self.add_snapshot(snapshot)
+
+    def add_snapshot(self, snapshot: Snapshot):
+        if self.last_frame_id:
+            self.frame_counts["skipped"] += snapshot.frame_id - self.last_frame_id - 1
+        self.last_frame_id = snapshot.frame_id
+        if not snapshot.fresh:
+            self.frame_counts["duplicate"] += 1
+
+        max_age_s = self.record_cfg.max_stream_age_s
+        if max_age_s is not None:
+            stale = [event_id for event_id, age_s in snapshot.stream_ages.items() if age_s > max_age_s]
+            if stale:
+                self.frame_counts["stale"] += 1
+                for event_id in stale:
+                    self.stale_streams[event_id] = self.stale_streams.get(event_id, 0) + 1
+                if self.record_cfg.stale_frame_policy == "drop":
+                    return
+
+        if snapshot.invalid_frames:
+            self.frame_counts["invalid"] += 1
+            for event_id, status in snapshot.invalid_frames.items():
+                counts = self.invalid_streams.setdefault(event_id, {})
+                counts[status] = counts.get(status, 0) + 1
+            if self.record_cfg.invalid_frame_policy == "drop":
+                return
+
+        frame = {**snapshot.observation, **(snapshot.action or {}), "task": self.record_cfg.single_task}
+        # datasets recorded before the synchronizer existed have no skew column
+        if SYNC_SKEW_KEY not in self.dataset.features:
+            frame.pop(SYNC_SKEW_KEY, None)
+        if FRAME_VALID_KEY not in self.dataset.features:
+            frame.pop(FRAME_VALID_KEY, None)
+        # nor frame ids / hardware timestamps
+        for key in (FRAME_ID_KEY, SENSOR_NS_KEY, FRAME_LATENCY_KEY):
+            if key not in self.dataset.features:
+                frame.pop(key, None)
+        self.dataset.add_frame(frame)
+        self.frame_counts["recorded"] += 1
+        self.has_unsaved_frames = True
 
     def stop(self):
         if self.running == True:
@@ -199,14 +263,35 @@ class Record:
         # stop_recording(robot, listener, record_cfg.display_cameras)
         # log_say("Stop recording", record_cfg.play_sounds, blocking=True)
 
+    def reset_frame_counts(self):
+        # 保存期间发布的帧不属于任何 episode，从当前帧之后开始记录，也不计为跳过
+        self.last_frame_id = self.daemon.frame_id
+        self.frame_counts = {"recorded": 0, "skipped": 0, "duplicate": 0, "stale": 0, "invalid": 0}
+        self.stale_streams = {}
+        self.invalid_streams = {}
+
     def save(self) -> dict:
         print("will save_episode")
 
         episode_index = self.dataset.save_episode()
 
         print("save_episode succcess, episode_index:", episode_index)
+        print(
+            f"frames recorded: {self.frame_counts['recorded']}, "
+            f"skipped: {self.frame_counts['skipped']}, duplicate: {self.frame_counts['duplicate']}, "
+            f"stale: {self.frame_counts['stale']} {self.stale_streams}, "
+            f"invalid: {self.frame_counts['invalid']} {self.invalid_streams}"
+        )
 
         update_dataid_json(self.record_cfg.root, episode_index,  self.record_cmd)
+        update_episode_manifest(
+            self.record_cfg.root,
+            episode_index,
+            self.record_cmd,
+            self.dataset.meta.get_episode_file_sizes(episode_index),
+            self.dataset.meta.episodes[episode_index]["length"],
+            self.dataset.fps,
+        )
         if episode_index == 0 and self.dataset.meta.total_episodes == 1:
             update_common_record_json(self.record_cfg.root, self.record_cmd)
         
@@ -230,7 +315,10 @@ class Record:
             "verification": {
                 "file_integrity": "pass",
                 "camera_frame_rate": "pass",
-            }
+            },
+            "frame_counts": dict(self.frame_counts),
+            "stale_streams": dict(self.stale_streams),
+            "invalid_streams": dict(self.invalid_streams),
         }
 
         self.record_complete = True
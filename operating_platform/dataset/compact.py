@@ -0,0 +1,224 @@
+"""
+Physically remove soft-deleted (tombstoned) episodes from a DoRobotDataset.
+
+`DoRobotDataset.remove_episode` only records the episode in `meta/tombstones.json`, so a discard during a
+collection session is instant and leaves every other file untouched. This command does the expensive part
+afterwards: it deletes the episode files, drops their lines from the metadata and, with `--reindex=true`,
+renumbers the remaining episodes so that episode indices and the global frame `index` are contiguous again.
+
+Without re-indexing, `info["total_episodes"]` and `info["total_frames"]` keep pointing at the next free
+episode index and global frame `index` (so new episodes never collide with the remaining ones), and the
+remaining episodes keep their indices (with gaps). `DoRobotDatasetMetadata.live_frames` counts the frames left.
+
+Run it while no recording session has the dataset open, e.g. in the background:
+```
+nohup python -m operating_platform.dataset.compact \
+    --repo_id=dorobot/test \
+    --root=/path/to/dataset \
+    --reindex=true > compact.log 2>&1 &
+```
+"""
+
+import logging
+import shutil
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+import draccus
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from operating_platform.dataset.dorobot_dataset import DoRobotDatasetMetadata
+from operating_platform.dataset.parquet_shards import convert_to_episodes, convert_to_shards
+from operating_platform.utils.data_file import remap_dataid_json
+from operating_platform.utils.dataset import (
+    EPISODES_PATH,
+    EPISODES_STATS_PATH,
+    delete_episode,
+    delete_episode_stats,
+    serialize_dict,
+    write_info,
+    write_jsonlines,
+    write_tombstones,
+)
+from operating_platform.utils.utils import init_logging
+
+
+@dataclass
+class CompactConfig:
+    # Dataset identifier.
+    repo_id: str
+    # Root directory of the dataset (e.g. 'dataset/path').
+    root: str | Path | None = None
+    # Renumber the remaining episodes so that indices are contiguous again.
+    reindex: bool = False
+
+
+def _episode_image_dirs(meta: DoRobotDatasetMetadata, ep_index: int) -> list[Path]:
+    return [meta.get_image_file_path(ep_index, key, frame_index=0).parent for key in meta.camera_keys + meta.depth_keys]
+
+
+def _remove_episode_files(meta: DoRobotDatasetMetadata, ep_index: int) -> None:
+    for fpath in meta.get_episode_files(ep_index):
+        (meta.root / fpath).unlink(missing_ok=True)
+    for img_dir in _episode_image_dirs(meta, ep_index):
+        if (meta.root / img_dir).is_dir():
+            shutil.rmtree(meta.root / img_dir)
+
+
+def _move(root: Path, src: Path, dst: Path) -> None:
+    if not (root / src).exists():
+        return
+    (root / dst).parent.mkdir(parents=True, exist_ok=True)
+    (root / src).replace(root / dst)
+
+
+def _rewrite_episode_table(src: Path, dst: Path, ep_index: int, index_start: int) -> None:
+    """Rewrite the 'episode_index' and 'index' columns of one episode parquet file."""
+    table = pq.read_table(src)
+    num_rows = table.num_rows
+    for name, values in [
+        ("episode_index", np.full(num_rows, ep_index)),
+        ("index", np.arange(index_start, index_start + num_rows)),
+    ]:
+        pos = table.schema.get_field_index(name)
+        field = table.schema.field(pos)
+        table = table.set_column(pos, field, pa.array(values, type=field.type))
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(table, dst)
+    if src != dst:
+        src.unlink()
+
+
+def _shift_episode_stats(ep_stats: dict, ep_index: int, index_start: int) -> dict:
+    ep_stats = dict(ep_stats)
+    if "episode_index" in ep_stats:
+        old = ep_stats["episode_index"]
+        ep_stats["episode_index"] = {
+            **old,
+            "min": np.full_like(old["min"], ep_index),
+            "max": np.full_like(old["max"], ep_index),
+            "mean": np.full_like(old["mean"], ep_index),
+            "std": np.zeros_like(old["std"]),
+        }
+    if "index" in ep_stats:
+        old = ep_stats["index"]
+        shift = index_start - old["min"]
+        ep_stats["index"] = {
+            **old,
+            "min": old["min"] + shift,
+            "max": old["max"] + shift,
+            "mean": old["mean"] + shift,
+        }
+    return ep_stats
+
+
+def _reindex(meta: DoRobotDatasetMetadata) -> dict[int, int]:
+    mapping = {}
+    episodes, episodes_stats = {}, {}
+    index_start = 0
+    for new_idx, old_idx in enumerate(sorted(meta.episodes)):
+        episode = meta.episodes[old_idx]
+        ep_stats = meta.episodes_stats.get(old_idx)
+        if new_idx != old_idx:
+            old_data_path = meta.root / meta.get_episode_parquet_path(old_idx)
+            new_data_path = meta.root / meta.get_episode_parquet_path(new_idx)
+            _rewrite_episode_table(old_data_path, new_data_path, new_idx, index_start)
+            for key in meta.video_keys:
+                _move(meta.root, meta.get_video_file_path(old_idx, key), meta.get_video_file_path(new_idx, key))
+            for key in meta.mic_keys:
+                _move(meta.root, meta.get_audio_file_path(old_idx, key), meta.get_audio_file_path(new_idx, key))
+            for old_dir, new_dir in zip(_episode_image_dirs(meta, old_idx), _episode_image_dirs(meta, new_idx)):
+                _move(meta.root, old_dir, new_dir)
+            if ep_stats is not None:
+                ep_stats = _shift_episode_stats(ep_stats, new_idx, index_start)
+            mapping[old_idx] = new_idx
+
+        episodes[new_idx] = {**episode, "episode_index": new_idx}
+        if ep_stats is not None:
+            episodes_stats[new_idx] = ep_stats
+        index_start += episode["length"]
+
+    meta.episodes, meta.episodes_stats = episodes, episodes_stats
+    write_jsonlines(list(episodes.values()), meta.root / EPISODES_PATH)
+    write_jsonlines(
+        [{"episode_index": ep_idx, "stats": serialize_dict(stats)} for ep_idx, stats in episodes_stats.items()],
+        meta.root / EPISODES_STATS_PATH,
+    )
+
+    meta.info["total_episodes"] = len(episodes)
+    meta.info["total_frames"] = index_start
+    meta.info["total_videos"] = len(episodes) * len(meta.video_keys)
+    meta.info["total_chunks"] = meta.get_episode_chunk(len(episodes) - 1) + 1 if episodes else 0
+    meta.info["splits"] = {"train": f"0:{meta.info['total_episodes']}"}
+    return mapping
+
+
+def compact_dataset(repo_id: str, root: str | Path | None = None, reindex: bool = False) -> dict[int, int | None]:
+    """
+    Deletes the files and metadata of every tombstoned episode. Returns the applied episode mapping
+    (old index -> new index, None for removed episodes).
+    """
+    meta = DoRobotDatasetMetadata(repo_id, root)
+    removed = sorted(meta.tombstones)
+    mapping: dict[int, int | None] = {}
+    if not removed and not reindex:
+        logging.info(f"Nothing to compact in {meta.root}")
+        return mapping
+
+    # episodes are removed / renumbered file by file, so sharded episodes are unpacked first and packed again
+    sharded = bool(meta.shard_index)
+    if sharded:
+        episodes_per_shard = max(Counter(fname for fname, _ in meta.shard_index.values()).values())
+        convert_to_episodes(repo_id, root=meta.root)
+        meta = DoRobotDatasetMetadata(repo_id, meta.root)
+
+    if removed:
+        logging.info(f"Compacting {meta.root}: removing episodes {removed}")
+        for ep_idx in removed:
+            _remove_episode_files(meta, ep_idx)
+            mapping[ep_idx] = None
+
+        delete_episode(set(removed), meta.root)
+        delete_episode_stats(set(removed), meta.root)
+        # total_frames / total_videos only shrink when re-indexing (see _reindex): they are also the next
+        # free global index, which must stay above the indices of the remaining episodes
+        for ep_idx in removed:
+            meta.episodes.pop(ep_idx)
+            meta.episodes_stats.pop(ep_idx, None)
+
+    if reindex:
+        mapping.update(_reindex(meta))
+
+    if not mapping:
+        logging.info(f"Nothing to compact in {meta.root}")
+        if sharded:
+            convert_to_shards(repo_id, root=meta.root, episodes_per_shard=episodes_per_shard)
+        return mapping
+
+    write_info(meta.info, meta.root)
+    meta.tombstones = set()
+    write_tombstones(meta.tombstones, meta.root)
+    remap_dataid_json(meta.root, mapping, file_sizes_for=meta.get_episode_file_sizes)
+    if sharded:
+        convert_to_shards(repo_id, root=meta.root, episodes_per_shard=episodes_per_shard)
+
+    logging.info(f"Compaction of {meta.root} done: {len(meta.episodes)} episodes, {meta.live_frames} frames")
+    return mapping
+
+
+@draccus.wrap()
+def compact(cfg: CompactConfig):
+    init_logging()
+    compact_dataset(cfg.repo_id, root=cfg.root, reindex=cfg.reindex)
+
+
+def main():
+    compact()
+
+
+if __name__ == "__main__":
+    main()
@@ -15,7 +15,7 @@
 # limitations under the License.
 import numpy as np
 
-from operating_platform.utils.dataset import load_image_as_numpy
+from operating_platform.utils.dataset import load_depth_as_numpy, load_image_as_numpy
 
 
 def estimate_num_samples(
@@ -72,6 +72,22 @@ def sample_images(image_paths: list[str]) -> np.ndarray:
     return images
 
 
+def sample_depths(depth_paths: list[str]) -> np.ndarray:
+    """Like `sample_images` for 16-bit depth PNGs, in meters."""
+    sampled_indices = sample_indices(len(depth_paths))
+
+    depths = None
+    for i, idx in enumerate(sampled_indices):
+        depth = auto_downsample_height_width(load_depth_as_numpy(depth_paths[idx], channel_first=True))
+
+        if depths is None:
+            depths = np.empty((len(sampled_indices), *depth.shape), dtype=np.float32)
+
+        depths[i] = depth
+
+    return depths
+
+
 def get_feature_stats(array: np.ndarray, axis: tuple, keepdims: bool) -> dict[str, np.ndarray]:
     return {
         "min": np.min(array, axis=axis, keepdims=keepdims),
@@ -91,6 +107,10 @@ def compute_episode_stats(episode_data: dict[str, list[str] | np.ndarray], featu
             ep_ft_array = sample_images(data)  # data is a list of image paths
             axes_to_reduce = (0, 2, 3)  # keep channel dim
             keepdims = True
+        elif features[key]["dtype"] == "depth":
+            ep_ft_array = sample_depths(data)  # data is a list of depth png paths, stats are in meters
+            axes_to_reduce = (0, 2, 3)
+            keepdims = True
         else:
             ep_ft_array = data  # data is already a np.ndarray
             axes_to_reduce = 0  # compute stats over the first axis
@@ -103,6 +123,8 @@ def compute_episode_stats(episode_data: dict[str, list[str] | np.ndarray], featu
             ep_stats[key] = {
                 k: v if k == "count" else np.squeeze(v / 255.0, axis=0) for k, v in ep_stats[key].items()
             }
+        elif features[key]["dtype"] == "depth":
+            ep_stats[key] = {k: v if k == "count" else np.squeeze(v, axis=0) for k, v in ep_stats[key].items()}
 
     return ep_stats
 
@@ -9,9 +9,12 @@ import datasets
 import numpy as np
 import packaging.version
 import PIL.Image
+import pyarrow as pa
+import pyarrow.parquet as pq
 import torch
 import torch.utils
 from datasets import concatenate_datasets, load_dataset
+from datasets.table import InMemoryTable
 from huggingface_hub import HfApi, snapshot_download
 from huggingface_hub.constants import REPOCARD_NAME
 from huggingface_hub.errors import RevisionNotFoundError
@@ -28,11 +31,13 @@ from operating_platform.dataset.functions import (
 )
 from operating_platform.utils.constants import DOROBOT_DATASET
 from operating_platform.utils.dataset import (
+    ARROW_TORCH_FORMAT,
     DEFAULT_FEATURES,
     DEFAULT_IMAGE_PATH,
     DEFAULT_AUDIO_PATH,
     INFO_PATH,
     TASKS_PATH,
+    VIDEO_INFO_CACHE_PATH,
     append_jsonlines,
     backward_compatible_episodes_stats,
     check_delta_timestamps,
@@ -45,27 +50,28 @@ from operating_platform.utils.dataset import (
 
     get_hf_features_from_features,
 
-    hf_transform_to_torch,
     is_valid_version,
+    load_depth_as_numpy,
     load_episodes,
     load_episodes_stats,
     load_info,
     load_stats,
+    load_shard_index,
     load_tasks,
+    load_tombstones,
     validate_episode_buffer,
     validate_frame,
     write_episode,
     write_episode_stats,
     write_info,
     write_json,
-    delete_episode,
-    delete_episode_stats,
+    write_tombstones,
 )
 from operating_platform.utils.video import (
     VideoFrame,
     decode_video_frames_torchvision,
     encode_video_frames,
-    get_video_info,
+    VideoInfoCache,
 )
 from operating_platform.robot.robots.utils import Robot
 
@@ -102,12 +108,15 @@ class DoRobotDatasetMetadata:
         check_version_compatibility(self.repo_id, self._version, DOROBOT_DATASET_VERSION)
         self.tasks, self.task_to_task_index = load_tasks(self.root)
         self.episodes = load_episodes(self.root)
+        self.tombstones = load_tombstones(self.root)
+        self.shard_index = load_shard_index(self.root)
         if self._version < packaging.version.parse("v2.1"):
             self.stats = load_stats(self.root)
             self.episodes_stats = backward_compatible_episodes_stats(self.stats, self.episodes)
         else:
             self.episodes_stats = load_episodes_stats(self.root)
-            self.stats = aggregate_stats(list(self.episodes_stats.values()))
+            self.stats = self.aggregate_live_stats()
+        self.video_info_cache = VideoInfoCache(self.root / VIDEO_INFO_CACHE_PATH, root=self.root)
 
     def pull_from_repo(
         self,
@@ -129,9 +138,22 @@ class DoRobotDatasetMetadata:
         return packaging.version.parse(self.info["dorobot_dataset_version"])
 
     def get_data_file_path(self, ep_index: int) -> Path:
+        """File holding the episode's rows: its shard when the episode has been packed, else its own parquet."""
+        if ep_index in self.shard_index:
+            return Path(self.shard_index[ep_index][0])
+        return self.get_episode_parquet_path(ep_index)
+
+    def get_episode_parquet_path(self, ep_index: int) -> Path:
+        """Path of the episode in the one-parquet-per-episode layout."""
         ep_chunk = self.get_episode_chunk(ep_index)
         fpath = self.data_path.format(episode_chunk=ep_chunk, episode_index=ep_index)
         return Path(fpath)
+
+    def get_data_row_group(self, ep_index: int) -> int | None:
+        """Row group of the episode inside its shard, None for per-episode files."""
+        if ep_index in self.shard_index:
+            return self.shard_index[ep_index][1]
+        return None
     
     def get_image_file_path(self, ep_index: int, img_key: str, frame_index) -> Path:
         # ep_chunk = self.get_episode_chunk(ep_index)
@@ -148,6 +170,35 @@ class DoRobotDatasetMetadata:
         fpath = self.audio_path.format(episode_chunk=ep_chunk, audio_key=aud_key, episode_index=ep_index)
         return Path(fpath)
 
+    def get_episode_files(self, ep_index: int) -> list[Path]:
+        """Relative paths of every file belonging to an episode (data, videos, audio and raw images)."""
+        fpaths = [self.get_data_file_path(ep_index)]
+        fpaths += [self.get_video_file_path(ep_index, key) for key in self.video_keys]
+        fpaths += [self.get_audio_file_path(ep_index, key) for key in self.mic_keys]
+        for key in self.image_keys + self.depth_keys:
+            img_dir = self.get_image_file_path(ep_index, key, frame_index=0).parent
+            if (self.root / img_dir).is_dir():
+                fpaths += [img_dir / entry.name for entry in os.scandir(self.root / img_dir) if entry.is_file()]
+        return fpaths
+
+    def get_episode_file_sizes(self, ep_index: int) -> dict[str, int]:
+        """
+        On-disk size in bytes of every existing file of `get_episode_files`. For an episode packed in a shard,
+        the data file counts only the compressed size of the episode's row group, not the whole shard.
+        """
+        sizes = {}
+        row_group = self.get_data_row_group(ep_index)
+        for fpath in self.get_episode_files(ep_index):
+            full_path = self.root / fpath
+            if not full_path.is_file():
+                continue
+            if row_group is not None and fpath == self.get_data_file_path(ep_index):
+                rg_meta = pq.ParquetFile(full_path).metadata.row_group(row_group)
+                sizes[str(fpath)] = sum(rg_meta.column(i).total_compressed_size for i in range(rg_meta.num_columns))
+            else:
+                sizes[str(fpath)] = full_path.stat().st_size
+        return sizes
+
     def get_episode_chunk(self, ep_index: int) -> int:
         return ep_index // self.chunks_size
 
@@ -201,6 +252,11 @@ class DoRobotDatasetMetadata:
         """Keys to access visual modalities (regardless of their storage method)."""
         return [key for key, ft in self.features.items() if ft["dtype"] in ["video", "image"]]
     
+    @property
+    def depth_keys(self) -> list[str]:
+        """Keys to access depth maps, stored as 16-bit PNG in millimeters."""
+        return [key for key, ft in self.features.items() if ft["dtype"] == "depth"]
+
     @property
     def mic_keys(self) -> list[str]:
         """Keys to access visual modalities stored as audio."""
@@ -221,11 +277,24 @@ class DoRobotDatasetMetadata:
         """Total number of episodes available."""
         return self.info["total_episodes"]
 
+    @property
+    def live_episodes(self) -> list[int]:
+        """Indices of the episodes that have not been soft-deleted."""
+        return [ep_idx for ep_idx in self.episodes if ep_idx not in self.tombstones]
+
     @property
     def total_frames(self) -> int:
-        """Total number of frames saved in this dataset."""
+        """
+        Total number of frames saved in this dataset. Also the next free global `index`: frames of episodes
+        removed without re-indexing stay counted, see `live_frames`.
+        """
         return self.info["total_frames"]
 
+    @property
+    def live_frames(self) -> int:
+        """Number of frames in the episodes that exist and have not been soft-deleted."""
+        return sum(self.episodes[ep_idx]["length"] for ep_idx in self.live_episodes)
+
     @property
     def total_tasks(self) -> int:
         """Total number of different tasks performed in this dataset."""
@@ -300,34 +369,28 @@ class DoRobotDatasetMetadata:
         write_episode_stats(episode_index, episode_stats, self.root)
 
     def remove_episode(self, ep_index: int) -> None:
-    #     episode_tasks: list[str],
-    #     episode_stats: dict[str, dict],
-        self.info["total_episodes"] -= 1
-
-        episode = self.episodes[ep_index]
-        episode_length = episode["length"]
-        self.info["total_frames"] -= episode_length
-
-        # chunk = self.get_episode_chunk(ep_index)
-        # if chunk >= self.total_chunks:
-        #     self.info["total_chunks"] += 1
-
-        self.info["splits"] = {"train": f"0:{self.info['total_episodes']}"}
-        self.info["total_videos"] -= len(self.video_keys)
-
-        write_info(self.info, self.root)
+        """
+        Soft-delete an episode: it is added to the tombstone set (meta/tombstones.json) and excluded from the
+        aggregated stats. info.json, episodes.jsonl and the episode files are left untouched until
+        `operating_platform.dataset.compact` physically removes them.
+        """
+        if ep_index not in self.episodes:
+            raise IndexError(f"Episode {ep_index} does not exist in {self.root}.")
 
-    #     episode_dict = {
-    #         "episode_index": episode_index,
-    #         "tasks": episode_tasks,
-    #         "length": episode_length,
-    #     }
-    #     self.episodes[episode_index] = episode_dict
-        delete_episode(ep_index, self.root)
+        self.tombstones.add(ep_index)
+        write_tombstones(self.tombstones, self.root)
+        self.stats = self.aggregate_live_stats()
 
-    #     self.episodes_stats[episode_index] = episode_stats
-    #     self.stats = aggregate_stats([self.stats, episode_stats]) if self.stats else episode_stats
-        delete_episode_stats(ep_index, self.root)
+    def aggregate_live_stats(self) -> dict[str, dict]:
+        """
+        Stats aggregated over the live episodes. Datasets older than v2.1 have no per-episode stats (every
+        entry of `episodes_stats` is the dataset-wide stats.json, possibly None), so their stats are kept.
+        """
+        if self._version < packaging.version.parse("v2.1"):
+            return self.stats
+        return aggregate_stats(
+            [stats for ep_idx, stats in self.episodes_stats.items() if ep_idx not in self.tombstones]
+        )
 
     def update_video_info(self) -> None:
         """
@@ -337,7 +400,8 @@ class DoRobotDatasetMetadata:
         for key in self.video_keys:
             if not self.features[key].get("info", None):
                 video_path = self.root / self.get_video_file_path(ep_index=0, vid_key=key)
-                self.info["features"][key]["info"] = get_video_info(video_path)
+                self.info["features"][key]["info"] = self.video_info_cache.get(video_path)
+        self.video_info_cache.save()
 
     def __repr__(self):
         feature_keys = list(self.features)
@@ -395,6 +459,9 @@ class DoRobotDatasetMetadata:
 
         obj.tasks, obj.task_to_task_index = {}, {}
         obj.episodes_stats, obj.stats, obj.episodes = {}, {}, {}
+        obj.tombstones = set()
+        obj.shard_index = {}
+        obj.video_info_cache = VideoInfoCache(obj.root / VIDEO_INFO_CACHE_PATH, root=obj.root)
         obj.info = create_empty_dataset_info(LEROBOT_DATASET_VERSION, DOROBOT_DATASET_VERSION, fps, robot_type, features, use_videos, use_audios)
         if len(obj.video_keys) > 0 and not use_videos:
             raise ValueError()
@@ -540,7 +607,7 @@ class DoRobotDataset(torch.utils.data.Dataset):
             self.repo_id, self.root, self.revision, force_cache_sync=force_cache_sync
         )
         if self.episodes is not None and self.meta._version >= packaging.version.parse("v2.1"):
-            episodes_stats = [self.meta.episodes_stats[ep_idx] for ep_idx in self.episodes]
+            episodes_stats = [self.meta.episodes_stats[ep_idx] for ep_idx in self.selected_episodes]
             self.stats = aggregate_stats(episodes_stats)
 
         # Load actual data
@@ -554,11 +621,12 @@ class DoRobotDataset(torch.utils.data.Dataset):
             self.download_episodes(download_videos)
             self.hf_dataset = self.load_hf_dataset()
 
-        self.episode_data_index = get_episode_data_index(self.meta.episodes, self.episodes)
+        self.hf_dataset = self._exclude_tombstones(self.hf_dataset)
+        self._update_episode_data_index()
 
         # Check timestamps
-        timestamps = torch.stack(self.hf_dataset["timestamp"]).numpy()
-        episode_indices = torch.stack(self.hf_dataset["episode_index"]).numpy()
+        timestamps = self.hf_dataset.select_columns("timestamp")[:]["timestamp"].numpy()
+        episode_indices = self.hf_dataset.select_columns("episode_index")[:]["episode_index"].numpy()
         ep_data_index_np = {k: t.numpy() for k, t in self.episode_data_index.items()}
         check_timestamps_sync(timestamps, episode_indices, ep_data_index_np, self.fps, self.tolerance_s)
 
@@ -653,8 +721,9 @@ class DoRobotDataset(torch.utils.data.Dataset):
         self.pull_from_repo(allow_patterns=files, ignore_patterns=ignore_patterns)
 
     def get_episodes_file_paths(self) -> list[Path]:
-        episodes = self.episodes if self.episodes is not None else list(range(self.meta.total_episodes))
-        fpaths = [str(self.meta.get_data_file_path(ep_idx)) for ep_idx in episodes]
+        episodes = self.selected_episodes
+        # several episodes may share one shard file
+        fpaths = list(dict.fromkeys(str(self.meta.get_data_file_path(ep_idx)) for ep_idx in episodes))
         if len(self.meta.video_keys) > 0:
             video_files = [
                 str(self.meta.get_video_file_path(ep_idx, vid_key))
@@ -667,24 +736,41 @@ class DoRobotDataset(torch.utils.data.Dataset):
 
     def load_hf_dataset(self) -> datasets.Dataset:
         """hf_dataset contains all the observations, states, actions, rewards, etc."""
-        if self.episodes is None:
+        if self.meta.shard_index:
+            hf_dataset = self._load_sharded_hf_dataset()
+        elif self.episodes is None:
             path = str(self.root / "data")
             hf_dataset = load_dataset("parquet", data_dir=path, split="train")
         else:
             files = [str(self.root / self.meta.get_data_file_path(ep_idx)) for ep_idx in self.episodes]
             hf_dataset = load_dataset("parquet", data_files=files, split="train")
 
-        # TODO(aliberts): hf_dataset.set_format("torch")
-        hf_dataset.set_transform(hf_transform_to_torch)
+        hf_dataset.set_format(ARROW_TORCH_FORMAT)
         return hf_dataset
 
+    def _load_sharded_hf_dataset(self) -> datasets.Dataset:
+        """Reads through meta/shard_index.json. Shards hold consecutive episodes, one row group each."""
+        episodes = self.episodes if self.episodes is not None else list(self.meta.episodes)
+        if self.episodes is None:
+            files = list(dict.fromkeys(str(self.root / self.meta.get_data_file_path(ep_idx)) for ep_idx in episodes))
+            return load_dataset("parquet", data_files=files, split="train")
+
+        tables = []
+        for ep_idx in episodes:
+            fpath = self.root / self.meta.get_data_file_path(ep_idx)
+            row_group = self.meta.get_data_row_group(ep_idx)
+            if row_group is None:
+                tables.append(pq.read_table(fpath))
+            else:
+                tables.append(pq.ParquetFile(fpath).read_row_group(row_group))
+        return datasets.Dataset(InMemoryTable(pa.concat_tables(tables)))
+
     def create_hf_dataset(self) -> datasets.Dataset:
         features = get_hf_features_from_features(self.features)
         ft_dict = {col: [] for col in features}
         hf_dataset = datasets.Dataset.from_dict(ft_dict, features=features, split="train")
 
-        # TODO(aliberts): hf_dataset.set_format("torch")
-        hf_dataset.set_transform(hf_transform_to_torch)
+        hf_dataset.set_format(ARROW_TORCH_FORMAT)
         return hf_dataset
 
     @property
@@ -697,10 +783,16 @@ class DoRobotDataset(torch.utils.data.Dataset):
         """Number of frames in selected episodes."""
         return len(self.hf_dataset) if self.hf_dataset is not None else self.meta.total_frames
 
+    @property
+    def selected_episodes(self) -> list[int]:
+        """Episodes selected at init (or all of them), without the soft-deleted ones."""
+        episodes = self.episodes if self.episodes is not None else self.meta.episodes
+        return [ep_idx for ep_idx in episodes if ep_idx not in self.meta.tombstones]
+
     @property
     def num_episodes(self) -> int:
         """Number of episodes selected."""
-        return len(self.episodes) if self.episodes is not None else self.meta.total_episodes
+        return len(self.selected_episodes)
 
     @property
     def features(self) -> dict[str, dict]:
@@ -714,9 +806,28 @@ class DoRobotDataset(torch.utils.data.Dataset):
         else:
             return get_hf_features_from_features(self.features)
 
+    def _update_episode_data_index(self) -> None:
+        episodes = self.selected_episodes
+        self.episode_data_index = get_episode_data_index(self.meta.episodes, episodes)
+        # episode_data_index is positional, map episode_index to its position
+        self._episode_positions = {ep_idx: pos for pos, ep_idx in enumerate(episodes)}
+
+    def _exclude_tombstones(self, hf_dataset: datasets.Dataset) -> datasets.Dataset:
+        """Returns a view of hf_dataset without the rows of soft-deleted episodes (no data is rewritten)."""
+        if not self.meta.tombstones or len(hf_dataset) == 0:
+            return hf_dataset
+        episode_indices = np.asarray(hf_dataset.with_format("numpy")["episode_index"])
+        keep = np.flatnonzero(~np.isin(episode_indices, list(self.meta.tombstones)))
+        if len(keep) == len(hf_dataset):
+            return hf_dataset
+        hf_dataset = hf_dataset.select(keep)
+        hf_dataset.set_format(ARROW_TORCH_FORMAT)
+        return hf_dataset
+
     def _get_query_indices(self, idx: int, ep_idx: int) -> tuple[dict[str, list[int | bool]]]:
-        ep_start = self.episode_data_index["from"][ep_idx]
-        ep_end = self.episode_data_index["to"][ep_idx]
+        ep_pos = self._episode_positions[ep_idx]
+        ep_start = self.episode_data_index["from"][ep_pos]
+        ep_end = self.episode_data_index["to"][ep_pos]
         query_indices = {
             key: [max(ep_start.item(), min(ep_end.item() - 1, idx + delta)) for delta in delta_idx]
             for key, delta_idx in self.delta_indices.items()
@@ -737,8 +848,8 @@ class DoRobotDataset(torch.utils.data.Dataset):
         query_timestamps = {}
         for key in self.meta.video_keys:
             if query_indices is not None and key in query_indices:
-                timestamps = self.hf_dataset.select(query_indices[key])["timestamp"]
-                query_timestamps[key] = torch.stack(timestamps).tolist()
+                timestamps = self.hf_dataset.select_columns("timestamp")[query_indices[key]]["timestamp"]
+                query_timestamps[key] = timestamps.tolist()
             else:
                 query_timestamps[key] = [current_ts]
 
@@ -746,7 +857,7 @@ class DoRobotDataset(torch.utils.data.Dataset):
 
     def _query_hf_dataset(self, query_indices: dict[str, list[int]]) -> dict:
         return {
-            key: torch.stack(self.hf_dataset.select(q_idx)[key])
+            key: self.hf_dataset.select_columns(key)[q_idx][key]
             for key, q_idx in query_indices.items()
             if key not in self.meta.video_keys
         }
@@ -793,6 +904,12 @@ class DoRobotDataset(torch.utils.data.Dataset):
             video_frames = self._query_videos(query_timestamps, ep_idx)
             item = {**video_frames, **item}
 
+        if len(self.meta.depth_keys) > 0:
+            frame_index = item["frame_index"].item()
+            for key in self.meta.depth_keys:
+                depth_path = self.root / self.meta.get_image_file_path(ep_idx, key, frame_index)
+                item[key] = torch.from_numpy(load_depth_as_numpy(depth_path))
+
         if self.image_transforms is not None:
             image_keys = self.meta.camera_keys
             for cam in image_keys:
@@ -879,7 +996,7 @@ class DoRobotDataset(torch.utils.data.Dataset):
                     f"An element of the frame is not in the features. '{key}' not in '{self.features.keys()}'."
                 )
 
-            if self.features[key]["dtype"] in ["image", "video"]:
+            if self.features[key]["dtype"] in ["image", "video", "depth"]:
                 img_path = self._get_image_file_path(
                     episode_index=self.episode_buffer["episode_index"], image_key=key, frame_index=frame_index
                 )
@@ -927,7 +1044,7 @@ class DoRobotDataset(torch.utils.data.Dataset):
         for key, ft in self.features.items():
             # index, episode_index, task_index are already processed above, and image and video
             # are processed separately by storing image path and frame info as meta data
-            if key in ["index", "episode_index", "task_index"] or ft["dtype"] in ["image", "video", "audio"]:
+            if key in ["index", "episode_index", "task_index"] or ft["dtype"] in ["image", "video", "depth", "audio"]:
                 continue
             episode_buffer[key] = np.stack(episode_buffer[key])
 
@@ -956,12 +1073,11 @@ class DoRobotDataset(torch.utils.data.Dataset):
             self.tolerance_s,
         )
 
-        if len(self.meta.video_keys) > 0:
-            video_files = list(self.root.rglob("*.mp4"))
-            assert len(video_files) == self.num_episodes * len(self.meta.video_keys)
+        for key in self.meta.video_keys:
+            assert (self.root / self.meta.get_video_file_path(episode_index, key)).is_file()
+        assert (self.root / self.meta.get_data_file_path(episode_index)).is_file()
 
-        parquet_files = list(self.root.rglob("*.parquet"))
-        assert len(parquet_files) == self.num_episodes
+        self._update_episode_data_index()
 
         # delete images
         if len(self.meta.video_keys) > 0:
@@ -979,89 +1095,37 @@ class DoRobotDataset(torch.utils.data.Dataset):
         return episode_index
 
     def remove_episode(self, ep_idx: int):
+        """
+        软删除：只写入 tombstone，文件保留到 compact 时再物理删除。
+        内存中的 hf_dataset、episode_data_index、stats 立即排除该剧集。
+        """
         print(f"[DEBUG] 开始删除剧集: ep_idx={ep_idx}")
-        
-        if ep_idx == 0 and self.meta.total_episodes == 1:
-            print(f"[WARNING] dorobot_dataset.py remove_episode(): 检测到 ep_idx=0，即将删除整个目录树: {self.root}")
-            shutil.rmtree(self.root)
-            print(f"[INFO] 目录树 {self.root} 已删除")
-            return
 
-        # 处理视频文件
-        if len(self.meta.video_keys) > 0:
-            print(f"[INFO] 正在处理视频文件 (keys: {self.meta.video_keys})")
-            for key in self.meta.video_keys:
-                video_path = self.root / self.meta.get_video_file_path(ep_idx, key)
-                if os.path.isfile(video_path):
-                    print(f"[DEBUG] 删除视频文件: {video_path}")
-                    os.remove(video_path)
-                    # 验证删除结果
-                    if not os.path.exists(video_path):
-                        print(f"[SUCCESS] 成功删除视频文件: {video_path}")
-                    else:
-                        print(f"[ERROR] 删除失败！文件仍存在: {video_path}")
-                else:
-                    print(f"[SKIP] 视频文件不存在，跳过删除: {video_path}")
-
-        # 处理图片文件
-        if len(self.meta.image_keys) > 0:
-            print(f"[INFO] 正在处理图片文件 (keys: {self.meta.image_keys})")
-            for key in self.meta.image_keys:
-                image_dir = self.root / self._get_image_file_path(ep_idx, key, frame_index=0).parent
-                if os.path.isdir(image_dir):
-                    print(f"[DEBUG] 删除图片文件夹: {image_dir}")
-                    shutil.rmtree(image_dir)
-                    # 验证删除结果
-                    if not os.path.exists(image_dir):
-                        print(f"[SUCCESS] 成功删除图片文件夹: {image_dir}")
-                    else:
-                        print(f"[ERROR] 删除失败！图片文件夹仍存在: {image_dir}")
-                else:
-                    print(f"[SKIP] 图片文件夹不存在，跳过删除: {image_dir}")
-
-        # 处理音频文件
-        if len(self.meta.mic_keys) > 0:
-            print(f"[INFO] 正在处理音频文件 (keys: {self.meta.mic_keys})")
-            for key in self.meta.mic_keys:
-                audio_path = self.root / self.meta.get_audio_file_path(ep_idx, key)
-                if os.path.isfile(audio_path):
-                    print(f"[DEBUG] 删除音频文件: {audio_path}")
-                    os.remove(audio_path)
-                    # 验证删除结果
-                    if not os.path.exists(audio_path):
-                        print(f"[SUCCESS] 成功删除音频文件: {audio_path}")
-                    else:
-                        print(f"[ERROR] 删除失败！文件仍存在: {audio_path}")
-                else:
-                    print(f"[SKIP] 视频文件不存在，跳过删除: {audio_path}")
-
-        # 处理数据文件
-        data_path = self.root / self.meta.get_data_file_path(ep_idx)
-        if os.path.isfile(data_path):
-            print(f"[DEBUG] 删除数据文件: {data_path}")
-            os.remove(data_path)
-            if not os.path.exists(data_path):
-                print(f"[SUCCESS] 成功删除数据文件: {data_path}")
-            else:
-                print(f"[ERROR] 删除失败！文件仍存在: {data_path}")
-        else:
-            print(f"[SKIP] 数据文件不存在，跳过删除: {data_path}")
-
-        # 最后移除元数据
-        print(f"[INFO] 即将从元数据中移除 ep_idx={ep_idx}")
         self.meta.remove_episode(ep_idx)
-        print(f"[SUCCESS] 剧集 {ep_idx} 已完全删除")
+        self.hf_dataset = self._exclude_tombstones(self.hf_dataset)
+        self._update_episode_data_index()
+        if self.episodes is not None and self.meta._version >= packaging.version.parse("v2.1"):
+            self.stats = aggregate_stats([self.meta.episodes_stats[idx] for idx in self.selected_episodes])
+
+        print(f"[SUCCESS] 剧集 {ep_idx} 已标记删除 (tombstones: {sorted(self.meta.tombstones)})")
 
     def _save_episode_table(self, episode_buffer: dict, episode_index: int) -> None:
-        episode_dict = {key: episode_buffer[key] for key in self.hf_features}
-        ep_dataset = datasets.Dataset.from_dict(episode_dict, features=self.hf_features, split="train")
+        # Always write from the dataset features so that 1-D features are FixedSizeList columns,
+        # which ArrowTorchFormatter reads without copying.
+        hf_features = get_hf_features_from_features(self.features)
+        episode_dict = {key: episode_buffer[key] for key in hf_features}
+        ep_dataset = datasets.Dataset.from_dict(episode_dict, features=hf_features, split="train")
         ep_dataset = embed_images(ep_dataset)
-        self.hf_dataset = concatenate_datasets([self.hf_dataset, ep_dataset])
-        self.hf_dataset.set_transform(hf_transform_to_torch)
         ep_data_path = self.root / self.meta.get_data_file_path(ep_index=episode_index)
         ep_data_path.parent.mkdir(parents=True, exist_ok=True)
         ep_dataset.to_parquet(ep_data_path)
 
+        if self.hf_dataset.features != hf_features:
+            # dataset loaded from older files written with variable-length lists
+            ep_dataset = ep_dataset.cast(self.hf_dataset.features)
+        self.hf_dataset = concatenate_datasets([self.hf_dataset, ep_dataset])
+        self.hf_dataset.set_format(ARROW_TORCH_FORMAT)
+
     def clear_episode_buffer(self) -> None:
         episode_index = self.episode_buffer["episode_index"]
 
@@ -1073,7 +1137,7 @@ class DoRobotDataset(torch.utils.data.Dataset):
             shutil.rmtree(self.root)
         else:
             if self.image_writer is not None:
-                for cam_key in self.meta.camera_keys:
+                for cam_key in self.meta.camera_keys + self.meta.depth_keys:
                     img_dir = self._get_image_file_path(
                         episode_index=episode_index, image_key=cam_key, frame_index=0
                     ).parent
@@ -0,0 +1,203 @@
+"""
+Report camera frame drops, duplicates and latency of recorded episodes.
+
+Robots that report `frame_features` record, for every camera and every dataset frame, the frame the camera
+driver numbered and timestamped (`observation.frame_id`, `observation.sensor_ns`) and how old the frame was
+when the observation was assembled (`observation.frame_latency_s`). Per episode and camera this command reports:
+
+- gaps: consecutive dataset frames whose frame ids advance by more than the usual step (the median step,
+  e.g. 2 when a 60 fps camera is recorded at 30 fps) times `gap_factor`, and the number of sensor frames lost
+  in them;
+- duplicates: consecutive dataset frames holding the same sensor frame (the camera did not deliver in time);
+- resets: frame ids going backwards (camera reopened);
+- sensor timestamp gaps: intervals longer than `gap_factor` times the median interval, which also catches
+  drops inside the driver when the frame id is only a host-side counter (OpenCV cameras);
+- latency percentiles (capture to observation assembly).
+
+Cameras without frame ids (value -1) are reported as such. Datasets recorded before these columns existed
+have nothing to analyze.
+
+```
+python -m operating_platform.dataset.frame_drops \
+    --repo_id=dorobot/test \
+    --root=/path/to/dataset \
+    --output=/path/to/frame_drops.json
+```
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import draccus
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from operating_platform.dataset.dorobot_dataset import DoRobotDatasetMetadata
+from operating_platform.robot.transport.channel import FRAME_ID_KEY, FRAME_LATENCY_KEY, SENSOR_NS_KEY
+from operating_platform.utils.utils import init_logging
+
+
+LATENCY_PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class FrameDropsConfig:
+    # Dataset identifier.
+    repo_id: str
+    # Root directory of the dataset (e.g. 'dataset/path').
+    root: str | Path | None = None
+    # Episodes to analyze, every live (not soft-deleted) episode when empty.
+    episodes: list[int] = field(default_factory=list)
+    # A step (frame id or sensor timestamp) larger than this many median steps counts as a gap.
+    gap_factor: float = 1.5
+    # Also write the report as JSON to this path.
+    output: str | Path | None = None
+
+
+def read_episode_table(meta: DoRobotDatasetMetadata, ep_index: int, columns: list[str]) -> pa.Table:
+    """Reads `columns` of one episode, from its own parquet file or from its row group in a shard."""
+    fpath = meta.root / meta.get_data_file_path(ep_index)
+    row_group = meta.get_data_row_group(ep_index)
+    if row_group is None:
+        return pq.read_table(fpath, columns=columns)
+    return pq.ParquetFile(fpath).read_row_group(row_group, columns=columns)
+
+
+def _column(table: pa.Table, key: str, dtype) -> np.ndarray | None:
+    """(num_frames, num_cameras) array of a per-camera column, None if the episode does not have it."""
+    if key not in table.column_names:
+        return None
+    return np.array(table.column(key).to_pylist(), dtype=dtype).reshape(table.num_rows, -1)
+
+
+def _median_step(steps: np.ndarray) -> float:
+    positive = steps[steps > 0]
+    return float(np.median(positive)) if positive.size else 0.0
+
+
+def analyze_frame_ids(frame_ids: np.ndarray, gap_factor: float) -> dict:
+    """Gaps, lost frames, duplicates and resets in the frame ids one camera delivered, frame by frame."""
+    valid = frame_ids[frame_ids >= 0]
+    report = {"frames": int(frame_ids.size), "without_id": int(frame_ids.size - valid.size)}
+    if valid.size < 2:
+        return report
+
+    steps = np.diff(valid)
+    step = max(round(_median_step(steps)), 1)
+    gaps = steps[steps > step * gap_factor]
+    report.update(
+        {
+            "step": step,
+            "gaps": int(gaps.size),
+            "lost": int((gaps - step).sum()),
+            "max_gap": int(gaps.max()) if gaps.size else 0,
+            "duplicates": int(np.count_nonzero(steps == 0)),
+            "resets": int(np.count_nonzero(steps < 0)),
+        }
+    )
+    return report
+
+
+def analyze_sensor_timestamps(sensor_ns: np.ndarray, gap_factor: float) -> dict:
+    """Interval statistics of the hardware timestamps of one camera (ms)."""
+    valid = sensor_ns[sensor_ns >= 0]
+    if valid.size < 2:
+        return {}
+
+    intervals_ms = np.diff(valid) / 1e6
+    median_ms = _median_step(intervals_ms)
+    moving = intervals_ms[intervals_ms > 0]
+    return {
+        "interval_median_ms": median_ms,
+        "interval_max_ms": float(moving.max()) if moving.size else 0.0,
+        "timestamp_gaps": int(np.count_nonzero(intervals_ms > median_ms * gap_factor)) if median_ms else 0,
+    }
+
+
+def analyze_latency(latency_s: np.ndarray) -> dict:
+    """Percentiles of the capture-to-assembly latency of one camera (ms)."""
+    if latency_s.size == 0:
+        return {}
+    latency_ms = latency_s * 1e3
+    report = {f"latency_p{p}_ms": float(np.percentile(latency_ms, p)) for p in LATENCY_PERCENTILES}
+    report["latency_max_ms"] = float(latency_ms.max())
+    return report
+
+
+def analyze_episode(meta: DoRobotDatasetMetadata, ep_index: int, gap_factor: float = 1.5) -> dict[str, dict]:
+    """Per-camera report of one episode, empty if the episode has no frame id column."""
+    keys = [key for key in (FRAME_ID_KEY, SENSOR_NS_KEY, FRAME_LATENCY_KEY) if key in meta.features]
+    if FRAME_ID_KEY not in keys:
+        return {}
+
+    table = read_episode_table(meta, ep_index, keys)
+    frame_ids = _column(table, FRAME_ID_KEY, np.int64)
+    sensor_ns = _column(table, SENSOR_NS_KEY, np.int64)
+    latency_s = _column(table, FRAME_LATENCY_KEY, np.float64)
+
+    report = {}
+    for i, camera in enumerate(meta.features[FRAME_ID_KEY]["names"]):
+        camera_report = analyze_frame_ids(frame_ids[:, i], gap_factor)
+        if sensor_ns is not None:
+            camera_report.update(analyze_sensor_timestamps(sensor_ns[:, i], gap_factor))
+        if latency_s is not None:
+            camera_report.update(analyze_latency(latency_s[:, i]))
+        report[camera] = camera_report
+    return report
+
+
+def _format_camera(camera: str, report: dict) -> str:
+    if "step" not in report:
+        return f"  {camera}: {report['frames']} frames, no frame ids"
+    line = (
+        f"  {camera}: {report['frames']} frames, step {report['step']}, gaps {report['gaps']} "
+        f"(lost {report['lost']}, max {report['max_gap']}), duplicates {report['duplicates']}, "
+        f"resets {report['resets']}"
+    )
+    if "interval_median_ms" in report:
+        line += (
+            f", sensor interval {report['interval_median_ms']:.1f} ms (max {report['interval_max_ms']:.1f} ms, "
+            f"gaps {report['timestamp_gaps']})"
+        )
+    if "latency_p50_ms" in report:
+        line += ", latency " + " / ".join(f"p{p} {report[f'latency_p{p}_ms']:.1f}" for p in LATENCY_PERCENTILES)
+        line += f" / max {report['latency_max_ms']:.1f} ms"
+    return line
+
+
+def frame_drop_report(
+    repo_id: str, root: str | Path | None = None, episodes: list[int] | None = None, gap_factor: float = 1.5
+) -> dict[int, dict[str, dict]]:
+    """Per-episode, per-camera report (see the module docstring), logged as it is computed."""
+    meta = DoRobotDatasetMetadata(repo_id, root)
+    if FRAME_ID_KEY not in meta.features:
+        logging.warning(f"{meta.root} has no '{FRAME_ID_KEY}' column, nothing to analyze")
+        return {}
+
+    report = {}
+    for ep_index in episodes or meta.live_episodes:
+        report[ep_index] = analyze_episode(meta, ep_index, gap_factor)
+        logging.info(f"episode {ep_index}:")
+        for camera, camera_report in report[ep_index].items():
+            logging.info(_format_camera(camera, camera_report))
+    return report
+
+
+@draccus.wrap()
+def frame_drops(cfg: FrameDropsConfig):
+    init_logging()
+    report = frame_drop_report(cfg.repo_id, root=cfg.root, episodes=cfg.episodes, gap_factor=cfg.gap_factor)
+    if cfg.output is not None:
+        with open(cfg.output, "w") as f:
+            json.dump({str(ep_index): ep_report for ep_index, ep_report in report.items()}, f, indent=4)
+
+
+def main():
+    frame_drops()
+
+
+if __name__ == "__main__":
+    main()
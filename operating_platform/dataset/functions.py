@@ -49,7 +49,24 @@ def get_features_from_robot(robot: Robot, use_videos: bool = True) -> dict:
             key: {"dtype": "audio", **ft}
             for key, ft in robot.microphone_features.items()
         }
-    return {**robot.motor_features, **camera_ft, **microphone_ft, **DEFAULT_FEATURES}
+    # raw depth maps (dtype "depth", never encoded to video), if the robot records any
+    depth_ft = getattr(robot, "depth_features", {})
+    # per-stream capture-time skew recorded by the robot's synchronizer, if any
+    sync_ft = getattr(robot, "sync_features", {})
+    # per-camera validity flags of the recorded frames, if the robot reports them
+    health_ft = getattr(robot, "health_features", {})
+    # per-camera device frame ids, hardware timestamps and latency of the recorded frames, if the robot reports them
+    frame_ft = getattr(robot, "frame_features", {})
+    return {
+        **robot.motor_features,
+        **camera_ft,
+        **depth_ft,
+        **microphone_ft,
+        **sync_ft,
+        **health_ft,
+        **frame_ft,
+        **DEFAULT_FEATURES,
+    }
 
 def get_safe_version(repo_id: str, version: str | packaging.version.Version) -> str:
     """
@@ -68,9 +68,22 @@ def image_array_to_pil_image(image_array: np.ndarray, range_check: bool = True)
     return PIL.Image.fromarray(image_array)
 
 
+def depth_array_to_pil_image(depth_array: np.ndarray) -> PIL.Image.Image:
+    """uint16 millimeter depth of shape (H, W), (H, W, 1) or (1, H, W) to a 16-bit image (saved losslessly as PNG)."""
+    if depth_array.dtype != np.uint16:
+        raise ValueError(f"Depth images must be uint16 millimeters, but dtype is {depth_array.dtype}.")
+    if depth_array.ndim == 3:
+        depth_array = depth_array[..., 0] if depth_array.shape[-1] == 1 else depth_array[0]
+    if depth_array.ndim != 2:
+        raise ValueError(f"The depth array has {depth_array.ndim} dimensions, but 2 is expected.")
+    return PIL.Image.fromarray(np.ascontiguousarray(depth_array))
+
+
 def write_image(image: np.ndarray | PIL.Image.Image, fpath: Path):
     try:
-        if isinstance(image, np.ndarray):
+        if isinstance(image, np.ndarray) and image.dtype == np.uint16:
+            img = depth_array_to_pil_image(image)
+        elif isinstance(image, np.ndarray):
             img = image_array_to_pil_image(image)
         elif isinstance(image, PIL.Image.Image):
             img = image
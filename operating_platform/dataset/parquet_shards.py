@@ -0,0 +1,136 @@
+"""
+Convert a DoRobotDataset between the one-parquet-per-episode layout and the sharded layout.
+
+In the sharded layout, consecutive episodes are packed into `data/shards/shard_XXXXXX.parquet`, one row group
+per episode, and `meta/shard_index.json` maps every packed episode_index to (shard file, row group).
+`DoRobotDatasetMetadata.get_data_file_path` and `DoRobotDataset.load_hf_dataset` read through that index, so
+both layouts (and a mix of them, e.g. when recording resumes on a sharded dataset) load the same way.
+New episodes are always written to their own parquet file; run the converter again to pack them.
+
+Examples:
+```
+python -m operating_platform.dataset.parquet_shards \
+    --repo_id=dorobot/test \
+    --root=/path/to/dataset \
+    --layout=shard \
+    --episodes_per_shard=1000
+
+python -m operating_platform.dataset.parquet_shards \
+    --repo_id=dorobot/test \
+    --root=/path/to/dataset \
+    --layout=episode
+```
+"""
+
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+
+import draccus
+import pyarrow.parquet as pq
+
+from operating_platform.dataset.dorobot_dataset import DoRobotDatasetMetadata
+from operating_platform.utils.data_file import update_manifest_files
+from operating_platform.utils.dataset import DEFAULT_SHARD_PATH, write_shard_index
+from operating_platform.utils.utils import init_logging
+
+
+@dataclass
+class ParquetLayoutConfig:
+    # Dataset identifier.
+    repo_id: str
+    # Root directory of the dataset (e.g. 'dataset/path').
+    root: str | Path | None = None
+    # Target layout: "shard" packs per-episode files into shards, "episode" splits shards back.
+    layout: str = "shard"
+    # Max number of episodes packed in one shard.
+    episodes_per_shard: int = 1000
+
+
+def _next_shard_index(meta: DoRobotDatasetMetadata) -> int:
+    shard_ids = [int(Path(fname).stem.rsplit("_", 1)[-1]) for fname, _ in meta.shard_index.values()]
+    return max(shard_ids) + 1 if shard_ids else 0
+
+
+def convert_to_shards(repo_id: str, root: str | Path | None = None, episodes_per_shard: int = 1000) -> int:
+    """Packs every per-episode parquet file into shards. Returns the number of episodes packed."""
+    meta = DoRobotDatasetMetadata(repo_id, root)
+    pending = [ep_idx for ep_idx in sorted(meta.episodes) if ep_idx not in meta.shard_index]
+    shard_index = _next_shard_index(meta)
+
+    for start in range(0, len(pending), episodes_per_shard):
+        batch = pending[start : start + episodes_per_shard]
+        shard_path = DEFAULT_SHARD_PATH.format(shard_index=shard_index)
+        (meta.root / shard_path).parent.mkdir(parents=True, exist_ok=True)
+
+        writer = None
+        try:
+            for row_group, ep_idx in enumerate(batch):
+                table = pq.read_table(meta.root / meta.get_episode_parquet_path(ep_idx))
+                if writer is None:
+                    writer = pq.ParquetWriter(meta.root / shard_path, table.schema)
+                elif table.schema != writer.schema:
+                    table = table.cast(writer.schema)
+                # one row group per episode
+                writer.write_table(table, row_group_size=max(table.num_rows, 1))
+                meta.shard_index[ep_idx] = (shard_path, row_group)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        # the index is written only once the shard is complete, then the per-episode files can go
+        write_shard_index(meta.shard_index, meta.root)
+        for ep_idx in batch:
+            (meta.root / meta.get_episode_parquet_path(ep_idx)).unlink()
+        update_manifest_files(meta.root, batch, meta.get_episode_file_sizes)
+
+        logging.info(f"Packed episodes {batch[0]}-{batch[-1]} into {shard_path}")
+        shard_index += 1
+
+    return len(pending)
+
+
+def convert_to_episodes(repo_id: str, root: str | Path | None = None) -> int:
+    """Splits every shard back into one parquet file per episode. Returns the number of episodes unpacked."""
+    meta = DoRobotDatasetMetadata(repo_id, root)
+    shard_files = sorted({fname for fname, _ in meta.shard_index.values()})
+
+    num_episodes = 0
+    for shard_path in shard_files:
+        parquet_file = pq.ParquetFile(meta.root / shard_path)
+        episodes = [ep_idx for ep_idx, (fname, _) in meta.shard_index.items() if fname == shard_path]
+        for ep_idx in episodes:
+            table = parquet_file.read_row_group(meta.shard_index[ep_idx][1])
+            ep_path = meta.root / meta.get_episode_parquet_path(ep_idx)
+            ep_path.parent.mkdir(parents=True, exist_ok=True)
+            pq.write_table(table, ep_path)
+
+        for ep_idx in episodes:
+            del meta.shard_index[ep_idx]
+        write_shard_index(meta.shard_index, meta.root)
+        (meta.root / shard_path).unlink()
+        update_manifest_files(meta.root, episodes, meta.get_episode_file_sizes)
+
+        logging.info(f"Unpacked {len(episodes)} episodes from {shard_path}")
+        num_episodes += len(episodes)
+
+    return num_episodes
+
+
+@draccus.wrap()
+def convert(cfg: ParquetLayoutConfig):
+    init_logging()
+    if cfg.layout == "shard":
+        convert_to_shards(cfg.repo_id, root=cfg.root, episodes_per_shard=cfg.episodes_per_shard)
+    elif cfg.layout == "episode":
+        convert_to_episodes(cfg.repo_id, root=cfg.root)
+    else:
+        raise ValueError(f"Unknown parquet layout '{cfg.layout}', expected 'shard' or 'episode'.")
+
+
+def main():
+    convert()
+
+
+if __name__ == "__main__":
+    main()
@@ -174,6 +174,10 @@ def visualize_dataset(
                         
                         rr.log(key, rr.Image(img))
 
+                # 深度图 (米)
+                for key in dataset.meta.depth_keys:
+                    rr.log(key, rr.DepthImage(batch[key][i][0].numpy(), meter=1.0))
+
                 # display each dimension of action space (e.g. actuators command)
                 if "action" in batch:
                     for dim_idx, val in enumerate(batch["action"][i]):
@@ -8,6 +8,10 @@ import pyarrow as pa
 from dora import Node
 from piper_sdk import C_PiperInterface
 
+# 两条动作之间的最小间隔 (秒)，更密的动作直接丢弃。要小于发送端的下发周期 (ActionSender，默认 30 Hz 即 33.3 ms)，
+# 留出 ZeroMQ -> 桥接节点 -> dora 的传输抖动，否则一条迟到的动作会导致紧随其后按时到达的下一条被丢弃
+MIN_ACTION_INTERVAL_S = float(os.getenv("MIN_ACTION_INTERVAL_S", "0.025"))
+
 
 def enable_fun(piper: C_PiperInterface):
     """使能机械臂并检测使能状态,尝试0.05s,如果使能超时则退出程序."""
@@ -50,8 +54,8 @@ def main():
             if event["id"] == "action_joint":
                 # print(f" get action_joint")
 
-                # Do not push to many commands to fast. Limiting it to 30Hz
-                if time.time() - elapsed_time > 0.03:
+                # Do not push to many commands to fast. Limiting it to 1 / MIN_ACTION_INTERVAL_S
+                if time.time() - elapsed_time > MIN_ACTION_INTERVAL_S:
                     elapsed_time = time.time()
                 else:
                     continue
@@ -74,8 +78,8 @@ def main():
 
             elif event["id"] == "action_endpose":
                 
-                # Do not push to many commands to fast. Limiting it to 30Hz
-                if time.time() - elapsed_time > 0.03:
+                # Do not push to many commands to fast. Limiting it to 1 / MIN_ACTION_INTERVAL_S
+                if time.time() - elapsed_time > MIN_ACTION_INTERVAL_S:
                     elapsed_time = time.time()
                 else:
                     continue
@@ -95,8 +99,8 @@ def main():
             elif event["id"] == "action_gripper":
                 # print(f" get action_gripper")
 
-                # Do not push to many commands to fast. Limiting it to 30Hz
-                if time.time() - elapsed_time > 0.03:
+                # Do not push to many commands to fast. Limiting it to 1 / MIN_ACTION_INTERVAL_S
+                if time.time() - elapsed_time > MIN_ACTION_INTERVAL_S:
                     elapsed_time = time.time()
                 else:
                     continue
@@ -108,6 +112,9 @@ def main():
 
             elif event["id"] == "tick":
                 # Slave Arm
+                capture_ns = time.time_ns()  # 采集时间戳，随 metadata 传到机械臂进程做多传感器同步
+                # tick 的 metadata (来自 capture_sync 时带有 tick_seq) 原样带到输出上
+                metadata = {**event["metadata"], "capture_ns": capture_ns}
                 joint = piper.GetArmJointMsgs()
 
                 joint_value = []
@@ -121,7 +128,7 @@ def main():
                 gripper = piper.GetArmGripperMsgs()
                 joint_value += [gripper.gripper_state.grippers_angle / 1000 / 100]
 
-                node.send_output("slave_jointstate", pa.array(joint_value, type=pa.float32()))
+                node.send_output("slave_jointstate", pa.array(joint_value, type=pa.float32()), metadata)
 
                 position = piper.GetArmEndPoseMsgs()
                 position_value = []
@@ -132,7 +139,7 @@ def main():
                 position_value += [position.end_pose.RY_axis * 0.001 / 360 * 2 * np.pi]
                 position_value += [position.end_pose.RZ_axis * 0.001 / 360 * 2 * np.pi]
 
-                node.send_output("slave_endpose", pa.array(position_value, type=pa.float32()))
+                node.send_output("slave_endpose", pa.array(position_value, type=pa.float32()), metadata)
                 # node.send_output(
                 #     "slave_gripper",
                 #     pa.array(
@@ -155,7 +162,7 @@ def main():
                 gripper = piper.GetArmGripperCtrl()
                 joint_value += [gripper.gripper_ctrl.grippers_angle / 1000 / 100]
 
-                node.send_output("master_jointstate", pa.array(joint_value, type=pa.float32()))
+                node.send_output("master_jointstate", pa.array(joint_value, type=pa.float32()), metadata)
 
                 # position = piper.GetFK(mode="control")
                 # position_value = []
@@ -107,9 +107,10 @@ def main():
             elif event["id"] == "get_joint":
                 joint_value = []
                 present_pos = arm_bus.sync_read("Present_Position")
+                capture_ns = time.time_ns()
                 joint_value = [val for _motor, val in present_pos.items()]
 
-                node.send_output("joint", pa.array(joint_value, type=pa.float32()))
+                node.send_output("joint", pa.array(joint_value, type=pa.float32()), {"capture_ns": capture_ns})
 
         elif event["type"] == "STOP":
             break
@@ -0,0 +1,133 @@
+"""
+相机节点共用的帧健康检查和重连退避。
+
+每帧在降采样后的像素上做廉价检查 (每隔 SAMPLE_STEP 个像素取一个，640x480 约 1200 个像素):
+- black: 平均亮度低于 BLACK_LEVEL (镜头盖、曝光失败、驱动给出全零缓冲);
+- overexposed: 饱和像素 (>= SATURATION_LEVEL) 比例超过 OVEREXPOSED_FRACTION;
+- frozen: 连续 FROZEN_FRAMES 帧的降采样像素完全相同 (真实传感器有噪声，完全相同说明驱动在重复旧缓冲);
+- missing: 相机没有给出帧，节点发布的是占位图。相机中途掉线时 (连续 MISSING_AFTER_TICKS 个 tick 没有新帧)
+  节点同样改为每个 tick 发布占位图，否则接收端会一直沿用掉线前最后一帧并把它当作有效帧。
+
+结果以 metadata["frame_valid"] (bool) 和 metadata["frame_status"] 随帧发出，桥接节点原样转发，
+机械臂进程和录制端据此标记或丢弃无效帧，capture_sync 节点据此报警。
+
+只依赖 numpy，相机节点通过 PYTHONPATH 指向仓库根目录导入本模块。
+"""
+
+import os
+import time
+
+import numpy as np
+
+
+FRAME_OK = "ok"
+FRAME_MISSING = "missing"
+FRAME_BLACK = "black"
+FRAME_OVEREXPOSED = "overexposed"
+FRAME_FROZEN = "frozen"
+
+# 降采样步长 (像素)
+SAMPLE_STEP = int(os.getenv("HEALTH_SAMPLE_STEP", "16"))
+# 平均亮度 (0-255) 低于该值视为黑帧
+BLACK_LEVEL = float(os.getenv("BLACK_LEVEL", "8"))
+SATURATION_LEVEL = 250
+# 饱和像素比例超过该值视为过曝
+OVEREXPOSED_FRACTION = float(os.getenv("OVEREXPOSED_FRACTION", "0.9"))
+# 连续多少帧完全相同视为画面冻结
+FROZEN_FRAMES = int(os.getenv("FROZEN_FRAMES", "15"))
+# 连续多少个 tick 没有新帧后开始发布 missing 占位图
+MISSING_AFTER_TICKS = int(os.getenv("MISSING_AFTER_TICKS", "15"))
+
+
+def frame_metadata(status: str) -> dict:
+    """Validity flags attached to an outgoing frame."""
+    return {"frame_valid": status == FRAME_OK, "frame_status": status}
+
+
+class FrameHealth:
+    """Per-camera frame checks on a strided sample of the raw (undecoded, uint8) frame."""
+
+    def __init__(
+        self,
+        sample_step: int = SAMPLE_STEP,
+        black_level: float = BLACK_LEVEL,
+        overexposed_fraction: float = OVEREXPOSED_FRACTION,
+        frozen_frames: int = FROZEN_FRAMES,
+    ):
+        self.sample_step = sample_step
+        self.black_level = black_level
+        self.overexposed_fraction = overexposed_fraction
+        self.frozen_frames = frozen_frames
+        self.last_digest = None
+        self.repeats = 0
+        # 每种状态的累计帧数
+        self.counts: dict[str, int] = {}
+
+    def check(self, frame: np.ndarray | None) -> str:
+        """Status of one frame, one of the FRAME_* constants."""
+        status = self._check(frame)
+        self.counts[status] = self.counts.get(status, 0) + 1
+        return status
+
+    def _check(self, frame: np.ndarray | None) -> str:
+        if frame is None:
+            self.last_digest = None
+            self.repeats = 0
+            return FRAME_MISSING
+
+        sample = frame[:: self.sample_step, :: self.sample_step]
+        digest = hash(sample.tobytes())
+        if digest == self.last_digest:
+            self.repeats += 1
+        else:
+            self.last_digest = digest
+            self.repeats = 0
+
+        if sample.mean() < self.black_level:
+            return FRAME_BLACK
+        if np.count_nonzero(sample >= SATURATION_LEVEL) >= self.overexposed_fraction * sample.size:
+            return FRAME_OVEREXPOSED
+        if self.repeats + 1 >= self.frozen_frames:
+            return FRAME_FROZEN
+        return FRAME_OK
+
+    def __call__(self, frame: np.ndarray | None) -> dict:
+        """Checks `frame` and returns its validity metadata."""
+        return frame_metadata(self.check(frame))
+
+
+class FrameWatchdog:
+    """Counts the ticks since the camera last delivered a frame; past `after_ticks` the camera counts as missing."""
+
+    def __init__(self, after_ticks: int = MISSING_AFTER_TICKS):
+        self.after_ticks = after_ticks
+        self.idle_ticks = 0
+
+    def frame(self):
+        self.idle_ticks = 0
+
+    def no_frame(self) -> bool:
+        """Records a tick without a new frame. True if the node should publish a missing placeholder."""
+        self.idle_ticks += 1
+        return self.idle_ticks >= self.after_ticks
+
+
+class Backoff:
+    """Exponential backoff between reconnect attempts: `initial_s`, doubled after every failure up to `max_s`."""
+
+    def __init__(self, initial_s: float = 0.5, max_s: float = 10.0):
+        self.initial_s = initial_s
+        self.max_s = max_s
+        self.reset()
+
+    def reset(self):
+        self.delay_s = self.initial_s
+        self.next_t = 0.0
+
+    def ready(self) -> bool:
+        return time.monotonic() >= self.next_t
+
+    def failed(self):
+        """Schedules the next attempt."""
+        self.next_t = time.monotonic() + self.delay_s
+        self.delay_s = min(self.delay_s * 2, self.max_s)
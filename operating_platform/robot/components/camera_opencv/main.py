@@ -2,6 +2,7 @@
 
 import argparse
 import os
+import threading
 import time
 
 import cv2
@@ -9,10 +10,180 @@ import numpy as np
 import pyarrow as pa
 from dora import Node
 
+from operating_platform.robot.components.camera_health import FRAME_MISSING, Backoff, FrameHealth, FrameWatchdog, frame_metadata
+from operating_platform.robot.components.camera_preprocess import FramePreprocessor, send_preview, to_arrow
+
 RUNNER_CI = True if os.getenv("CI") == "true" else False
 
 FLIP = os.getenv("FLIP", "")
 
+# thread: 后台线程持续取帧，tick 只发布最新一帧; sync: 在 tick 中同步读取 (旧行为)
+CAPTURE_MODE = os.getenv("CAPTURE_MODE", "thread")
+# 相机输出格式，例如 MJPG (USB 2.0 下高分辨率高帧率通常需要 MJPG)
+FOURCC = os.getenv("FOURCC", "")
+# 驱动缓冲的帧数，设为 1 可减少延迟
+BUFFER_SIZE = os.getenv("BUFFER_SIZE", "")
+# 相机帧率
+CAMERA_FPS = os.getenv("CAMERA_FPS", "")
+# 曝光: "auto" 为自动曝光，数字为手动曝光值 (单位取决于驱动)
+EXPOSURE = os.getenv("EXPOSURE", "")
+# 统计信息打印间隔 (秒)
+STATS_INTERVAL_S = float(os.getenv("STATS_INTERVAL_S", "5"))
+# 连续读帧失败多少次后重新打开相机 (之后按指数退避重试)
+REOPEN_AFTER_FAILURES = int(os.getenv("REOPEN_AFTER_FAILURES", "30"))
+
+
+def configure_capture(video_capture: cv2.VideoCapture):
+    if FOURCC:
+        video_capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*FOURCC[:4]))
+    if BUFFER_SIZE:
+        video_capture.set(cv2.CAP_PROP_BUFFERSIZE, int(BUFFER_SIZE))
+    if CAMERA_FPS:
+        video_capture.set(cv2.CAP_PROP_FPS, float(CAMERA_FPS))
+    if EXPOSURE == "auto":
+        video_capture.set(cv2.CAP_PROP_AUTO_EXPOSURE, 3)  # V4L2: aperture priority (auto)
+    elif EXPOSURE:
+        video_capture.set(cv2.CAP_PROP_AUTO_EXPOSURE, 1)  # V4L2: manual
+        video_capture.set(cv2.CAP_PROP_EXPOSURE, float(EXPOSURE))
+
+
+def sensor_timestamp(video_capture) -> dict:
+    """
+    {"sensor_ns": ...} with the driver timestamp of the last grabbed frame (V4L2: buffer timestamp, monotonic
+    clock), empty if the backend gives none.
+    """
+    timestamp_ms = video_capture.get(cv2.CAP_PROP_POS_MSEC)
+    return {"sensor_ns": int(timestamp_ms * 1e6)} if timestamp_ms > 0 else {}
+
+
+def open_capture(path, width, height) -> cv2.VideoCapture:
+    video_capture = cv2.VideoCapture(path)
+    if width is not None:
+        video_capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    if height is not None:
+        video_capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    configure_capture(video_capture)
+    return video_capture
+
+
+class ReopenableCapture:
+    """
+    cv2.VideoCapture that is released and opened again after REOPEN_AFTER_FAILURES consecutive failed reads
+    (camera unplugged, USB reset), retrying with exponential backoff until frames come back.
+    """
+
+    def __init__(self, open_fn):
+        self.open_fn = open_fn
+        self.video_capture = open_fn()
+        self.failures = 0
+        self.reopens = 0
+        self.backoff = Backoff()
+
+    def _result(self, ok: bool) -> bool:
+        if ok:
+            self.failures = 0
+            self.backoff.reset()
+            return True
+
+        self.failures += 1
+        if self.failures >= REOPEN_AFTER_FAILURES and self.backoff.ready():
+            print(f"No frame for {self.failures} reads, reopening camera (attempt {self.reopens + 1})")
+            self.video_capture.release()
+            self.video_capture = self.open_fn()
+            self.reopens += 1
+            self.backoff.failed()
+        return False
+
+    def grab(self) -> bool:
+        return self._result(self.video_capture.grab())
+
+    def retrieve(self):
+        return self.video_capture.retrieve()
+
+    def get(self, prop_id: int) -> float:
+        return self.video_capture.get(prop_id)
+
+    def read(self):
+        ret, frame = self.video_capture.read()
+        return self._result(ret), frame
+
+    def release(self):
+        self.video_capture.release()
+
+
+class FrameGrabber:
+    """
+    Reads the camera on a background thread and keeps only the newest frame with its capture timestamp, so the
+    tick handler never blocks on the camera and never publishes a frame older than one camera period.
+    `seq` counts every grabbed frame, so gaps between published `frame_id`s are frames the node skipped.
+    """
+
+    def __init__(self, video_capture: ReopenableCapture):
+        self.video_capture = video_capture
+        self.lock = threading.Lock()
+        self.frame = None
+        self.capture_ns = 0
+        self.sensor = {}
+        self.seq = 0
+        self.running = True
+        self.thread = threading.Thread(target=self.grab_loop, daemon=True)
+        self.thread.start()
+
+    def grab_loop(self):
+        while self.running:
+            if not self.video_capture.grab():
+                time.sleep(0.005)
+                continue
+            # 时间戳取 grab 返回的时刻，解码 (retrieve) 的耗时不计入
+            capture_ns = time.time_ns()
+            sensor = sensor_timestamp(self.video_capture)
+            ret, frame = self.video_capture.retrieve()
+            if not ret:
+                continue
+            with self.lock:
+                self.frame = frame
+                self.capture_ns = capture_ns
+                self.sensor = sensor
+                self.seq += 1
+
+    def latest(self):
+        """Returns (seq, frame, capture_ns, sensor timestamp) of the newest frame, seq is 0 before the first one."""
+        with self.lock:
+            return self.seq, self.frame, self.capture_ns, self.sensor
+
+    def stop(self):
+        self.running = False
+        self.thread.join(timeout=1)
+
+
+class CaptureStats:
+    """Camera fps (frames grabbed) against publish fps (frames sent), printed every STATS_INTERVAL_S."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start_t = time.perf_counter()
+        self.grabbed = 0
+        self.published = 0
+        self.repeated = 0
+
+    def update(self, grabbed: int, published: bool):
+        self.grabbed += grabbed
+        if published:
+            self.published += 1
+        else:
+            self.repeated += 1
+
+        elapsed = time.perf_counter() - self.start_t
+        if elapsed >= STATS_INTERVAL_S:
+            print(
+                f"[{self.name}] camera fps: {self.grabbed / elapsed:.1f}, publish fps: {self.published / elapsed:.1f}, "
+                f"ticks without new frame: {self.repeated}"
+            )
+            self.start_t = time.perf_counter()
+            self.grabbed = 0
+            self.published = 0
+            self.repeated = 0
+
 
 def main():
     # Handle dynamic nodes, ask for the name of the node in the dataflow, and the same values as the ENV variables.
@@ -58,20 +229,27 @@ def main():
     if isinstance(video_capture_path, str) and video_capture_path.isnumeric():
         video_capture_path = int(video_capture_path)
 
-    video_capture = cv2.VideoCapture(video_capture_path)
-
     image_width = os.getenv("IMAGE_WIDTH", args.image_width)
-
-    if image_width is not None:
-        if isinstance(image_width, str) and image_width.isnumeric():
-            image_width = int(image_width)
-        video_capture.set(cv2.CAP_PROP_FRAME_WIDTH, image_width)
+    if isinstance(image_width, str) and image_width.isnumeric():
+        image_width = int(image_width)
 
     image_height = os.getenv("IMAGE_HEIGHT", args.image_height)
-    if image_height is not None:
-        if isinstance(image_height, str) and image_height.isnumeric():
-            image_height = int(image_height)
-        video_capture.set(cv2.CAP_PROP_FRAME_HEIGHT, image_height)
+    if isinstance(image_height, str) and image_height.isnumeric():
+        image_height = int(image_height)
+
+    video_capture = ReopenableCapture(lambda: open_capture(video_capture_path, image_width, image_height))
+
+    size = (image_width, image_height) if image_width is not None and image_height is not None else None
+    preprocess = FramePreprocessor(encoding, flip=FLIP, size=size, source_order="bgr")
+    preview = FramePreprocessor.preview_from_env(source_order="bgr")
+
+    grabber = FrameGrabber(video_capture) if CAPTURE_MODE == "thread" else None
+    stats = CaptureStats(args.name)
+    health = FrameHealth()
+    watchdog = FrameWatchdog()
+    last_seq = 0
+    # 同步读取模式下的帧号 (成功读取的帧数)
+    reads = 0
 
     node = Node(args.name)
     start_time = time.time()
@@ -89,8 +267,34 @@ def main():
             event_id = event["id"]
 
             if event_id == "tick":
-                ret, frame = video_capture.read()
+                if grabber is not None:
+                    seq, frame, capture_ns, sensor = grabber.latest()
+                    if seq != 0 and seq == last_seq:
+                        stats.update(0, published=False)
+                        # 相机还没有新的一帧，不重复发布; 相机掉线 (长时间没有新帧或正在重连) 时发布 missing 占位图
+                        if not watchdog.no_frame() and video_capture.failures < REOPEN_AFTER_FAILURES:
+                            continue
+                        frame = None
+                        capture_ns = time.time_ns()
+                    else:
+                        stats.update(seq - last_seq, published=True)
+                        last_seq = seq
+                        watchdog.frame()
+                    ret = frame is not None
+                else:
+                    ret, frame = video_capture.read()
+                    capture_ns = time.time_ns()
+                    sensor = {}
+                    if ret:
+                        sensor = sensor_timestamp(video_capture)
+                        reads += 1
+                    seq = reads
+                    stats.update(1, published=True)
+                # capture_ns: 采集时间戳，随 metadata 传到机械臂进程做多传感器同步
+                # frame_id / sensor_ns: 帧号和驱动时间戳，录制后用来分析丢帧 (见 dataset/frame_drops.py)
 
+                # 在原始帧上检查黑帧、过曝、冻结; 没有帧时发布占位图，标记为 missing
+                frame_health = health(frame) if ret else frame_metadata(FRAME_MISSING)
                 if not ret:
                     frame = np.zeros((480, 640, 3), dtype=np.uint8)
                     cv2.putText(
@@ -104,46 +308,37 @@ def main():
                         1,
                     )
 
-                if FLIP == "VERTICAL":
-                    frame = cv2.flip(frame, 0)
-                elif FLIP == "HORIZONTAL":
-                    frame = cv2.flip(frame, 1)
-                elif FLIP == "BOTH":
-                    frame = cv2.flip(frame, -1)
-
-                # resize the frame
-                if (
-                    image_width is not None
-                    and image_height is not None
-                    and (
-                        frame.shape[1] != image_width or frame.shape[0] != image_height
-                    )
-                ):
-                    frame = cv2.resize(frame, (image_width, image_height))
+                # 翻转、缩放、颜色转换、编码一次完成，写入预分配的缓冲
+                raw_frame = frame
+                frame = preprocess(raw_frame)
+                if frame is None:
+                    print("Error encoding image...")
+                    continue
 
+                width, height = preprocess.output_size
                 metadata = event["metadata"]
                 metadata["encoding"] = encoding
-                metadata["width"] = int(frame.shape[1])
-                metadata["height"] = int(frame.shape[0])
-
-                # Get the right encoding
-                if encoding == "rgb8":
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                elif encoding == "yuv420":
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420)
-                elif encoding in ["jpeg", "jpg", "jpe", "bmp", "webp", "png"]:
-                    ret, frame = cv2.imencode("." + encoding, frame)
-                    if not ret:
-                        print("Error encoding image...")
-                        continue
-
-                storage = pa.array(frame.ravel())
+                metadata["width"] = int(width)
+                metadata["height"] = int(height)
+                metadata["capture_ns"] = capture_ns
+                if ret:
+                    metadata["frame_id"] = int(seq)
+                    metadata.update(sensor)
+                metadata.update(frame_health)
+
+                storage = to_arrow(frame)
 
                 node.send_output("image", storage, metadata)
+                # 预览直接从原始帧缩放编码
+                send_preview(node, preview, raw_frame, metadata)
 
         elif event_type == "ERROR":
             raise RuntimeError(event["error"])
 
+    if grabber is not None:
+        grabber.stop()
+    video_capture.release()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,196 @@
+"""
+相机节点共用的图像预处理: 翻转、缩放、颜色转换、编码。
+
+变换链在第一帧时按输入尺寸和环境变量配置一次性确定，之后每帧:
+- 翻转 + 缩放合并为一次 cv2.remap (映射表预先算好)，只翻转或只缩放时直接调用 cv2.flip / cv2.resize;
+- 每一步都写入预先分配的输出缓冲，不再每帧分配整帧内存;
+- 输出用 `to_arrow` 包成直接引用缓冲的 Arrow 数组，不再经过 `pa.array(frame.ravel())`。
+
+缓冲在下一帧会被覆盖: dora 的 send_output 会把数据拷贝到自己的共享内存，发送返回后即可复用。
+
+设置 PREVIEW_WIDTH / PREVIEW_HEIGHT 后，相机节点在 `image` 之外再发布一路缩小的预览 `image_preview`
+(默认 PREVIEW_ENCODING=jpeg，直接从原始帧缩放编码)，供界面显示和推流使用，不必解码、缩放全分辨率的帧。
+
+相机节点通过 PYTHONPATH 指向仓库根目录导入本模块，只依赖 cv2、numpy 和 pyarrow。
+"""
+
+import os
+
+import cv2
+import numpy as np
+import pyarrow as pa
+
+from operating_platform.robot.components.color_convert import JPEG_FORMATS, plan
+
+
+ENCODED_FORMATS = ["jpeg", "jpg", "jpe", "bmp", "webp", "png"]
+
+FLIP_CODES = {"VERTICAL": 0, "HORIZONTAL": 1, "BOTH": -1}
+
+# (输入颜色顺序, 输出编码) -> cv2 颜色转换码，None 表示不需要转换
+COLOR_CONVERSIONS = {
+    ("bgr", "bgr8"): None,
+    ("bgr", "rgb8"): cv2.COLOR_BGR2RGB,
+    ("bgr", "yuv420"): cv2.COLOR_BGR2YUV_I420,
+    ("rgb", "rgb8"): None,
+    ("rgb", "bgr8"): cv2.COLOR_RGB2BGR,
+    ("rgb", "yuv420"): cv2.COLOR_RGB2YUV_I420,
+}
+
+
+def flip_resize_maps(in_size: tuple[int, int], out_size: tuple[int, int], flip_code: int | None):
+    """
+    cv2.remap maps that resize `in_size` (w, h) to `out_size` (w, h) and apply `flip_code` in the same pass.
+    Pixel centres are aligned like cv2.resize(INTER_LINEAR).
+    """
+    (in_w, in_h), (out_w, out_h) = in_size, out_size
+    xs = (np.arange(out_w, dtype=np.float32) + 0.5) * (in_w / out_w) - 0.5
+    ys = (np.arange(out_h, dtype=np.float32) + 0.5) * (in_h / out_h) - 0.5
+    if flip_code in (1, -1):
+        xs = (in_w - 1) - xs
+    if flip_code in (0, -1):
+        ys = (in_h - 1) - ys
+    map_x = np.tile(xs, (out_h, 1))
+    map_y = np.repeat(ys[:, None], out_w, axis=1)
+    # 定点映射表比浮点映射表快
+    return cv2.convertMaps(map_x, map_y, cv2.CV_16SC2)
+
+
+class FramePreprocessor:
+    """
+    Precomputed flip / resize / color conversion / encoding chain for one camera output.
+
+    `source_order` is the channel order the camera delivers ("bgr" for OpenCV, "rgb" for RealSense).
+    `size` is the output (width, height), None keeps the camera size.
+    """
+
+    def __init__(
+        self,
+        encoding: str,
+        flip: str = "",
+        size: tuple[int, int] | None = None,
+        source_order: str = "bgr",
+        interpolation: int = cv2.INTER_LINEAR,
+    ):
+        self.encoding = encoding
+        self.flip_code = FLIP_CODES.get(flip)
+        self.size = size
+        self.source_order = source_order
+        # 只翻转+缩放合并的 remap 固定用双线性插值，单独缩放时使用 interpolation (预览用 INTER_AREA 抗混叠)
+        self.interpolation = interpolation
+        # JPEG 由 color_convert 选用的实现直接按相机的通道顺序编码，不需要先转成 BGR
+        self.jpeg = plan(f"{source_order}8", "jpeg") if encoding in JPEG_FORMATS else None
+        if self.jpeg is not None:
+            self.color_code = None
+        elif encoding in ENCODED_FORMATS:
+            self.color_code = None if source_order == "bgr" else cv2.COLOR_RGB2BGR  # imencode 需要 BGR
+        elif (source_order, encoding) in COLOR_CONVERSIONS:
+            self.color_code = COLOR_CONVERSIONS[(source_order, encoding)]
+        else:
+            raise ValueError(f"Unsupported encoding '{encoding}' for {source_order} frames")
+        self.in_shape = None
+
+    @classmethod
+    def from_env(cls, source_order: str = "bgr", default_encoding: str = "bgr8", width=None, height=None):
+        """Builds the chain from the ENCODING / FLIP / IMAGE_WIDTH / IMAGE_HEIGHT env variables."""
+        width = os.getenv("IMAGE_WIDTH", width)
+        height = os.getenv("IMAGE_HEIGHT", height)
+        size = (int(width), int(height)) if width is not None and height is not None else None
+        return cls(
+            encoding=os.getenv("ENCODING", default_encoding),
+            flip=os.getenv("FLIP", ""),
+            size=size,
+            source_order=source_order,
+        )
+
+    @classmethod
+    def preview_from_env(cls, source_order: str = "bgr") -> "FramePreprocessor | None":
+        """Chain of the downscaled preview output, None unless PREVIEW_WIDTH / PREVIEW_HEIGHT are set."""
+        width = os.getenv("PREVIEW_WIDTH")
+        height = os.getenv("PREVIEW_HEIGHT")
+        if width is None or height is None:
+            return None
+        return cls(
+            encoding=os.getenv("PREVIEW_ENCODING", "jpeg"),
+            flip=os.getenv("FLIP", ""),
+            size=(int(width), int(height)),
+            source_order=source_order,
+            interpolation=cv2.INTER_AREA,
+        )
+
+    def _build(self, shape: tuple[int, ...]):
+        self.in_shape = shape
+        in_h, in_w = shape[:2]
+        out_w, out_h = self.size if self.size is not None else (in_w, in_h)
+        self.resize = (out_w, out_h) != (in_w, in_h)
+
+        self.maps = None
+        self.geometry_out = None
+        if self.resize and self.flip_code is not None:
+            self.maps = flip_resize_maps((in_w, in_h), (out_w, out_h), self.flip_code)
+        if self.resize or self.flip_code is not None:
+            self.geometry_out = np.empty((out_h, out_w, 3), dtype=np.uint8)
+
+        self.color_out = None
+        if self.color_code == cv2.COLOR_BGR2YUV_I420 or self.color_code == cv2.COLOR_RGB2YUV_I420:
+            self.color_out = np.empty((out_h * 3 // 2, out_w), dtype=np.uint8)
+        elif self.color_code is not None:
+            self.color_out = np.empty((out_h, out_w, 3), dtype=np.uint8)
+
+    def __call__(self, frame: np.ndarray) -> np.ndarray | None:
+        """
+        Runs the chain. The result may be a preallocated buffer (overwritten by the next call) or, when there
+        is nothing to do, `frame` itself. Returns None if encoding failed.
+        """
+        if frame.shape != self.in_shape:
+            self._build(frame.shape)
+
+        if self.maps is not None:
+            frame = cv2.remap(frame, self.maps[0], self.maps[1], cv2.INTER_LINEAR, dst=self.geometry_out)
+        elif self.resize:
+            frame = cv2.resize(
+                frame,
+                (self.geometry_out.shape[1], self.geometry_out.shape[0]),
+                dst=self.geometry_out,
+                interpolation=self.interpolation,
+            )
+        elif self.flip_code is not None:
+            frame = cv2.flip(frame, self.flip_code, dst=self.geometry_out)
+
+        if self.color_code is not None:
+            frame = cv2.cvtColor(frame, self.color_code, dst=self.color_out)
+
+        if self.jpeg is not None:
+            return self.jpeg(frame)
+        if self.encoding in ENCODED_FORMATS:
+            ret, frame = cv2.imencode("." + self.encoding, frame)
+            if not ret:
+                return None
+        return frame
+
+    @property
+    def output_size(self) -> tuple[int, int] | None:
+        """(width, height) of the frames after the chain, known after the first frame."""
+        if self.in_shape is None:
+            return None
+        return self.size if self.size is not None else (self.in_shape[1], self.in_shape[0])
+
+
+def to_arrow(frame: np.ndarray) -> pa.Array:
+    """Flat uint8 Arrow array backed by `frame`'s memory, without copying."""
+    frame = np.ascontiguousarray(frame)
+    return pa.Array.from_buffers(pa.uint8(), frame.nbytes, [None, pa.py_buffer(frame)])
+
+
+def send_preview(node, preview: FramePreprocessor | None, frame: np.ndarray, metadata: dict):
+    """Publishes the preview tier of the raw camera `frame` on `image_preview`, if a preview is configured."""
+    if preview is None:
+        return
+    preview_frame = preview(frame)
+    if preview_frame is None:
+        return
+    width, height = preview.output_size
+    # 帧健康标记只随录制用的 image 发出，预览不重复计入无效帧统计
+    metadata = {key: value for key, value in metadata.items() if key not in ("frame_valid", "frame_status")}
+    metadata.update(encoding=preview.encoding, width=int(width), height=int(height))
+    node.send_output("image_preview", to_arrow(preview_frame), metadata)
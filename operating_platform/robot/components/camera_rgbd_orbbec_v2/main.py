@@ -16,12 +16,18 @@
 #  limitations under the License.
 # ******************************************************************************
 import os
+import time
 
 import cv2
 import numpy as np
 import pyarrow as pa
 from dora import Node
 
+from operating_platform.robot.components.camera_health import FRAME_MISSING, FrameHealth, FrameWatchdog, frame_metadata
+from operating_platform.robot.components.camera_preprocess import FramePreprocessor, send_preview
+from operating_platform.robot.components.color_convert import plan
+from operating_platform.robot.components.orbbec_convert import ColorConverter, DepthFilter
+
 try:
     from pyorbbecsdk import (
         Config,
@@ -41,105 +47,70 @@ except ImportError as err:
     raise err
 
 
-class TemporalFilter:
-    """TODO: Add docstring."""
+COLOR_FORMAT_NAMES = {
+    OBFormat.RGB: "rgb",
+    OBFormat.BGR: "bgr",
+    OBFormat.YUYV: "yuyv",
+    OBFormat.UYVY: "uyvy",
+    OBFormat.I420: "i420",
+    OBFormat.NV12: "nv12",
+    OBFormat.NV21: "nv21",
+    OBFormat.MJPG: "mjpg",
+}
 
-    def __init__(self, alpha):
-        """TODO: Add docstring."""
-        self.alpha = alpha
-        self.previous_frame = None
-
-    def process(self, frame):
-        """TODO: Add docstring."""
-        if self.previous_frame is None:
-            result = frame
-        else:
-            result = cv2.addWeighted(
-                frame,
-                self.alpha,
-                self.previous_frame,
-                1 - self.alpha,
-                0,
-            )
-        self.previous_frame = result
-        return result
 
+def frame_to_bgr_image(frame: VideoFrame, converter: ColorConverter):
+    """BGR image of a color frame, written into the converter's preallocated buffer."""
+    color_format = frame.get_format()
+    data = np.asanyarray(frame.get_data())
+    return converter(data, COLOR_FORMAT_NAMES.get(color_format, str(color_format)), frame.get_width(), frame.get_height())
 
-def yuyv_to_bgr(frame: np.ndarray, width: int, height: int) -> np.ndarray:
-    """TODO: Add docstring."""
-    yuyv = frame.reshape((height, width, 2))
-    return cv2.cvtColor(yuyv, cv2.COLOR_YUV2BGR_YUY2)
 
+ESC_KEY = 27
+MIN_DEPTH_METERS = 0.01
+MAX_DEPTH_METERS = 15.0
 
-def uyvy_to_bgr(frame: np.ndarray, width: int, height: int) -> np.ndarray:
-    """TODO: Add docstring."""
-    uyvy = frame.reshape((height, width, 2))
-    return cv2.cvtColor(uyvy, cv2.COLOR_YUV2BGR_UYVY)
+DEVICE_INDEX = int(os.getenv("DEVICE_INDEX", "0"))
+# 多机同步模式: primary / secondary / secondary_synced / software_triggering / hardware_triggering，
+# 为空时不修改设备配置。software_triggering 时每个 tick 触发一次采集 (tick 来自 capture_sync 节点)
+SYNC_MODE = os.getenv("SYNC_MODE", "").lower()
 
 
-def i420_to_bgr(frame: np.ndarray, width: int, height: int) -> np.ndarray:
-    """TODO: Add docstring."""
-    y = frame[0:height, :]
-    u = frame[height : height + height // 4].reshape(height // 2, width // 2)
-    v = frame[height + height // 4 :].reshape(height // 2, width // 2)
-    yuv_image = cv2.merge([y, u, v])
-    return cv2.cvtColor(yuv_image, cv2.COLOR_YUV2BGR_I420)
+def configure_sync(device):
+    """Applies SYNC_MODE to the device's multi-device sync config and enables global timestamps if supported."""
+    if SYNC_MODE:
+        from pyorbbecsdk import OBMultiDeviceSyncMode
 
+        sync_config = device.get_multi_device_sync_config()
+        sync_config.mode = getattr(OBMultiDeviceSyncMode, SYNC_MODE.upper())
+        device.set_multi_device_sync_config(sync_config)
+        print(f"multi-device sync mode: {SYNC_MODE}")
+    # 全局时间戳与主机时钟同域，capture_sync 节点用它衡量相机之间的曝光时差
+    if hasattr(device, "is_global_timestamp_supported") and device.is_global_timestamp_supported():
+        device.enable_global_timestamp(True)
 
-def nv21_to_bgr(frame: np.ndarray, width: int, height: int) -> np.ndarray:
-    """TODO: Add docstring."""
-    y = frame[0:height, :]
-    uv = frame[height : height + height // 2].reshape(height // 2, width)
-    yuv_image = cv2.merge([y, uv])
-    return cv2.cvtColor(yuv_image, cv2.COLOR_YUV2BGR_NV21)
 
+def device_timestamp(frame) -> dict:
+    """{"device_ns": ...} with the frame's global (host-domain) timestamp, empty if the SDK has none."""
+    timestamp_us = frame.get_global_timestamp_us() if hasattr(frame, "get_global_timestamp_us") else 0
+    return {"device_ns": int(timestamp_us) * 1000} if timestamp_us else {}
 
-def nv12_to_bgr(frame: np.ndarray, width: int, height: int) -> np.ndarray:
-    """TODO: Add docstring."""
-    y = frame[0:height, :]
-    uv = frame[height : height + height // 2].reshape(height // 2, width)
-    yuv_image = cv2.merge([y, uv])
-    return cv2.cvtColor(yuv_image, cv2.COLOR_YUV2BGR_NV12)
 
-
-def frame_to_bgr_image(frame: VideoFrame):
-    """TODO: Add docstring."""
-    width = frame.get_width()
-    height = frame.get_height()
-    color_format = frame.get_format()
-    data = np.asanyarray(frame.get_data())
-    image = np.zeros((height, width, 3), dtype=np.uint8)
-    if color_format == OBFormat.RGB:
-        image = np.resize(data, (height, width, 3))
-        image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-    elif color_format == OBFormat.BGR:
-        image = np.resize(data, (height, width, 3))
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    elif color_format == OBFormat.YUYV:
-        image = np.resize(data, (height, width, 2))
-        image = cv2.cvtColor(image, cv2.COLOR_YUV2BGR_YUYV)
-    elif color_format == OBFormat.MJPG:
-        image = cv2.imdecode(data, cv2.IMREAD_COLOR)
-    elif color_format == OBFormat.I420:
-        return i420_to_bgr(data, width, height)
-    elif color_format == OBFormat.NV12:
-        return nv12_to_bgr(data, width, height)
-    elif color_format == OBFormat.NV21:
-        return nv21_to_bgr(data, width, height)
-    elif color_format == OBFormat.UYVY:
-        image = np.resize(data, (height, width, 2))
-        image = cv2.cvtColor(image, cv2.COLOR_YUV2BGR_UYVY)
+def frame_counter(frame) -> dict:
+    """SDK frame index and device timestamp (device clock) of one frame, for post-hoc drop analysis."""
+    if hasattr(frame, "get_timestamp_us"):
+        timestamp_ns = int(frame.get_timestamp_us()) * 1000
     else:
-        print(f"Unsupported color format: {color_format}")
-        return None
-    return image
+        timestamp_ns = int(frame.get_timestamp()) * 1_000_000  # ms
+    return {"frame_id": int(frame.get_index()), "sensor_ns": timestamp_ns}
 
 
-ESC_KEY = 27
-MIN_DEPTH_METERS = 0.01
-MAX_DEPTH_METERS = 15.0
-
-DEVICE_INDEX = int(os.getenv("DEVICE_INDEX", "0"))
+def send_missing(node, tick_metadata: dict, encode_jpeg):
+    """Black placeholder flagged as missing, so receivers stop reusing the last frame of a dead camera."""
+    frame = encode_jpeg(np.zeros((480, 640, 3), dtype=np.uint8))
+    if frame is not None:
+        metadata = {**tick_metadata, "encoding": "jpeg", "capture_ns": time.time_ns(), **frame_metadata(FRAME_MISSING)}
+        node.send_output("image", pa.array(frame), metadata)
 
 
 def main():
@@ -149,7 +120,12 @@ def main():
     ctx = Context()
     device_list = ctx.query_devices()
     device = device_list.get_device_by_index(int(DEVICE_INDEX))
-    temporal_filter = TemporalFilter(alpha=0.5)
+    converter = ColorConverter()
+    health = FrameHealth()
+    watchdog = FrameWatchdog()
+    preview = FramePreprocessor.preview_from_env(source_order="bgr")
+    encode_jpeg = plan("bgr8", "jpeg")
+    depth_filter = DepthFilter(MIN_DEPTH_METERS * 1000, MAX_DEPTH_METERS * 1000, alpha=0.5)
     pipeline = Pipeline(device)
     profile_list = pipeline.get_stream_profile_list(OBSensorType.COLOR_SENSOR)
     try:
@@ -177,26 +153,45 @@ def main():
         print("depth profile: ", depth_profile)
     config.enable_stream(color_profile)
     config.enable_stream(depth_profile)
+    configure_sync(device)
     pipeline.start(config)
-    for _event in node:
+    for event in node:
+        if event["type"] == "STOP":
+            break
+        if event["type"] != "INPUT":
+            continue
         try:
+            # tick 的 metadata (tick_seq 等) 原样带到输出上
+            tick_metadata = event["metadata"]
+            if SYNC_MODE == "software_triggering":
+                device.trigger_capture()
             frames: FrameSet = pipeline.wait_for_frames(100)
-            if frames is None:
-                continue
+            capture_ns = time.time_ns()  # 采集时间戳，随 metadata 传到机械臂进程做多传感器同步
 
             # Get Color image
-            color_frame = frames.get_color_frame()
+            color_frame = frames.get_color_frame() if frames is not None else None
             if color_frame is None:
+                # 相机掉线 (连续多个 tick 没有帧) 时发布 missing 占位图，接收端不再沿用最后一帧
+                if watchdog.no_frame():
+                    send_missing(node, tick_metadata, encode_jpeg)
                 continue
+            watchdog.frame()
             # convert to RGB format
-            color_image = frame_to_bgr_image(color_frame)
+            color_image = frame_to_bgr_image(color_frame, converter)
             if color_image is None:
                 print("failed to convert frame to image")
                 continue
             # Send Color Image
-            ret, frame = cv2.imencode("." + "jpeg", color_image)
-            if ret:
-                node.send_output("image", pa.array(frame), {"encoding": "jpeg"})
+            frame_health = health(color_image)
+            if color_frame.get_format() == OBFormat.MJPG:
+                # 相机给出的已经是 JPEG，原样发送，不再解码后重新编码 (解码只用于健康检查和预览)
+                frame = np.asanyarray(color_frame.get_data())
+            else:
+                frame = encode_jpeg(color_image)
+            if frame is not None:
+                image_metadata = {**tick_metadata, "encoding": "jpeg", "capture_ns": capture_ns, **device_timestamp(color_frame), **frame_counter(color_frame), **frame_health}
+                node.send_output("image", pa.array(frame), image_metadata)
+                send_preview(node, preview, color_image, image_metadata)
 
             # Get Depth data
             depth_frame = frames.get_depth_frame()
@@ -205,32 +200,31 @@ def main():
             width = depth_frame.get_width()
             height = depth_frame.get_height()
             scale = depth_frame.get_depth_scale()
-            depth_data = np.frombuffer(depth_frame.get_data(), dtype=np.uint16)
-            depth_data = depth_data.reshape((height, width))
-            depth_data = depth_data.astype(np.float32) * scale * 0.001
-            depth_data = np.where(
-                (depth_data > MIN_DEPTH_METERS) & (depth_data < MAX_DEPTH_METERS),
-                depth_data,
-                0,
-            )
-            depth_data = temporal_filter.process(depth_data)
-            # Send Depth data
-            storage = pa.array(depth_data.ravel())
-            node.send_output("depth", storage)
-            # Convert to Image
-            depth_image = cv2.normalize(
-                depth_data,
-                None,
-                0,
-                255,
-                cv2.NORM_MINMAX,
-                dtype=cv2.CV_8U,
+            depth_data = np.frombuffer(depth_frame.get_data(), dtype=np.uint16).reshape((height, width))
+            # 换算到毫米、超出有效范围置 0、时域滤波，一步写入预分配的 uint16 缓冲
+            depth_mm = depth_filter(depth_data, scale)
+
+            # Send Depth data: uint16 毫米，比 float32 米少一半带宽，录制时无损保存
+            node.send_output(
+                "depth",
+                pa.array(depth_mm.ravel()),
+                {
+                    **tick_metadata,
+                    "encoding": "mono16",
+                    "width": width,
+                    "height": height,
+                    "depth_units": "mm",
+                    "capture_ns": capture_ns,
+                    **device_timestamp(depth_frame),
+                    **frame_counter(depth_frame),
+                },
             )
+
             # Send Depth Image
-            depth_image = cv2.applyColorMap(depth_image, cv2.COLORMAP_JET)
-            ret, frame = cv2.imencode("." + "jpeg", depth_image)
-            if ret:
-                node.send_output("image_depth", pa.array(frame), {"encoding": "jpeg"})
+            depth_image = depth_filter.colormap()
+            frame = encode_jpeg(depth_image)
+            if frame is not None:
+                node.send_output("image_depth", pa.array(frame), {**tick_metadata, "encoding": "jpeg", "capture_ns": capture_ns, **device_timestamp(depth_frame)})
 
         except KeyboardInterrupt:
             break
@@ -1,6 +1,18 @@
-"""TODO: Add docstring."""
+"""
+RealSense 相机节点。
+
+采集在后台线程完成: pipeline 以 rs.frame_queue 启动，SDK 回调只把帧放进队列，采集线程从队列取帧，
+做深度后处理和对齐，只保留最新一组帧; tick 到来时发布最新一组帧，不在事件循环中阻塞等待相机。
+
+- DEPTH=1 时同时开启深度流并对齐到彩色图，输出 `depth` (uint16 毫米，mono16); 只要彩色时不创建 rs.align。
+- DEPTH_FILTERS 为逗号分隔的深度后处理: decimation, spatial, temporal (在采集线程中按此顺序执行，
+  spatial/temporal 在视差域中进行)。
+- 相机内参只在第一次 tick 时通过 `intrinsics` 输出发布一次 (深度对齐到彩色，共用彩色内参)。
+- 每帧的 metadata 带有 SDK 的帧号 (frame_id) 和硬件时间戳 (sensor_ns)，录制后用来分析丢帧。
+"""
 
 import os
+import threading
 import time
 
 import cv2
@@ -9,8 +21,143 @@ import pyarrow as pa
 import pyrealsense2 as rs
 from dora import Node
 
+from operating_platform.robot.components.camera_health import FRAME_MISSING, FrameHealth, FrameWatchdog, frame_metadata
+from operating_platform.robot.components.camera_preprocess import FLIP_CODES, FramePreprocessor, send_preview, to_arrow
+
 RUNNER_CI = True if os.getenv("CI") == "true" else False
 
+# 硬件同步 (D4xx inter_cam_sync_mode，需要同步线): master / slave，为空时不修改
+SYNC_MODES = {"default": 0, "master": 1, "slave": 2}
+SYNC_MODE = os.getenv("SYNC_MODE", "").lower()
+
+# 是否开启深度流 (对齐到彩色图)
+DEPTH = os.getenv("DEPTH", "0").lower() in ("1", "true")
+# 深度后处理，逗号分隔: decimation, spatial, temporal
+DEPTH_FILTERS = [name for name in os.getenv("DEPTH_FILTERS", "").split(",") if name]
+# 超过该距离的深度置 0
+MAX_DEPTH_METERS = float(os.getenv("MAX_DEPTH_METERS", "5.0"))
+CAMERA_FPS = int(os.getenv("CAMERA_FPS", "30"))
+# 等待新帧的超时 (毫秒)，超时只打印提示，采集线程继续等待
+FRAME_TIMEOUT_MS = int(os.getenv("FRAME_TIMEOUT_MS", "1000"))
+
+
+def configure_sync(device):
+    """Applies SYNC_MODE and switches every sensor to global (host-domain) timestamps."""
+    if SYNC_MODE:
+        device.first_depth_sensor().set_option(rs.option.inter_cam_sync_mode, SYNC_MODES[SYNC_MODE])
+        print(f"inter-camera sync mode: {SYNC_MODE}")
+    # 全局时间戳与主机时钟同域，capture_sync 节点用它衡量相机之间的曝光时差
+    for sensor in device.query_sensors():
+        if sensor.supports(rs.option.global_time_enabled):
+            sensor.set_option(rs.option.global_time_enabled, 1)
+
+
+def build_depth_filters(names: list[str]) -> list:
+    """
+    Post-processing blocks in the order librealsense recommends, spatial / temporal run on disparity.
+    A threshold filter at MAX_DEPTH_METERS always comes first.
+    """
+    unknown = set(names) - {"decimation", "spatial", "temporal"}
+    if unknown:
+        raise ValueError(f"Unknown depth filters: {sorted(unknown)}")
+
+    filters = [rs.threshold_filter(0.0, MAX_DEPTH_METERS)]
+    if "decimation" in names:
+        filters.append(rs.decimation_filter())
+    if "spatial" in names or "temporal" in names:
+        filters.append(rs.disparity_transform(True))
+        if "spatial" in names:
+            filters.append(rs.spatial_filter())
+        if "temporal" in names:
+            filters.append(rs.temporal_filter())
+        filters.append(rs.disparity_transform(False))
+    return filters
+
+
+def device_timestamp(frame) -> dict:
+    """Device timestamp in the host clock domain, empty when global timestamps are unavailable."""
+    if frame.get_frame_timestamp_domain() == rs.timestamp_domain.global_time:
+        return {"device_ns": int(frame.get_timestamp() * 1e6)}
+    return {}
+
+
+def frame_counter(frame) -> dict:
+    """SDK frame number and timestamp (in the frame's own timestamp domain) of one frame."""
+    return {"frame_id": int(frame.get_frame_number()), "sensor_ns": int(frame.get_timestamp() * 1e6)}
+
+
+class FrameWorker:
+    """
+    Takes framesets from the SDK frame queue on a background thread, filters and aligns them, and keeps only the
+    newest (color, depth, capture_ns). The rs frames are kept referenced so their buffers stay valid.
+    """
+
+    def __init__(self, queue: rs.frame_queue, depth: bool, filters: list):
+        self.queue = queue
+        self.align = rs.align(rs.stream.color) if depth else None
+        self.filters = filters
+        self.lock = threading.Lock()
+        self.frames = None
+        self.seq = 0
+        self.running = True
+        self.thread = threading.Thread(target=self.work_loop, daemon=True)
+        self.thread.start()
+
+    def work_loop(self):
+        while self.running:
+            try:
+                frame = self.queue.wait_for_frame(FRAME_TIMEOUT_MS)
+            except RuntimeError:
+                print("No frame received from realsense within timeout")
+                continue
+            # 时间戳取帧从 SDK 队列取出的时刻，后处理和对齐的耗时不计入
+            capture_ns = time.time_ns()
+            frames = frame.as_frameset()
+
+            depth_image = None
+            if self.align is not None:
+                for depth_filter in self.filters:
+                    frames = depth_filter.process(frames).as_frameset()
+                frames = self.align.process(frames)
+                depth_frame = frames.get_depth_frame()
+                if not depth_frame:
+                    continue
+                depth_image = np.asanyarray(depth_frame.get_data())
+
+            color_frame = frames.get_color_frame()
+            if not color_frame:
+                continue
+
+            with self.lock:
+                self.frames = (frames, color_frame, depth_image, capture_ns)
+                self.seq += 1
+
+    def latest(self):
+        """Returns (seq, (frameset, color frame, depth image, capture_ns)), seq is 0 before the first frameset."""
+        with self.lock:
+            return self.seq, self.frames
+
+    def stop(self):
+        self.running = False
+        self.thread.join(timeout=1)
+
+
+def intrinsics_output(intr, depth_scale: float | None) -> tuple[pa.Array, dict]:
+    """[fx, fy, ppx, ppy] plus the full intrinsics as metadata."""
+    metadata = {
+        "width": int(intr.width),
+        "height": int(intr.height),
+        "fx": float(intr.fx),
+        "fy": float(intr.fy),
+        "ppx": float(intr.ppx),
+        "ppy": float(intr.ppy),
+        "model": str(intr.model),
+        "coeffs": [float(c) for c in intr.coeffs],
+    }
+    if depth_scale is not None:
+        metadata["depth_scale"] = float(depth_scale)
+    return pa.array([intr.fx, intr.fy, intr.ppx, intr.ppy], type=pa.float32()), metadata
+
 
 def main():
     """TODO: Add docstring."""
@@ -18,6 +165,8 @@ def main():
     device_serial = os.getenv("DEVICE_SERIAL", "")
     image_height = int(os.getenv("IMAGE_HEIGHT", "480"))
     image_width = int(os.getenv("IMAGE_WIDTH", "640"))
+    depth_height = int(os.getenv("DEPTH_HEIGHT", str(image_height)))
+    depth_width = int(os.getenv("DEPTH_WIDTH", str(image_width)))
     encoding = os.getenv("ENCODING", "rgb8")
     ctx = rs.context()
     devices = ctx.query_devices()
@@ -35,93 +184,112 @@ def main():
 
     config = rs.config()
     config.enable_device(device_serial)
-    config.enable_stream(rs.stream.color, image_width, image_height, rs.format.rgb8, 30)
-    # config.enable_stream(rs.stream.depth, image_width, image_height, rs.format.z16, 30)
+    config.enable_stream(rs.stream.color, image_width, image_height, rs.format.rgb8, CAMERA_FPS)
+    if DEPTH:
+        config.enable_stream(rs.stream.depth, depth_width, depth_height, rs.format.z16, CAMERA_FPS)
 
-    align_to = rs.stream.color
-    align = rs.align(align_to)
+    # SDK 回调线程只把帧放进队列 (只保留最新一组)，处理在 FrameWorker 线程中进行
+    queue = rs.frame_queue(1, keep_frames=True)
+    profile = pipeline.start(config, queue)
+    configure_sync(profile.get_device())
 
-    profile = pipeline.start(config)
+    rgb_intr = profile.get_stream(rs.stream.color).as_video_stream_profile().get_intrinsics()
+    depth_scale = None
+    if DEPTH:
+        depth_scale = profile.get_device().first_depth_sensor().get_depth_scale()
+        if abs(depth_scale - 0.001) > 1e-6:
+            print(f"Warning: depth scale is {depth_scale} m, depth output is not in millimeters")
 
-    rgb_profile = profile.get_stream(rs.stream.color)
-    # depth_profile = profile.get_stream(rs.stream.depth)
-    # _depth_intr = depth_profile.as_video_stream_profile().get_intrinsics()
-    rgb_intr = rgb_profile.as_video_stream_profile().get_intrinsics()
+    worker = FrameWorker(queue, DEPTH, build_depth_filters(DEPTH_FILTERS) if DEPTH else [])
+    # 彩色流本身就是 IMAGE_WIDTH x IMAGE_HEIGHT，不需要缩放
+    preprocess = FramePreprocessor(encoding, flip=flip, source_order="rgb")
+    preview = FramePreprocessor.preview_from_env(source_order="rgb")
+    health = FrameHealth()
+    watchdog = FrameWatchdog()
     node = Node()
     start_time = time.time()
+    intrinsics_sent = False
+    last_seq = 0
 
     pa.array([])  # initialize pyarrow array
 
-    for event in node:
-        # Run this example in the CI for 10 seconds only.
-        if RUNNER_CI and time.time() - start_time > 10:
-            break
+    try:
+        for event in node:
+            # Run this example in the CI for 10 seconds only.
+            if RUNNER_CI and time.time() - start_time > 10:
+                break
 
-        event_type = event["type"]
+            event_type = event["type"]
 
-        if event_type == "INPUT":
-            event_id = event["id"]
+            if event_type == "INPUT":
+                event_id = event["id"]
 
-            if event_id == "tick":
-                frames = pipeline.wait_for_frames()
-                aligned_frames = align.process(frames)
+                if event_id == "tick":
+                    if not intrinsics_sent:
+                        node.send_output("intrinsics", *intrinsics_output(rgb_intr, depth_scale))
+                        intrinsics_sent = True
 
-                # aligned_depth_frame = aligned_frames.get_depth_frame()
-                # color_frame = aligned_frames.get_color_frame()
-                # if not aligned_depth_frame or not color_frame:
-                #     continue
-                
-                color_frame = aligned_frames.get_color_frame()
-                if not color_frame:
-                    continue
+                    seq, latest = worker.latest()
+                    if seq != last_seq:
+                        last_seq = seq
+                        watchdog.frame()
+                        _frames, color_frame, depth_image, capture_ns = latest
+                        raw_frame = np.asanyarray(color_frame.get_data())
+                        frame_health = health(raw_frame)
+                    elif watchdog.no_frame():
+                        # 相机掉线: 发布黑色占位图并标记为 missing，接收端不再沿用掉线前最后一帧
+                        color_frame, depth_image, capture_ns = None, None, time.time_ns()
+                        raw_frame = np.zeros((image_height, image_width, 3), dtype=np.uint8)
+                        frame_health = frame_metadata(FRAME_MISSING)
+                    else:
+                        # 没有新帧时不重复发布
+                        continue
 
-                # depth_image = np.asanyarray(aligned_depth_frame.get_data())
-                # scaled_depth_image = depth_image
-                frame = np.asanyarray(color_frame.get_data())
-
-                ## Change rgb to bgr
-
-                if flip == "VERTICAL":
-                    frame = cv2.flip(frame, 0)
-                elif flip == "HORIZONTAL":
-                    frame = cv2.flip(frame, 1)
-                elif flip == "BOTH":
-                    frame = cv2.flip(frame, -1)
-
-                metadata = event["metadata"]
-                metadata["encoding"] = encoding
-                metadata["width"] = int(frame.shape[1])
-                metadata["height"] = int(frame.shape[0])
-
-                # Get the right encoding
-                if encoding == "bgr8":
-                    frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-                elif encoding in ["jpeg", "jpg", "jpe", "bmp", "webp", "png"]:
-                    ret, frame = cv2.imencode("." + encoding, frame)
-                    if not ret:
+                    # 翻转、颜色转换、编码一次完成，写入预分配的缓冲
+                    frame = preprocess(raw_frame)
+                    if frame is None:
                         print("Error encoding image...")
                         continue
 
-                storage = pa.array(frame.ravel())
-
-                metadata["resolution"] = [int(rgb_intr.ppx), int(rgb_intr.ppy)]
-                metadata["focal_length"] = [int(rgb_intr.fx), int(rgb_intr.fy)]
-                # metadata["principal_point"] = [int(rgb_intr.ppx), int(rgb_intr.ppy)]
-                metadata["timestamp"] = time.time_ns()
-                node.send_output("image", storage, metadata)
-                # metadata["encoding"] = "mono16"
-                # scaled_depth_image[scaled_depth_image > 5000] = 0
-                # node.send_output(
-                #     "depth",
-                #     pa.array(scaled_depth_image.ravel()),
-                #     metadata,
-                # )
-
-        elif event_type == "ERROR":
-            raise RuntimeError(event["error"])
-        
-        if event_type == "STOP":
-            break
+                    tick_metadata = event["metadata"]
+                    metadata = {
+                        **tick_metadata,
+                        "encoding": encoding,
+                        "width": int(preprocess.output_size[0]),
+                        "height": int(preprocess.output_size[1]),
+                        "timestamp": time.time_ns(),
+                        "capture_ns": capture_ns,
+                        **frame_health,
+                    }
+                    if color_frame is not None:
+                        metadata.update(device_timestamp(color_frame))
+                        metadata.update(frame_counter(color_frame))
+                    node.send_output("image", to_arrow(frame), metadata)
+                    send_preview(node, preview, raw_frame, metadata)
+
+                    if depth_image is not None:
+                        if flip in FLIP_CODES:
+                            depth_image = cv2.flip(depth_image, FLIP_CODES[flip])
+                        depth_metadata = {
+                            **tick_metadata,
+                            "encoding": "mono16",
+                            "width": int(depth_image.shape[1]),
+                            "height": int(depth_image.shape[0]),
+                            "depth_units": "mm",
+                            "capture_ns": capture_ns,
+                            **device_timestamp(color_frame),
+                            **frame_counter(color_frame),
+                        }
+                        node.send_output("depth", pa.array(depth_image.ravel()), depth_metadata)
+
+            elif event_type == "ERROR":
+                raise RuntimeError(event["error"])
+
+            if event_type == "STOP":
+                break
+    finally:
+        worker.stop()
+        pipeline.stop()
 
 
 if __name__ == "__main__":
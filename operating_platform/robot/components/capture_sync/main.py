@@ -0,0 +1,221 @@
+"""
+多相机采集协调节点。
+
+相机和机械臂节点不再各自订阅定时器，而是统一订阅本节点的 `tick` 输出，同一时刻开始采集:
+
+    camera_top:   inputs: tick: capture_sync/tick
+    piper_right:  inputs: tick: capture_sync/tick
+    capture_sync: inputs: tick: dora/timer/millis/33, image_top: camera_top/image, ...
+
+每个 tick 带有递增的 metadata["tick_seq"] 和发出时间 metadata["tick_ns"]，相机节点把 tick 的 metadata
+原样带到输出上，本节点据此把各路数据归到对应的 tick (没有 tick_seq 的输入归到最新的 tick)。
+一组数据到齐 (或超过 MAX_PENDING_TICKS 个 tick 仍未到齐) 时发出 `frame_set`:
+float32 向量 [spread_s, offset_0_s, offset_1_s, ...]，spread_s 为各路采集时间的最大差值，
+offset_i_s 为第 i 路采集时间与 tick 发出时间之差 (缺失为 NaN)，顺序见 metadata["streams"]。
+设备提供同一时间域的硬件时间戳 (metadata["device_ns"]) 时，spread_s 用硬件时间戳计算。
+
+frame_set 经桥接节点转发到机械臂进程，写入 robot.logs (capture_spread_s 等)。
+
+相机节点在 metadata 中给出帧健康状态 (frame_valid / frame_status，见 components/camera_health.py)。
+某一路连续 ALERT_AFTER_TICKS 组都是无效帧或缺失时，从 `alert` 输出发出报警 (字符串数组
+[stream, status])，恢复正常时再发出一次 [stream, "ok"]。
+硬件同步 (RealSense inter_cam_sync_mode、Orbbec 多机同步) 在各相机节点用环境变量 SYNC_MODE 配置。
+"""
+
+import os
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pyarrow as pa
+from dora import Node
+
+
+# 参与同步的输入名 (逗号分隔)，为空时为除 tick 外见过的所有输入
+STREAMS = [name for name in os.getenv("STREAMS", "").split(",") if name]
+# 一个 tick 最多等待的 tick 数，超过后按不完整的帧组发出
+MAX_PENDING_TICKS = int(os.getenv("MAX_PENDING_TICKS", "3"))
+# 统计信息打印间隔 (秒)
+STATS_INTERVAL_S = float(os.getenv("STATS_INTERVAL_S", "5"))
+# 某一路连续多少组无效或缺失后报警
+ALERT_AFTER_TICKS = int(os.getenv("ALERT_AFTER_TICKS", "15"))
+
+
+@dataclass
+class FrameSet:
+    tick_seq: int
+    tick_ns: int
+    capture_ns: dict[str, int] = field(default_factory=dict)
+    device_ns: dict[str, int] = field(default_factory=dict)
+    # 相机标记为无效的数据流及其状态 (black, frozen, ...)
+    invalid: dict[str, str] = field(default_factory=dict)
+
+    def spread_s(self) -> float:
+        # 所有数据都带硬件时间戳时用硬件时间戳，否则用主机采集时间戳
+        stamps = self.device_ns if self.device_ns and len(self.device_ns) == len(self.capture_ns) else self.capture_ns
+        if len(stamps) < 2:
+            return 0.0
+        return (max(stamps.values()) - min(stamps.values())) / 1e9
+
+
+class CaptureCoordinator:
+    """Numbers the ticks it fans out and groups the returned samples per tick."""
+
+    def __init__(self, streams: list[str]):
+        self.streams = list(streams)
+        self.auto_streams = not self.streams
+        self.seq = 0
+        self.pending: dict[int, FrameSet] = {}
+
+    def tick(self) -> dict:
+        """Starts a new tick, returns the metadata to send with it."""
+        self.seq += 1
+        tick_ns = time.time_ns()
+        self.pending[self.seq] = FrameSet(self.seq, tick_ns)
+        return {"tick_seq": self.seq, "tick_ns": tick_ns}
+
+    def add(self, stream: str, metadata: dict) -> list[tuple[FrameSet, bool]]:
+        """Records one sample, returns the (frame set, complete) pairs that are done."""
+        if self.auto_streams and stream not in self.streams:
+            self.streams.append(stream)
+        if stream not in self.streams:
+            return []
+
+        frame_set = self.pending.get(int(metadata.get("tick_seq", self.seq)))
+        if frame_set is not None:
+            frame_set.capture_ns[stream] = int(metadata.get("capture_ns", time.time_ns()))
+            if "device_ns" in metadata:
+                frame_set.device_ns[stream] = int(metadata["device_ns"])
+            if not metadata.get("frame_valid", True):
+                frame_set.invalid[stream] = metadata.get("frame_status", "invalid")
+
+        done = []
+        for seq in sorted(self.pending):
+            frame_set = self.pending[seq]
+            complete = all(name in frame_set.capture_ns for name in self.streams)
+            if not complete and seq > self.seq - MAX_PENDING_TICKS:
+                continue
+            del self.pending[seq]
+            # tick 到达时还没有任何数据的帧组 (相机尚未启动) 不发出
+            if frame_set.capture_ns:
+                done.append((frame_set, complete))
+        return done
+
+    def offsets_s(self, frame_set: FrameSet) -> np.ndarray:
+        return np.array(
+            [
+                (frame_set.capture_ns[name] - frame_set.tick_ns) / 1e9 if name in frame_set.capture_ns else np.nan
+                for name in self.streams
+            ],
+            dtype=np.float32,
+        )
+
+
+class SkewStats:
+    """Mean / max inter-stream spread and incomplete frame sets, printed every STATS_INTERVAL_S."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.start_t = time.perf_counter()
+        self.count = 0
+        self.incomplete = 0
+        self.total_spread_s = 0.0
+        self.max_spread_s = 0.0
+
+    def update(self, spread_s: float, complete: bool):
+        self.count += 1
+        self.total_spread_s += spread_s
+        self.max_spread_s = max(self.max_spread_s, spread_s)
+        if not complete:
+            self.incomplete += 1
+
+        if time.perf_counter() - self.start_t >= STATS_INTERVAL_S:
+            print(
+                f"[capture_sync] frame sets: {self.count}, incomplete: {self.incomplete}, "
+                f"spread mean: {self.total_spread_s / self.count * 1e3:.2f} ms, max: {self.max_spread_s * 1e3:.2f} ms"
+            )
+            self.reset()
+
+
+class HealthAlerts:
+    """Tracks consecutive bad frame sets per stream and reports state changes once."""
+
+    def __init__(self, after_ticks: int = ALERT_AFTER_TICKS):
+        self.after_ticks = after_ticks
+        self.bad_ticks: dict[str, int] = {}
+        self.alerting: dict[str, str] = {}
+
+    def update(self, streams: list[str], frame_set: FrameSet) -> list[tuple[str, str]]:
+        """Returns the (stream, status) changes to report, status "ok" when a stream recovered."""
+        changes = []
+        for name in streams:
+            if name not in frame_set.capture_ns:
+                status = "missing"
+            else:
+                status = frame_set.invalid.get(name, "ok")
+
+            if status == "ok":
+                self.bad_ticks[name] = 0
+                if name in self.alerting:
+                    del self.alerting[name]
+                    changes.append((name, "ok"))
+                continue
+
+            self.bad_ticks[name] = self.bad_ticks.get(name, 0) + 1
+            if self.bad_ticks[name] >= self.after_ticks and self.alerting.get(name) != status:
+                self.alerting[name] = status
+                changes.append((name, status))
+        return changes
+
+
+def main():
+    node = Node()
+    coordinator = CaptureCoordinator(STREAMS)
+    stats = SkewStats()
+    alerts = HealthAlerts()
+
+    for event in node:
+        event_type = event["type"]
+
+        if event_type == "INPUT":
+            event_id = event["id"]
+
+            if event_id == "tick":
+                metadata = coordinator.tick()
+                node.send_output("tick", pa.array([metadata["tick_seq"]], type=pa.int64()), metadata)
+                continue
+
+            for frame_set, complete in coordinator.add(event_id, event["metadata"]):
+                spread_s = frame_set.spread_s()
+                stats.update(spread_s, complete)
+                value = np.concatenate([[spread_s], coordinator.offsets_s(frame_set)]).astype(np.float32)
+                node.send_output(
+                    "frame_set",
+                    pa.array(value, type=pa.float32()),
+                    {
+                        "tick_seq": frame_set.tick_seq,
+                        "capture_ns": frame_set.tick_ns,
+                        "streams": coordinator.streams,
+                        "complete": complete,
+                        "invalid": sorted(frame_set.invalid),
+                    },
+                )
+
+                for stream, status in alerts.update(coordinator.streams, frame_set):
+                    if status == "ok":
+                        print(f"[capture_sync] {stream} recovered")
+                    else:
+                        print(f"[capture_sync] ALERT: {stream} {status} for {alerts.after_ticks} frame sets")
+                    node.send_output("alert", pa.array([stream, status]), {"tick_seq": frame_set.tick_seq})
+
+        elif event_type == "ERROR":
+            raise RuntimeError(event["error"])
+
+        elif event_type == "STOP":
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""
+相机节点和接收端共用的颜色转换规划: 已知源格式和消费方需要的格式，一次确定转换步骤和实现。
+
+格式: rgb8, bgr8, yuv420 (I420 平面)，以及 jpeg (png、bmp、webp 只支持解码，用 cv2.imdecode)。
+- 源格式与目标格式相同时不做任何转换;
+- JPEG 解码直接输出消费方需要的通道顺序，编码直接接收 RGB 或 BGR (simplejpeg、PyTurboJPEG、PIL 都支持)，
+  不再 "解码成 BGR 再转 RGB" 或 "RGB 转 BGR 再编码";
+- JPEG 实现默认按 simplejpeg > PyTurboJPEG > OpenCV > PIL 选用已安装的第一个 (都基于 libjpeg-turbo 的 SIMD 实现)，
+  JPEG_BACKEND 可强制指定，JPEG_BACKEND=auto 时在第一次使用前实测各实现并选用最快的。
+  各实现的默认色度抽样不同 (simplejpeg 4:4:4、PyTurboJPEG 4:2:2、OpenCV 4:2:0)，编码时统一指定为 4:2:0，
+  换用实现不会改变 JPEG 大小和传输带宽。
+
+数据集、rerun 等消费方需要 RGB，cv2.imshow 和推流需要 BGR / jpeg，见 `plan()`。
+
+运行 `python -m operating_platform.robot.components.color_convert` 对每条转换路径和每个 JPEG 实现做 CPU 基准测试，
+只依赖 cv2 和 numpy (其余实现安装了才测)。
+"""
+
+import abc
+import io
+import os
+import time
+
+import cv2
+import numpy as np
+
+
+RAW_FORMATS = ("rgb8", "bgr8", "yuv420")
+JPEG_FORMATS = ("jpeg", "jpg", "jpe")
+# 只能用 cv2.imdecode 解码的压缩格式
+IMDECODE_FORMATS = ("png", "bmp", "webp")
+# 与 cv2.imencode 的默认值一致
+DEFAULT_JPEG_QUALITY = 95
+# 所有实现统一使用 cv2.imencode 默认的 4:2:0 色度抽样
+JPEG_SUBSAMPLING = "420"
+
+# 未压缩格式之间的 cv2 转换码
+CONVERSIONS = {
+    ("bgr8", "rgb8"): cv2.COLOR_BGR2RGB,
+    ("rgb8", "bgr8"): cv2.COLOR_RGB2BGR,
+    ("bgr8", "yuv420"): cv2.COLOR_BGR2YUV_I420,
+    ("rgb8", "yuv420"): cv2.COLOR_RGB2YUV_I420,
+    ("yuv420", "rgb8"): cv2.COLOR_YUV2RGB_I420,
+    ("yuv420", "bgr8"): cv2.COLOR_YUV2BGR_I420,
+}
+
+
+def normalize(encoding: str) -> str:
+    encoding = encoding.lower()
+    return "jpeg" if encoding in JPEG_FORMATS else encoding
+
+
+def as_image(data: np.ndarray, encoding: str, width: int | None = None, height: int | None = None) -> np.ndarray:
+    """Zero-copy view of a flat uint8 buffer in the layout cv2 expects for a raw `encoding`."""
+    if data.ndim > 1 or encoding == "jpeg":
+        return data
+    if encoding == "yuv420":
+        return data.reshape((height * 3 // 2, width))
+    return data.reshape((height, width, 3))
+
+
+class JpegBackend(abc.ABC):
+    """One JPEG implementation. `order` is the channel order of the decoded / encoded pixels ("rgb8" or "bgr8")."""
+
+    name = ""
+
+    @abc.abstractmethod
+    def decode(self, data: np.ndarray, order: str) -> np.ndarray | None:
+        pass
+
+    @abc.abstractmethod
+    def encode(self, frame: np.ndarray, order: str, quality: int) -> np.ndarray | None:
+        pass
+
+
+class OpenCVJpeg(JpegBackend):
+    """cv2.imdecode / imencode, BGR only: RGB costs an extra cvtColor (done in place)."""
+
+    name = "opencv"
+
+    def decode(self, data, order):
+        frame = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        if frame is not None and order == "rgb8":
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+        return frame
+
+    def encode(self, frame, order, quality):
+        if order == "rgb8":
+            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        ret, encoded = cv2.imencode(".jpeg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+        return encoded.reshape(-1) if ret else None
+
+
+class SimpleJpeg(JpegBackend):
+    name = "simplejpeg"
+
+    def __init__(self):
+        import simplejpeg
+
+        self.simplejpeg = simplejpeg
+
+    def decode(self, data, order):
+        return self.simplejpeg.decode_jpeg(data, colorspace="RGB" if order == "rgb8" else "BGR")
+
+    def encode(self, frame, order, quality):
+        encoded = self.simplejpeg.encode_jpeg(
+            np.ascontiguousarray(frame),
+            quality=quality,
+            colorspace="RGB" if order == "rgb8" else "BGR",
+            colorsubsampling=JPEG_SUBSAMPLING,
+        )
+        return np.frombuffer(encoded, dtype=np.uint8)
+
+
+class TurboJpeg(JpegBackend):
+    name = "turbojpeg"
+
+    def __init__(self):
+        import turbojpeg
+
+        self.turbojpeg = turbojpeg
+        self.jpeg = turbojpeg.TurboJPEG()
+
+    def _format(self, order):
+        return self.turbojpeg.TJPF_RGB if order == "rgb8" else self.turbojpeg.TJPF_BGR
+
+    def decode(self, data, order):
+        return self.jpeg.decode(data.tobytes(), pixel_format=self._format(order))
+
+    def encode(self, frame, order, quality):
+        encoded = self.jpeg.encode(
+            np.ascontiguousarray(frame),
+            quality=quality,
+            pixel_format=self._format(order),
+            jpeg_subsample=self.turbojpeg.TJSAMP_420,
+        )
+        return np.frombuffer(encoded, dtype=np.uint8)
+
+
+class PILJpeg(JpegBackend):
+    """Pillow (libjpeg-turbo in the official wheels), RGB only: BGR costs an extra cvtColor."""
+
+    name = "pil"
+
+    def __init__(self):
+        import PIL.Image
+
+        self.Image = PIL.Image
+
+    def decode(self, data, order):
+        frame = np.array(self.Image.open(io.BytesIO(data)).convert("RGB"))
+        if order == "bgr8":
+            return cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        return frame
+
+    def encode(self, frame, order, quality):
+        if order == "bgr8":
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        buffer = io.BytesIO()
+        # subsampling=2: 4:2:0
+        self.Image.fromarray(frame).save(buffer, format="JPEG", quality=quality, subsampling=2)
+        return np.frombuffer(buffer.getbuffer(), dtype=np.uint8)
+
+
+# 默认优先顺序
+JPEG_BACKENDS = (SimpleJpeg, TurboJpeg, OpenCVJpeg, PILJpeg)
+
+
+def available_jpeg_backends() -> list[JpegBackend]:
+    """Instances of every JPEG implementation installed on this machine, in default preference order."""
+    backends = []
+    for backend_cls in JPEG_BACKENDS:
+        try:
+            backends.append(backend_cls())
+        except (ImportError, OSError, RuntimeError):  # 未安装，或找不到 libturbojpeg
+            continue
+    return backends
+
+
+def _bench(fn, repeat: int) -> float:
+    fn()  # 预热
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def fastest_jpeg_backend(width: int = 640, height: int = 480, repeat: int = 20) -> JpegBackend:
+    """Measures decode + encode of a synthetic frame with every installed implementation, returns the fastest."""
+    frame = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    # 平滑一些，接近真实图像的压缩率
+    frame = cv2.GaussianBlur(frame, (9, 9), 0)
+    encoded = OpenCVJpeg().encode(frame, "bgr8", DEFAULT_JPEG_QUALITY)
+    timings = {}
+    for backend in available_jpeg_backends():
+        timings[backend.name] = (
+            _bench(lambda: backend.decode(encoded, "rgb8"), repeat)
+            + _bench(lambda: backend.encode(frame, "rgb8", DEFAULT_JPEG_QUALITY), repeat),
+            backend,
+        )
+    return min(timings.values(), key=lambda timing: timing[0])[1]
+
+
+_jpeg_backend: JpegBackend | None = None
+
+
+def jpeg_backend() -> JpegBackend:
+    """The process-wide JPEG implementation, chosen on first use (see JPEG_BACKEND)."""
+    global _jpeg_backend
+    if _jpeg_backend is None:
+        choice = os.getenv("JPEG_BACKEND", "")
+        if choice == "auto":
+            _jpeg_backend = fastest_jpeg_backend()
+        else:
+            backends = available_jpeg_backends()
+            matching = [backend for backend in backends if backend.name == choice]
+            if choice and not matching:
+                print(f"JPEG backend '{choice}' is not available, using {backends[0].name}")
+            _jpeg_backend = (matching or backends)[0]
+    return _jpeg_backend
+
+
+class ColorPath:
+    """
+    Precomputed conversion from `source` to `target` encoding. `steps` describes what runs per frame, an empty
+    list means the input is passed through unchanged.
+    """
+
+    def __init__(self, source: str, target: str, quality: int = DEFAULT_JPEG_QUALITY, jpeg: JpegBackend | None = None):
+        self.source = normalize(source)
+        self.target = normalize(target)
+        self.quality = quality
+        if self.source not in (*RAW_FORMATS, "jpeg", *IMDECODE_FORMATS):
+            raise ValueError(f"Unsupported source encoding: {self.source}")
+        if self.target not in (*RAW_FORMATS, "jpeg"):
+            raise ValueError(f"Unsupported target encoding: {self.target}")
+        if self.source in IMDECODE_FORMATS:
+            if self.target == "jpeg":
+                raise ValueError(f"Cannot transcode {self.source} to jpeg")
+            self.jpeg = OpenCVJpeg()
+        elif jpeg is None and "jpeg" in (self.source, self.target):
+            self.jpeg = jpeg_backend()
+        else:
+            self.jpeg = jpeg
+        self.steps = self._plan()
+
+    def _plan(self) -> list[str]:
+        source, target = self.source, self.target
+        if source == target:
+            return []
+        if source == "jpeg" or source in IMDECODE_FORMATS:
+            if target in ("rgb8", "bgr8"):
+                return [f"{self.jpeg.name} decode -> {target}"]
+            return [f"{self.jpeg.name} decode -> bgr8", f"cvtColor bgr8 -> {target}"]
+        if target == "jpeg":
+            if source in ("rgb8", "bgr8"):
+                return [f"{self.jpeg.name} encode {source}"]
+            return [f"cvtColor {source} -> rgb8", f"{self.jpeg.name} encode rgb8"]
+        return [f"cvtColor {source} -> {target}"]
+
+    def __call__(
+        self, data: np.ndarray, width: int | None = None, height: int | None = None, out: np.ndarray | None = None
+    ) -> np.ndarray | None:
+        """
+        Converts one frame. Raw sources may be flat buffers (then `width` / `height` are required). `out` is an
+        optional preallocated output for raw-to-raw conversions. Returns None if decoding or encoding failed.
+        With no conversion the input itself is returned.
+        """
+        source, target = self.source, self.target
+        if not self.steps:
+            return data
+        if source == "jpeg" or source in IMDECODE_FORMATS:
+            frame = self.jpeg.decode(data, "rgb8" if target == "rgb8" else "bgr8")
+            if frame is None or target == "bgr8" or target == "rgb8":
+                return frame
+            return cv2.cvtColor(frame, CONVERSIONS[("bgr8", target)], dst=out)
+
+        frame = as_image(data, source, width, height)
+        if target == "jpeg":
+            if source == "yuv420":
+                frame, source = cv2.cvtColor(frame, CONVERSIONS[("yuv420", "rgb8")]), "rgb8"
+            return self.jpeg.encode(frame, source, self.quality)
+        return cv2.cvtColor(frame, CONVERSIONS[(source, target)], dst=out)
+
+    def __repr__(self) -> str:
+        return f"ColorPath({self.source} -> {self.target}: {', '.join(self.steps) or 'passthrough'})"
+
+
+_paths: dict[tuple[str, str, int], ColorPath] = {}
+
+
+def plan(source: str, target: str, quality: int = DEFAULT_JPEG_QUALITY) -> ColorPath:
+    """Cached `ColorPath` from `source` to `target` using the process-wide JPEG implementation."""
+    key = (normalize(source), normalize(target), quality)
+    path = _paths.get(key)
+    if path is None:
+        path = _paths[key] = ColorPath(source, target, quality=quality)
+    return path
+
+
+def benchmark(width: int = 640, height: int = 480, repeat: int = 100):
+    """Prints the per-frame time of every conversion path, with every installed JPEG implementation."""
+    frame = cv2.GaussianBlur(np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8), (9, 9), 0)
+    samples = {
+        "bgr8": frame,
+        "rgb8": cv2.cvtColor(frame, cv2.COLOR_BGR2RGB),
+        "yuv420": cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420),
+        "jpeg": OpenCVJpeg().encode(frame, "bgr8", DEFAULT_JPEG_QUALITY),
+    }
+    backends = available_jpeg_backends()
+    print(f"{width}x{height}, {repeat} frames, jpeg backends: {[backend.name for backend in backends]}")
+
+    for source in samples:
+        for target in samples:
+            if source == target:
+                continue
+            uses_jpeg = "jpeg" in (source, target)
+            for backend in backends if uses_jpeg else [None]:
+                path = ColorPath(source, target, jpeg=backend)
+                out = None
+                if not uses_jpeg:
+                    out = np.empty_like(samples[target])
+                dt = _bench(lambda: path(samples[source], out=out), repeat)
+                name = f"{source} -> {target}" + (f" [{backend.name}]" if backend is not None else "")
+                print(f"  {name:28s} {dt * 1e3:7.3f} ms  {width * height / dt / 1e6:8.1f} Mpx/s")
+
+    # 旧路径: 先解码成 BGR 再转 RGB，RGB 先转 BGR 再编码
+    opencv = OpenCVJpeg()
+    dt = _bench(lambda: cv2.cvtColor(cv2.imdecode(samples["jpeg"], cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB), repeat)
+    print(f"  {'legacy jpeg -> rgb8':28s} {dt * 1e3:7.3f} ms")
+    dt = _bench(lambda: opencv.encode(cv2.cvtColor(samples["rgb8"], cv2.COLOR_RGB2BGR), "bgr8", DEFAULT_JPEG_QUALITY), repeat)
+    print(f"  {'legacy rgb8 -> jpeg':28s} {dt * 1e3:7.3f} ms")
+    print(f"selected jpeg backend: {jpeg_backend().name}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,201 @@
+"""
+Orbbec 相机节点共用的帧转换: 彩色帧转 BGR、深度帧后处理。
+
+- 彩色: SDK 给出的一维缓冲直接 reshape 成视图 (不拷贝)，cv2.cvtColor 写入按尺寸预先分配的输出;
+  BGR 格式直接返回视图，MJPG 只能解码 (imdecode 自己分配内存)。
+- 深度: 缩放到毫米、有效范围裁剪、时域滤波、转 uint16 合成一步，写入预先分配的缓冲。
+  有 numba 时用编译后的单循环实现，否则用 NumPy 的 out= 原地运算。
+
+返回的数组在下一帧会被覆盖，发送前不要保留引用。
+运行 `python -m operating_platform.robot.components.orbbec_convert` 对每种像素格式做微基准测试，
+只依赖 cv2 和 numpy (不需要连接相机，也不需要 pyorbbecsdk)。
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # 节点环境中没有 numba 时使用 NumPy 实现
+    numba = None
+
+
+# 像素格式 -> 转 BGR 的 cv2 转换码，bgr 不需要转换，mjpg 需要解码
+COLOR_FORMATS = {
+    "rgb": cv2.COLOR_RGB2BGR,
+    "bgr": None,
+    "yuyv": cv2.COLOR_YUV2BGR_YUY2,
+    "uyvy": cv2.COLOR_YUV2BGR_UYVY,
+    "i420": cv2.COLOR_YUV2BGR_I420,
+    "nv12": cv2.COLOR_YUV2BGR_NV12,
+    "nv21": cv2.COLOR_YUV2BGR_NV21,
+    "mjpg": None,
+}
+
+
+def frame_view(data: np.ndarray, color_format: str, width: int, height: int) -> np.ndarray:
+    """Zero-copy view of a flat uint8 SDK buffer in the layout cv2.cvtColor expects for `color_format`."""
+    if color_format in ("rgb", "bgr"):
+        return data.reshape((height, width, 3))
+    if color_format in ("yuyv", "uyvy"):
+        return data.reshape((height, width, 2))
+    if color_format in ("i420", "nv12", "nv21"):
+        # Y 平面之后紧跟色度平面，整体视为 1.5 倍高度的单通道图像
+        return data.reshape((height * 3 // 2, width))
+    raise ValueError(f"Unsupported color format: {color_format}")
+
+
+class ColorConverter:
+    """Converts color frames to BGR into a buffer preallocated per frame size."""
+
+    def __init__(self):
+        self.outputs: dict[tuple[int, int], np.ndarray] = {}
+
+    def _output(self, width: int, height: int) -> np.ndarray:
+        out = self.outputs.get((width, height))
+        if out is None:
+            out = self.outputs[(width, height)] = np.empty((height, width, 3), dtype=np.uint8)
+        return out
+
+    def __call__(self, data: np.ndarray, color_format: str, width: int, height: int) -> np.ndarray | None:
+        """BGR image of one frame, None if it could not be converted."""
+        if color_format not in COLOR_FORMATS:
+            print(f"Unsupported color format: {color_format}")
+            return None
+        if color_format == "mjpg":
+            return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+        view = frame_view(data, color_format, width, height)
+        code = COLOR_FORMATS[color_format]
+        if code is None:
+            return view
+        return cv2.cvtColor(view, code, dst=self._output(width, height))
+
+
+if numba is not None:
+
+    @numba.njit(cache=True)
+    def _filter_depth_numba(raw, scale, min_mm, max_mm, alpha, first, state, out):
+        for i in range(raw.size):
+            depth = raw[i] * scale
+            if depth <= min_mm or depth >= max_mm:
+                depth = 0.0
+            if not first:
+                depth = alpha * depth + (1.0 - alpha) * state[i]
+            state[i] = depth
+            out[i] = np.uint16(depth)
+
+
+class DepthFilter:
+    """
+    Scale to millimeters, zero everything outside (min_mm, max_mm), then exponential temporal filter
+    (new = alpha * frame + (1 - alpha) * previous, like the former cv2.addWeighted `TemporalFilter`).
+    `alpha=None` disables the temporal filter. Output is uint16 millimeters.
+    """
+
+    def __init__(self, min_mm: float, max_mm: float, alpha: float | None = None, use_numba: bool = True):
+        self.min_mm = min_mm
+        self.max_mm = max_mm
+        self.alpha = alpha
+        self.use_numba = use_numba and numba is not None
+        self.shape = None
+        self.colormap_out = None
+
+    def _build(self, shape: tuple[int, int]):
+        self.shape = shape
+        # 滤波状态 (float32 毫米) 和输出，numpy 实现额外需要两个掩码
+        self.state = np.empty(shape, dtype=np.float32)
+        self.out = np.empty(shape, dtype=np.uint16)
+        self.invalid = np.empty(shape, dtype=bool)
+        self.above = np.empty(shape, dtype=bool)
+        self.scaled = np.empty(shape, dtype=np.float32)
+        self.depth_u8 = np.empty(shape, dtype=np.uint8)
+        self.colormap_out = np.empty((*shape, 3), dtype=np.uint8)
+        self.first = True
+
+    def reset(self):
+        self.first = True
+
+    def __call__(self, raw: np.ndarray, scale: float) -> np.ndarray:
+        """`raw` is the (H, W) uint16 SDK depth, `scale` the SDK depth scale (millimeters per unit)."""
+        if raw.shape != self.shape:
+            self._build(raw.shape)
+
+        first = self.first or self.alpha is None
+        if self.use_numba:
+            alpha = self.alpha if self.alpha is not None else 1.0
+            _filter_depth_numba(
+                raw.reshape(-1), np.float32(scale), self.min_mm, self.max_mm, alpha, first,
+                self.state.reshape(-1), self.out.reshape(-1),
+            )
+        else:
+            target = self.state if first else self.scaled
+            np.multiply(raw, np.float32(scale), out=target)
+            np.less_equal(target, self.min_mm, out=self.invalid)
+            np.greater_equal(target, self.max_mm, out=self.above)
+            np.logical_or(self.invalid, self.above, out=self.invalid)
+            np.putmask(target, self.invalid, 0)
+            if not first:
+                # state = alpha * frame + (1 - alpha) * state
+                self.state *= 1 - self.alpha
+                target *= self.alpha
+                self.state += target
+            np.copyto(self.out, self.state, casting="unsafe")
+
+        self.first = False
+        return self.out
+
+    def colormap(self) -> np.ndarray:
+        """JET visualization of the last filtered frame (min-max normalized), in a preallocated buffer."""
+        cv2.normalize(self.out, self.depth_u8, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
+        return cv2.applyColorMap(self.depth_u8, cv2.COLORMAP_JET, dst=self.colormap_out)
+
+
+def _bench(fn, repeat: int) -> float:
+    fn()  # 预热 (numba 编译、缓冲分配)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def _legacy_depth(raw: np.ndarray, scale: float, previous: np.ndarray | None) -> np.ndarray:
+    depth = raw.astype(np.float32) * scale
+    depth = np.where((depth > 10) & (depth < 15000), depth, 0)
+    if previous is not None:
+        depth = cv2.addWeighted(depth, 0.5, previous, 0.5, 0)
+    return depth.astype(np.uint16)
+
+
+def benchmark(width: int = 640, height: int = 480, repeat: int = 200):
+    """Prints the per-frame conversion time of every color format and of the depth filter."""
+    rng = np.random.default_rng(0)
+    converter = ColorConverter()
+    sizes = {"rgb": 3, "bgr": 3, "yuyv": 2, "uyvy": 2, "i420": 1.5, "nv12": 1.5, "nv21": 1.5}
+    print(f"color {width}x{height}, {repeat} frames")
+    for color_format, bytes_per_pixel in sizes.items():
+        data = rng.integers(0, 256, int(width * height * bytes_per_pixel), dtype=np.uint8)
+        dt = _bench(lambda: converter(data, color_format, width, height), repeat)
+        print(f"  {color_format:5s} {dt * 1e3:7.3f} ms  {width * height / dt / 1e6:8.1f} Mpx/s")
+    jpeg = cv2.imencode(".jpeg", rng.integers(0, 256, (height, width, 3), dtype=np.uint8))[1].reshape(-1)
+    dt = _bench(lambda: converter(jpeg, "mjpg", width, height), repeat)
+    print(f"  {'mjpg':5s} {dt * 1e3:7.3f} ms  {width * height / dt / 1e6:8.1f} Mpx/s")
+
+    raw = rng.integers(0, 20000, (height, width), dtype=np.uint16)
+    print(f"depth {width}x{height}, {repeat} frames")
+    previous = _legacy_depth(raw, 1.0, None).astype(np.float32)
+    dt = _bench(lambda: _legacy_depth(raw, 1.0, previous), repeat)
+    print(f"  {'legacy':8s} {dt * 1e3:7.3f} ms")
+    for name, use_numba in (("numpy", False), ("numba", True)):
+        if use_numba and numba is None:
+            print(f"  {name:8s} (numba not installed)")
+            continue
+        depth_filter = DepthFilter(10, 15000, alpha=0.5, use_numba=use_numba)
+        dt = _bench(lambda: depth_filter(raw, 1.0), repeat)
+        print(f"  {name:8s} {dt * 1e3:7.3f} ms")
+
+
+if __name__ == "__main__":
+    benchmark()
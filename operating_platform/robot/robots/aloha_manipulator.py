@@ -6,7 +6,6 @@ import os
 import ctypes
 import platform
 import sys
-import zmq
 
 import numpy as np
 import torch
@@ -25,113 +24,25 @@ from operating_platform.robot.robots.configs import AlohaRobotConfig
 from operating_platform.robot.robots.com_configs.cameras import CameraConfig, OpenCVCameraConfig
 
 from operating_platform.robot.robots.camera import Camera
+from operating_platform.robot.transport import (
+    ActionSender,
+    Channel,
+    FRAME_ID_KEY,
+    FRAME_LATENCY_KEY,
+    FRAME_VALID_KEY,
+    SENSOR_NS_KEY,
+    FloatVectorChannel,
+    ImageChannel,
+    Link,
+    PoseChannel,
+)
+from operating_platform.robot.transport.sync import SYNC_SKEW_KEY, StreamSynchronizer
 
 
-recv_images = {}
-recv_master_jointstats = {}
-recv_follower_jointstats = {}
-recv_follower_pose = {}
-lock = threading.Lock()  # 线程锁
-
 # IPC Address
 ipc_address = "ipc:///tmp/dora-zeromq"
 ipc_address_piper = "ipc:///tmp/dorobot-piper"
-
-context = zmq.Context()
-running_recv_image_server = True
-running_recv_piper_server = True
-
-socket_image = context.socket(zmq.PAIR)
-socket_image.connect(ipc_address)
-socket_image.setsockopt(zmq.SNDHWM, 2000)
-socket_image.setsockopt(zmq.SNDBUF, 2**25)
-socket_image.setsockopt(zmq.SNDTIMEO, 2000)
-socket_image.setsockopt(zmq.RCVTIMEO, 2000)  # 设置接收超时（毫秒）
-socket_image.setsockopt(zmq.LINGER, 0)
-
-socket_piper = context.socket(zmq.PAIR)
-socket_piper.connect(ipc_address_piper)
-socket_piper.setsockopt(zmq.SNDHWM, 2000)
-socket_piper.setsockopt(zmq.SNDBUF, 2**25)
-socket_piper.setsockopt(zmq.SNDTIMEO, 2000)
-socket_piper.setsockopt(zmq.RCVTIMEO, 2000)  # 设置接收超时（毫秒）
-socket_piper.setsockopt(zmq.LINGER, 0)
-
-def piper_zmq_send(event_id, buffer, wait_time_s):
-    buffer_bytes = buffer.tobytes()
-    print(f"zmq send event_id:{event_id}, value:{buffer}")
-    try:
-        socket_piper.send_multipart([
-            event_id.encode('utf-8'),
-            buffer_bytes
-        ], flags=zmq.NOBLOCK)
-    except zmq.Again:
-        pass
-    time.sleep(wait_time_s)
-
-def recv_img_server():
-    """接收数据线程"""
-    while running_recv_image_server:
-        try:
-            message_parts = socket_image.recv_multipart()
-            if len(message_parts) < 2:
-                continue  # 协议错误
-
-            event_id = message_parts[0].decode('utf-8')
-            buffer_bytes = message_parts[1]
-
-            if 'image' in event_id:
-                # 解码图像
-                img_array = np.frombuffer(buffer_bytes, dtype=np.uint8)
-                frame = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                if frame is not None:
-                    with lock:
-                        recv_images[event_id] = frame
-
-        except zmq.Again:
-            print(f"Manipulator Receive Image Timeout")
-            continue
-        except Exception as e:
-            print("Manipulator Receive Image Recv Error:", e)
-            break
-
-def recv_piper_server():
-    """接收数据线程"""
-    while running_recv_piper_server:
-        try:
-            message_parts = socket_piper.recv_multipart()
-            if len(message_parts) < 2:
-                continue  # 协议错误
-
-            event_id = message_parts[0].decode('utf-8')
-            buffer_bytes = message_parts[1]
-
-            if 'jointstat' in event_id and 'master' in event_id:
-                joint_array = np.frombuffer(buffer_bytes, dtype=np.float32)
-                if joint_array is not None:
-                    with lock:
-                        recv_master_jointstats[event_id] = joint_array
-
-            if 'jointstat' in event_id and 'follower' in event_id:
-                joint_array = np.frombuffer(buffer_bytes, dtype=np.float32)
-                if joint_array is not None:
-                    with lock:
-                        recv_follower_jointstats[event_id] = joint_array
-
-            if 'endpose' in event_id and 'follower' in event_id:
-                pose_array = np.frombuffer(buffer_bytes, dtype=np.float32)
-                if pose_array is not None:
-                    with lock:
-                        recv_follower_pose[event_id] = pose_array
-
-        except zmq.Again:
-            print(f"Manipulator Receive Piper Timeout")
-            continue
-        except Exception as e:
-            print("Manipulator Receive Piper Recv Error:", e)
-            break
+ipc_address_bundle = "ipc:///tmp/dorobot-bundle"
 
 
 class OpenCVCamera:
@@ -191,13 +102,46 @@ class AlohaManipulator:
         self.follower_arms['left'] = self.config.left_leader_arm.motors
 
         self.cameras = make_cameras_from_configs(self.config.cameras)
+        self.depth_cameras = self.config.depth_cameras
         self.microphones = self.config.microphones
 
-        self.recv_img_thread = threading.Thread(target=recv_img_server, daemon=True)
-        self.recv_img_thread.start()
-
-        self.recv_piper_thread = threading.Thread(target=recv_piper_server, daemon=True)
-        self.recv_piper_thread.start()
+        # socket 在 connect() 中打开; 压缩帧 (ENCODING=jpeg) 在线程池中解码，每个相机一个线程
+        self.image_link = Link(ipc_address, name="Manipulator Receive Image")
+        # 相机节点的预览 (preview_<相机名>，缩小并编码好的帧)，保持编码后的字节，只在显示时解码;
+        # 必须在 "image" 通道之前加入，否则 preview_image_* 会被路由到全分辨率通道
+        self.recv_previews = self.image_link.add(Channel("preview", conflate=True))
+        self.recv_images = self.image_link.add(ImageChannel("image", default_encoding="jpeg", conflate=True, decode_workers=len(self.cameras)))
+        self.recv_depth = self.image_link.add(ImageChannel("depth", default_encoding="mono16", conflate=True))
+
+        self.piper_link = Link(ipc_address_piper, name="Manipulator Receive Piper")
+        self.recv_master_jointstats = self.piper_link.add(FloatVectorChannel(("jointstat", "master"), conflate=True))
+        self.recv_follower_jointstats = self.piper_link.add(FloatVectorChannel(("jointstat", "follower"), conflate=True))
+        self.recv_follower_pose = self.piper_link.add(PoseChannel(("endpose", "follower"), conflate=True))
+        self.piper_link.add(FloatVectorChannel("action"))
+        # capture_sync 节点 (可选) 每个 tick 的 [相机间采集时差, 各路相对 tick 的偏移]
+        self.recv_frame_set = self.piper_link.add(FloatVectorChannel("frame_set", conflate=True))
+        # 桥接节点开启 BUNDLE=1 时，传感器数据按 tick 打包走同一个 socket (见 transport/bundle.py)，
+        # 通道与上面共用; piper_link 只用来下发动作
+        self.bundle_link = None
+        if self.config.bundle:
+            self.bundle_link = Link(ipc_address_bundle, name="Manipulator Receive Bundle")
+            for channel in (self.recv_previews, self.recv_images, self.recv_depth, self.recv_master_jointstats, self.recv_follower_jointstats, self.recv_follower_pose, self.recv_frame_set):
+                self.bundle_link.add(channel)
+
+        # send_action 只放入信箱，由后台线程按固定频率下发
+        self.action_sender = ActionSender(self.piper_link, rate_hz=self.config.action_rate_hz)
+
+        # 上一次组帧时各相机的版本号
+        self.frame_versions = {}
+
+        # 每帧把关节、位姿数据对齐到图像的采集时间
+        self.sync = StreamSynchronizer(
+            [f"follower_{name}_joint" for name in self.follower_arms]
+            + [f"follower_{name}_pose" for name in self.follower_arms]
+            + [f"master_{name}_joint" for name in self.follower_arms]
+            + list(self.cameras)
+            + [f"depth_{name}" for name in self.depth_cameras]
+        )
         
         self.is_connected = False
         self.logs = {}
@@ -219,6 +163,18 @@ class AlohaManipulator:
                 "info": None,
             }
         return cam_ft
+
+    @property
+    def depth_features(self) -> dict:
+        depth_ft = {}
+        for name, cam in self.depth_cameras.items():
+            depth_ft[f"observation.depth.{name}"] = {
+                "dtype": "depth",
+                "shape": (cam.height, cam.width, 1),
+                "names": ["height", "width", "channels"],
+                "info": None,
+            }
+        return depth_ft
     
     @property
     def motor_features(self) -> dict:
@@ -237,13 +193,25 @@ class AlohaManipulator:
             },
         }
     
+    def piper_zmq_send(self, event_id, buffer):
+        self.action_sender.put(event_id, buffer)
+
     def connect(self):
+        if self.bundle_link is not None:
+            self.bundle_link.open()
+            self.piper_link.open(receive=False)
+        else:
+            self.image_link.open()
+            self.piper_link.open()
+
         timeout = 5  # 超时时间（秒）
         start_time = time.perf_counter()
 
         while True:
             # 检查是否已获取所有摄像头的图像
-            if all(name in recv_images for name in self.cameras):
+            if all(name in self.recv_images for name in self.cameras) and all(
+                f"depth_{name}" in self.recv_depth for name in self.depth_cameras
+            ):
                 break
 
             # 超时检测
@@ -257,7 +225,7 @@ class AlohaManipulator:
         while True:
             # 检查是否已获取所有机械臂的关节角度
             if any(
-                any(name in key for key in recv_follower_jointstats)
+                any(name in key for key in self.recv_follower_jointstats)
                 for name in self.follower_arms
             ):
                 break
@@ -272,7 +240,7 @@ class AlohaManipulator:
         start_time = time.perf_counter()
         while True:
             if any(
-                any(name in key for key in recv_follower_pose)
+                any(name in key for key in self.recv_follower_pose)
                 for name in self.follower_arms
             ):
                 break
@@ -299,11 +267,44 @@ class AlohaManipulator:
         #     # 可选：减少CPU占用
         #     time.sleep(0.01)
 
+        self.action_sender.start()
         self.is_connected = True
     
+    @property
+    def sync_features(self) -> dict:
+        return self.sync.features
+
+    def get_previews(self) -> dict[str, tuple[bytes, dict]]:
+        """Latest (encoded preview, metadata) of every camera that publishes a preview, by camera name."""
+        previews = {}
+        for name in self.cameras:
+            event_id = f"preview_{name}"
+            if event_id in self.recv_previews:
+                previews[name] = (self.recv_previews[event_id], self.recv_previews.metadata[event_id])
+        return previews
+
+    @property
+    def health_features(self) -> dict:
+        return {
+            FRAME_VALID_KEY: {
+                "dtype": "float32",
+                "shape": (len(self.cameras),),
+                "names": list(self.cameras),
+            }
+        }
+
+    @property
+    def frame_features(self) -> dict:
+        names = list(self.cameras)
+        return {
+            FRAME_ID_KEY: {"dtype": "int64", "shape": (len(names),), "names": names},
+            SENSOR_NS_KEY: {"dtype": "int64", "shape": (len(names),), "names": names},
+            FRAME_LATENCY_KEY: {"dtype": "float32", "shape": (len(names),), "names": names},
+        }
+
     @property
     def features(self):
-        return {**self.motor_features, **self.camera_features}
+        return {**self.motor_features, **self.camera_features, **self.depth_features}
 
     @property
     def has_camera(self):
@@ -316,12 +317,12 @@ class AlohaManipulator:
     def follower_record(self):
         follower_joint = {}
         for name in self.follower_arms:
-            for match_name in recv_follower_jointstats:
+            for match_name in self.recv_follower_jointstats:
                 if name in match_name:
                     now = time.perf_counter()
 
                     byte_array = np.zeros(6, dtype=np.float32)
-                    joint_read = recv_follower_jointstats[match_name]
+                    joint_read = self.sync.interpolate(f"follower_{name}_joint", self.recv_follower_jointstats, match_name)
 
                     byte_array[:6] = joint_read[:6]
                     byte_array = np.round(byte_array, 3)
@@ -332,12 +333,12 @@ class AlohaManipulator:
 
         follower_pos = {}
         for name in self.follower_arms:
-            for match_name in recv_follower_pose:
+            for match_name in self.recv_follower_pose:
                 if name in match_name:
                     now = time.perf_counter()
 
                     byte_array = np.zeros(6, dtype=np.float32)
-                    pose_read = recv_follower_pose[match_name]
+                    pose_read = self.sync.interpolate(f"follower_{name}_pose", self.recv_follower_pose, match_name)
 
                     byte_array[:6] = pose_read[:]
                     byte_array = np.round(byte_array, 3)
@@ -348,12 +349,12 @@ class AlohaManipulator:
 
         follower_gripper = {}
         for name in self.follower_arms:
-            for match_name in recv_follower_jointstats:
+            for match_name in self.recv_follower_jointstats:
                 if name in match_name:
                     now = time.perf_counter()
 
                     byte_array = np.zeros(1, dtype=np.float32)
-                    gripper_read = recv_follower_jointstats[match_name][6]
+                    gripper_read = self.sync.interpolate(f"follower_{name}_joint", self.recv_follower_jointstats, match_name)[6]
 
                     byte_array[0] = gripper_read
                     byte_array = np.round(byte_array, 3)
@@ -367,12 +368,12 @@ class AlohaManipulator:
     def master_record(self):
         master_joint = {}
         for name in self.follower_arms:
-            for match_name in recv_master_jointstats:
+            for match_name in self.recv_master_jointstats:
                 if name in match_name:
                     now = time.perf_counter()
 
                     byte_array = np.zeros(6, dtype=np.float32)
-                    joint_read = recv_master_jointstats[match_name]
+                    joint_read = self.sync.interpolate(f"master_{name}_joint", self.recv_master_jointstats, match_name)
 
                     byte_array[:6] = joint_read[:6]
                     byte_array = np.round(byte_array, 3)
@@ -399,12 +400,12 @@ class AlohaManipulator:
 
         master_gripper = {}
         for name in self.follower_arms:
-            for match_name in recv_master_jointstats:
+            for match_name in self.recv_master_jointstats:
                 if name in match_name:
                     now = time.perf_counter()
 
                     byte_array = np.zeros(1, dtype=np.float32)
-                    gripper_read = recv_master_jointstats[match_name][6]
+                    gripper_read = self.sync.interpolate(f"master_{name}_joint", self.recv_master_jointstats, match_name)[6]
 
                     byte_array[0] = gripper_read
                     byte_array = np.round(byte_array, 3)
@@ -428,6 +429,11 @@ class AlohaManipulator:
         if not record_data:
             return
 
+        # 等到每个相机都来了新的一帧再组帧，超时则沿用上一帧 (由 Daemon 计为重复帧)
+        cameras = list(self.cameras)
+        self.logs["observation_fresh"] = self.recv_images.wait_newer(cameras, self.frame_versions)
+        self.sync.begin(self.recv_images, cameras)
+
         follower_joint, follower_pos, follower_gripper = self.follower_record()
 
         # master_joint, master_pos, master_gripper = self.master_record()
@@ -458,22 +464,60 @@ class AlohaManipulator:
         # Capture images from cameras
         
         images = {}
+        # 每个相机实际选中的那一帧的 metadata (帧号、硬件时间戳、健康状态)
+        frame_metadata = {}
         for name in self.cameras:
             now = time.perf_counter()
             
-            images[name] = recv_images[name]
+            images[name] = self.sync.nearest(name, self.recv_images, name)
+            frame_metadata[name] = self.sync.sample_metadata(name, self.recv_images, name)
 
             # images[name] = self.cameras[name].async_read()
             images[name] = torch.from_numpy(images[name])
             # self.logs[f"read_camera_{name}_dt_s"] = self.cameras[name].logs["delta_timestamp_s"]
             self.logs[f"read_camera_{name}_dt_s"] = time.perf_counter() - now
 
+        # 深度图保持 uint16 numpy (毫米)，由数据集原样写成 16 位 PNG
+        depths = {}
+        for name in self.depth_cameras:
+            depths[name] = self.sync.nearest(f"depth_{name}", self.recv_depth, f"depth_{name}")
+
+        # 各数据流的序号、丢帧和延迟统计
+        for link in (self.image_link, self.piper_link, self.bundle_link):
+            if link is not None and link.is_open:
+                self.logs.update(link.logs())
+        self.logs.update(self.action_sender.logs())
+        self.logs.update(self.sync.logs())
+        if "frame_set" in self.recv_frame_set:
+            self.logs["capture_spread_s"] = float(self.recv_frame_set["frame_set"][0])
+            self.logs["capture_tick_seq"] = self.recv_frame_set.metadata["frame_set"].get("tick_seq", 0)
+
         # Populate output dictionnaries and format to pytorch
         obs_dict, action_dict = {}, {}
         obs_dict["observation.state"] = state
         action_dict["action"] = action
         for name in self.cameras:
             obs_dict[f"observation.images.{name}"] = images[name]
+        for name in self.depth_cameras:
+            obs_dict[f"observation.depth.{name}"] = depths[name]
+        obs_dict[SYNC_SKEW_KEY] = torch.from_numpy(self.sync.skew_vector())
+        # 相机节点给出的帧健康标记 (没有标记的相机视为有效)
+        obs_dict[FRAME_VALID_KEY] = torch.tensor(
+            [float(frame_metadata[name].get("frame_valid", True)) for name in self.cameras],
+            dtype=torch.float32,
+        )
+        # 相机驱动的帧号和硬件时间戳 (没有时为 -1)，以及组帧时距采集的延迟，供录制后分析丢帧
+        now_ns = time.time_ns()
+        obs_dict[FRAME_ID_KEY] = torch.tensor(
+            [int(frame_metadata[name].get("frame_id", -1)) for name in self.cameras], dtype=torch.int64
+        )
+        obs_dict[SENSOR_NS_KEY] = torch.tensor(
+            [int(frame_metadata[name].get("sensor_ns", -1)) for name in self.cameras], dtype=torch.int64
+        )
+        obs_dict[FRAME_LATENCY_KEY] = torch.tensor(
+            [(now_ns - frame_metadata[name].get("capture_ns", now_ns)) / 1e9 for name in self.cameras],
+            dtype=torch.float32,
+        )
         
         # print("end teleoperate record")
 
@@ -605,8 +649,8 @@ class AlohaManipulator:
             goal_gripper_numpy = np.array([t.item() for t in goal_gripper], dtype=np.float32)
             position = np.concatenate([goal_joint_numpy, goal_gripper_numpy], axis=0)
 
-            piper_zmq_send(f"action_joint_{name}", position, wait_time_s=0.01)
-            # piper_zmq_send(f"action_gripper_{name}", goal_gripper_numpy, wait_time_s=0.01)
+            self.piper_zmq_send(f"action_joint_{name}", position)
+            # piper_zmq_send(f"action_gripper_{name}", goal_gripper_numpy)
 
             # action_sent.append(goal_joint)
 
@@ -663,20 +707,12 @@ class AlohaManipulator:
         #     self.cameras[name].disconnect()
 
         self.is_connected = False
-        
-        global running_recv_image_server
-        global running_recv_piper_server
-
-        running_recv_image_server = False
-        running_recv_piper_server = False
-
-        self.recv_img_thread.join()
-        self.recv_piper_thread.join()
-
-        socket_image.close()
-        socket_piper.close()
 
-        context.term()
+        self.action_sender.stop()
+        self.image_link.close()
+        self.piper_link.close()
+        if self.bundle_link is not None:
+            self.bundle_link.close()
         
 
     def __del__(self):
@@ -166,6 +166,19 @@ class AlohaRobotConfig(RobotConfig):
         }
     )
 
+    # 录制原始深度图 (uint16 毫米，数据集中 dtype 为 "depth"，存为 16 位 PNG)。
+    # 键为相机名，桥接节点的输入名为 depth_<相机名>，如 depth_top: camera_top/depth
+    depth_cameras: dict[str, CameraConfig] = field(
+        default_factory=lambda: {
+            # "top": OpenCVCameraConfig(
+            #     camera_index=1,
+            #     fps=30,
+            #     width=640,
+            #     height=400,
+            # ),
+        }
+    )
+
     microphones: dict[str, int] = field(
         default_factory=lambda: {
             # "audio_right": 2,
@@ -173,6 +186,13 @@ class AlohaRobotConfig(RobotConfig):
         }
     )
 
+    # 动作下发频率 (Hz)。piper 节点会丢弃与上一条间隔不足 MIN_ACTION_INTERVAL_S (默认 25 ms) 的动作，
+    # 下发周期要比它长出传输抖动的余量: 默认 30 Hz (33.3 ms) 留有约 8 ms，提高频率时同时调小 MIN_ACTION_INTERVAL_S
+    action_rate_hz: float = 30
+
+    # 接收桥接节点按 tick 打包的传感器数据 (桥接节点需设置环境变量 BUNDLE=1)
+    bundle: bool = False
+
     use_videos: bool = False
 
 
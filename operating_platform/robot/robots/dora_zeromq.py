@@ -1,80 +1,71 @@
-import zmq
-import threading
+import os
 import pyarrow as pa
-import time
 from dora import Node
-import numpy as np
 import queue
 
+from operating_platform.robot.transport import Channel, FloatVectorChannel, ImageChannel, Link
+from operating_platform.robot.transport.bundle import Bundler
+from operating_platform.robot.transport.shm_ring import DEFAULT_NUM_SLOTS, frame_link_hwm
+
 node = Node()
 
 # IPC Address
 ipc_address = "ipc:///tmp/dora-zeromq"
 ipc_address_piper = "ipc:///tmp/dorobot-piper"
+ipc_address_bundle = "ipc:///tmp/dorobot-bundle"
 
-context = zmq.Context()
-running_recv_image_server = True
-running_recv_piper_server = True
+# BUNDLE=1: 传感器数据按 tick 打包成一条消息发送 (机械臂配置需设置 bundle=true)。
+# BUNDLE_TRIGGER: 逗号分隔的输入名，全部到齐即结束一个 tick，默认为所有图像输入
+BUNDLE = os.getenv("BUNDLE", "0") == "1"
+BUNDLE_TRIGGER = [name for name in os.getenv("BUNDLE_TRIGGER", "").split(",") if name]
 
-socket_image = context.socket(zmq.PAIR)
-socket_image.bind(ipc_address)
-socket_image.setsockopt(zmq.SNDHWM, 2000)
-socket_image.setsockopt(zmq.SNDBUF, 2**25)
-socket_image.setsockopt(zmq.SNDTIMEO, 2000)
-socket_image.setsockopt(zmq.RCVTIMEO, 2000)  # 设置接收超时（毫秒）
-socket_image.setsockopt(zmq.LINGER, 0)
+# 创建线程安全队列 (在全局作用域)
+output_queue = queue.Queue()
 
-socket_piper = context.socket(zmq.PAIR)
-socket_piper.bind(ipc_address_piper)
-socket_piper.setsockopt(zmq.SNDHWM, 2000)
-socket_piper.setsockopt(zmq.SNDBUF, 2**25)
-socket_piper.setsockopt(zmq.SNDTIMEO, 2000)
-socket_piper.setsockopt(zmq.RCVTIMEO, 2000)  # 设置接收超时（毫秒）
-socket_piper.setsockopt(zmq.LINGER, 0)
+# 机械臂下发的动作，原样转发到 dora 的同名输出
+ACTION_PORTS = [
+    "action_joint_right",
+    "action_joint_left",
+    "action_gripper_right",
+    "action_gripper_left",
+]
 
-running_server = True
 
-# 创建线程安全队列 (在全局作用域)
-output_queue = queue.Queue()
+def queue_action(event_id, array, metadata):
+    # ✅ 仅将数据放入队列，不再操作 node
+    for port in ACTION_PORTS:
+        if port in event_id:
+            output_queue.put((port, array.copy()))
 
-def recv_server():
-    while running_server:
-        try:
-            message_parts = socket_piper.recv_multipart()
-            if message_parts and len(message_parts) >= 2:
-                event_id = message_parts[0].decode('utf-8')
-                buffer_bytes = message_parts[1]
-                
-                # print(f"zmq recv event_id:{event_id}")
-                array = np.frombuffer(buffer_bytes, dtype=np.float32).copy()
-                # print(f"zmq recv array:{array}")
-
-                # ✅ 仅将数据放入队列，不再操作 node
-                if 'action_joint_right' in event_id:
-                    output_queue.put(("action_joint_right", array))
-                if 'action_joint_left' in event_id:
-                    output_queue.put(("action_joint_left", array))
-                if 'action_gripper_right' in event_id:
-                    output_queue.put(("action_gripper_right", array))
-                if 'action_gripper_left' in event_id:
-                    output_queue.put(("action_gripper_left", array))
-                    
-        except zmq.Again:
-            print(f"Dora ZeroMQ Received Timeout")
-            time.sleep(0.01)
-            continue
-            
-        except Exception as e:
-            print("recv error:", e)
-            break
 
+# 通知比帧环的槽位更旧就没有意义了: 每路帧数据 (图像、深度、预览) 一个帧环，队列长度为槽位数 x 帧数据路数
+# (环境变量 FRAME_STREAMS，见 shm_ring.frame_link_hwm)
+image_link = Link(ipc_address, name="Dora ZeroMQ Image", bind=True, hwm=frame_link_hwm(), sndbuf=2**25)
+# 预览 (preview_image_*，已缩小、通常已编码为 jpeg) 直接随消息发送，不走帧环; 先于 "image" 匹配
+image_link.add(Channel("preview"))
+image_link.add(ImageChannel("image"))
+image_link.add(ImageChannel("depth"))  # uint16 毫米深度图，与图像走同一个帧环通道
 
+piper_link = Link(ipc_address_piper, name="Dora ZeroMQ", bind=True, sndbuf=2**25)
+piper_link.add(FloatVectorChannel("action", on_message=queue_action))
+piper_link.add(FloatVectorChannel("", name="piper"))  # 其余所有关节、位姿、夹爪数据
+
+# 打包消息中带有帧环通知，每个包里每路帧数据各占一个槽位，排队超过槽位数的包引用的帧已被覆盖，队列长度与槽位数一致
+bundle_link = Link(ipc_address_bundle, name="Dora ZeroMQ Bundle", bind=True, hwm=DEFAULT_NUM_SLOTS, sndbuf=2**25)
+bundle_link.add(Channel("preview"))
+bundle_link.add(ImageChannel("image"))
+bundle_link.add(ImageChannel("depth"))
+bundle_link.add(FloatVectorChannel("", name="piper"))
+bundler = Bundler(bundle_link, trigger=BUNDLE_TRIGGER)
 
-if __name__ == "__main__":
 
+if __name__ == "__main__":
 
-    server_thread = threading.Thread(target=recv_server)
-    server_thread.start()
+    if BUNDLE:
+        bundle_link.open(receive=False)
+    else:
+        image_link.open(receive=False)
+    piper_link.open()
 
     try:
         for event in node:
@@ -91,39 +82,22 @@ if __name__ == "__main__":
 
             if event["type"] == "INPUT":
                 event_id = event["id"]
-                buffer_bytes = event["value"].to_numpy().tobytes()
-                            
+
                 # 处理接收到的数据
                 # print(f"Send event: {event_id}")
-                # print(f"Buffer size: {len(buffer_bytes)} bytes")
-
-                if "image" in event_id:
-                    try:
-                        socket_image.send_multipart([
-                            event_id.encode('utf-8'),
-                            buffer_bytes
-                        ], flags=zmq.NOBLOCK)
-                    except zmq.Again:
-                        pass
+
+                if BUNDLE:
+                    value = event["value"].to_numpy(zero_copy_only=False)
+                    bundler.add(event_id, value, event["metadata"])
+                elif "image" in event_id or "depth" in event_id:
+                    image_link.send(event_id, event["value"].to_numpy(zero_copy_only=False), event["metadata"])
                 else:
-                    try:
-                        socket_piper.send_multipart([
-                            event_id.encode('utf-8'),
-                            buffer_bytes
-                        ], flags=zmq.NOBLOCK)
-                    except zmq.Again:
-                        pass
-                
+                    piper_link.send(event_id, event["value"].to_numpy(), event["metadata"])
+
             elif event["type"] == "STOP":
                 break
-    
-    finally:
-        # Close server 
-        running_server = False
-        server_thread.join()
-
-        # Close zmq
-        socket_image.close()
-        socket_piper.close()
 
-        context.term()
+    finally:
+        image_link.close()
+        piper_link.close()
+        bundle_link.close()
@@ -1,71 +1,42 @@
-import zmq
-import threading
-import pyarrow as pa
-import time
 from dora import Node
-import json
+
+from operating_platform.robot.transport import FloatVectorChannel, ImageChannel, Link
+from operating_platform.robot.transport.shm_ring import frame_link_hwm
 
 # IPC Address
 ipc_address = "ipc:///tmp/dr-robot-pika-v1"
+ipc_address_data = "ipc:///tmp/dr-robot-pika-v1-data"
 
-context = zmq.Context()
-socket = context.socket(zmq.PAIR)
-socket.connect(ipc_address)
-socket.setsockopt(zmq.SNDHWM, 2000)
-socket.setsockopt(zmq.SNDBUF, 100 * 1024 * 1024)
-running_server = True
-
-
-# def recv_server():
-#     while running_server:
-#         try:
-#             # 接收 multipart 消息
-#             message_parts = socket.recv_multipart(flags=zmq.NOBLOCK)
-#             if message_parts:
-#                 # 假设接收到的消息是简单的字符串
-#                 message = b'|'.join(message_parts).decode('utf-8')
-#                 print("Received:", message)
-#         except zmq.Again:
-#             time.sleep(0.01)  # 避免忙等
-#         except Exception as e:
-#             print("recv error:", e)
-#             break
+# 通知比帧环的槽位更旧就没有意义了: 每个相机一个帧环，队列长度为槽位数 x 相机数 (环境变量 FRAME_STREAMS)
+image_link = Link(ipc_address, name="Dora ZeroMQ Image", hwm=frame_link_hwm(), sndbuf=100 * 1024 * 1024)
+image_link.add(ImageChannel("image"))
 
+# 其余数据 (位姿、夹爪) 单独一个 socket，图像积压时不会因为队列满被丢弃
+data_link = Link(ipc_address_data, name="Dora ZeroMQ")
+data_link.add(FloatVectorChannel("", name="pika"))
 
 
 if __name__ == "__main__":
 
     node = Node()
-
-    for event in node:
-        if event["type"] == "INPUT":
-            event_id = event["id"]
-            buffer_bytes = event["value"].to_numpy().tobytes()
-            meta_bytes = json.dumps(event["metadata"]).encode('utf-8')
-            # 处理接收到的数据
-            # print(f"Send event: {event_id}")
-            # print(f"Buffer size: {len(buffer_bytes)} bytes")
-
-            try:
-                socket.send_multipart([
-                    event_id.encode('utf-8'),
-                    buffer_bytes,
-                    meta_bytes,
-                ], flags=zmq.NOBLOCK)
-            except zmq.Again:
-                # print("Socket would block, skipping send this frame...")
-                # continue
-                # continue
-                pass
-            # time.sleep(0.001)
-            
-        elif event["type"] == "STOP":
-            break
-    
-    # Close server 
-    running_server = False
-    # server_thread.join()
-
-    # Close zmq
-    socket.close()
-    context.term()
+    image_link.open(receive=False)
+    data_link.open(receive=False)
+
+    try:
+        for event in node:
+            if event["type"] == "INPUT":
+                event_id = event["id"]
+                # 处理接收到的数据
+                # print(f"Send event: {event_id}")
+
+                if "image" in event_id:
+                    image_link.send(event_id, event["value"].to_numpy(zero_copy_only=False), event["metadata"])
+                else:
+                    data_link.send(event_id, event["value"].to_numpy(zero_copy_only=False), event["metadata"])
+
+            elif event["type"] == "STOP":
+                break
+
+    finally:
+        image_link.close()
+        data_link.close()
@@ -17,8 +17,6 @@ from functools import cache
 import threading
 import cv2
 
-import zmq
-
 
 from operating_platform.robot.robots.utils import RobotDeviceNotConnectedError
 from operating_platform.robot.robots.configs import AlohaRobotConfig
@@ -26,158 +24,26 @@ from operating_platform.robot.robots.com_configs.cameras import CameraConfig, Op
 
 from operating_platform.robot.robots.camera import Camera
 from operating_platform.robot.robots.pika_v1.pika_trans_visual_dual import Transformer
+from operating_platform.robot.transport import (
+    FRAME_ID_KEY,
+    FRAME_LATENCY_KEY,
+    FRAME_VALID_KEY,
+    SENSOR_NS_KEY,
+    FloatVectorChannel,
+    ImageChannel,
+    Link,
+    PoseChannel,
+)
+from operating_platform.robot.transport.sync import SYNC_SKEW_KEY, StreamSynchronizer
 
 
 # IPC Address
 pika_ipc_address = "ipc:///tmp/dr-robot-pika-v1"
+pika_data_ipc_address = "ipc:///tmp/dr-robot-pika-v1-data"
 vive_ipc_address = "ipc:///tmp/dr-component-vive"
 gripper_ipc_address = "ipc:///tmp/dr-component-pika-gripper"
 
 
-recv_images = {}
-recv_pose = {}
-recv_rotation = {}
-recv_gripper = {}
-lock = threading.Lock()  # 线程锁
-zmq_context = zmq.Context()
-
-pika_socket = zmq_context.socket(zmq.PAIR)
-pika_socket.bind(pika_ipc_address)
-pika_socket.setsockopt(zmq.RCVTIMEO, 300)
-pika_running_server = True
-
-def pika_recv_server():
-    """接收数据线程"""
-    while pika_running_server:
-        try:
-
-            message_parts = pika_socket.recv_multipart()
-            if len(message_parts) < 2:
-                continue  # 协议错误
-
-            event_id = message_parts[0].decode('utf-8')
-            buffer_bytes = message_parts[1]
-            metadata = json.loads(message_parts[2].decode('utf-8'))
-            
-
-            if 'image' in event_id:
-                # 解码图像
-                img_array = np.frombuffer(buffer_bytes, dtype=np.uint8)
-                encoding = metadata["encoding"].lower()
-                width = metadata["width"]
-                height = metadata["height"]
-
-                if encoding == "bgr8":
-                    channels = 3
-                    frame = (
-                        img_array.reshape((height, width, channels))
-                        .copy()  # Copy So that we can add annotation on the image
-                    )
-                elif encoding == "rgb8":
-                    channels = 3
-                    frame = (img_array.reshape((height, width, channels)))
-                    frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-
-                elif encoding in ["jpeg", "jpg", "jpe", "bmp", "webp", "png"]:
-                    channels = 3
-                    frame = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-                
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                if frame is not None:
-                    with lock:
-                        # print(f"Received event_id = {event_id}")
-                        recv_images[event_id] = frame
-
-            # if 'gripper' in event_id:
-            #     gripper_array = np.frombuffer(buffer_bytes, dtype=np.float32)
-            #     if gripper_array is not None:
-            #         with lock:
-            #             recv_gripper[event_id] = gripper_array
-
-
-        except zmq.Again:
-            print(f"Pika Received Timeout")
-            continue
-        except Exception as e:
-            print("recv error:", e)
-            break
-
-vive_socket = zmq_context.socket(zmq.PAIR)
-vive_socket.bind(vive_ipc_address)
-vive_socket.setsockopt(zmq.RCVTIMEO, 300)
-vive_running_server = True
-
-def vive_recv_server():
-    """接收数据线程"""
-    while vive_running_server:
-        try:
-
-            message_parts = vive_socket.recv_multipart()
-            if len(message_parts) < 2:
-                continue  # 协议错误
-
-            event_id = message_parts[0].decode('utf-8')
-            buffer_bytes = message_parts[1]
-
-            if 'pose' in event_id:
-                pose_array = np.frombuffer(buffer_bytes, dtype=np.float32)
-                if pose_array is not None:
-                    # print(f"Received pose data for event_id: {event_id}")
-                    # print(f"Pose array shape: {pose_array.shape}")
-                    # print(f"Pose array values: {pose_array}")
-                    with lock:
-                        recv_pose[event_id] = pose_array
-                # else:
-                #     print(f"Failed to parse pose data for event_id: {event_id}")
-            
-            if 'rotation' in event_id:
-                rotation_array = np.frombuffer(buffer_bytes, dtype=np.float32)
-                if rotation_array is not None:
-                    with lock:
-                        recv_rotation[event_id] = rotation_array
-
-        except zmq.Again:
-            print(f"VIVE Received Timeout")
-            continue
-        except Exception as e:
-            print("recv error:", e)
-            break
-
-
-gripper_socket = zmq_context.socket(zmq.PAIR)
-gripper_socket.bind(gripper_ipc_address)
-gripper_socket.setsockopt(zmq.RCVTIMEO, 300)
-gripper_running_server = True
-
-def gripper_recv_server():
-    """接收数据线程"""
-    while gripper_running_server:
-        try:
-
-            message_parts = gripper_socket.recv_multipart()
-            if len(message_parts) < 2:
-                continue  # 协议错误
-
-            event_id = message_parts[0].decode('utf-8')
-            buffer_bytes = message_parts[1]
-            metadata = json.loads(message_parts[2].decode('utf-8'))
-            
-            if 'gripper' in event_id:
-                gripper_array = np.frombuffer(buffer_bytes, dtype=np.float32)
-                if gripper_array is not None:
-                    with lock:
-                        recv_gripper[event_id] = gripper_array
-
-        except zmq.Again:
-            print(f"Pika Gripper Received Timeout")
-            continue
-        except Exception as e:
-            print("recv error:", e)
-            break
-
-
-
 
 class OpenCVCamera:
     def __init__(self, config: OpenCVCameraConfig):
@@ -238,14 +104,28 @@ class PikaV1Manipulator:
         
         self.connect_excluded_cameras = ["image_pika_pose"]
 
-        pika_recv_thread = threading.Thread(target=pika_recv_server, daemon=True)
-        pika_recv_thread.start()
+        # socket 在 connect() 中打开; 压缩帧 (ENCODING=jpeg) 在线程池中解码，每个相机一个线程
+        self.pika_link = Link(pika_ipc_address, name="Pika", bind=True, recv_timeout_ms=300)
+        self.recv_images = self.pika_link.add(ImageChannel("image", conflate=True, decode_workers=len(self.cameras)))
+        # 桥接节点转发的非图像数据走单独的 socket，不与图像通知共用发送队列
+        self.pika_data_link = Link(pika_data_ipc_address, name="Pika Data", bind=True, recv_timeout_ms=300)
+        self.recv_pika_data = self.pika_data_link.add(FloatVectorChannel("", name="pika", conflate=True))
+
+        self.vive_link = Link(vive_ipc_address, name="VIVE", bind=True, recv_timeout_ms=300)
+        self.recv_pose = self.vive_link.add(PoseChannel("pose", conflate=True))
+        self.recv_rotation = self.vive_link.add(PoseChannel("rotation", conflate=True))
 
-        vive_recv_thread = threading.Thread(target=vive_recv_server, daemon=True)
-        vive_recv_thread.start()
+        self.gripper_link = Link(gripper_ipc_address, name="Pika Gripper", bind=True, recv_timeout_ms=300)
+        self.recv_gripper = self.gripper_link.add(FloatVectorChannel("gripper", conflate=True))
 
-        gripper_recv_thread = threading.Thread(target=gripper_recv_server, daemon=True)
-        gripper_recv_thread.start()
+        # 上一次组帧时各相机的版本号
+        self.frame_versions = {}
+
+        # 每帧把位姿、夹爪数据对齐到图像的采集时间
+        self.sync = StreamSynchronizer(
+            [f"{name}_{stream}" for name in self.follower_arms for stream in ("pose", "rotation", "gripper")]
+            + [name for name in self.cameras if name not in self.connect_excluded_cameras]
+        )
 
         self.pika_transferorm = Transformer()
         
@@ -300,38 +180,43 @@ class PikaV1Manipulator:
         }
     
     def connect(self):
+        self.pika_link.open()
+        self.pika_data_link.open()
+        self.vive_link.open()
+        self.gripper_link.open()
+
         timeout = 50  # 统一的超时时间（秒）
         start_time = time.perf_counter()
 
         # 定义所有需要等待的条件及其错误信息
         conditions = [
             (
-                lambda: all(name in recv_images for name in self.cameras if name not in self.connect_excluded_cameras),
-                lambda: [name for name in self.cameras if name not in recv_images],
+                lambda: all(name in self.recv_images for name in self.cameras if name not in self.connect_excluded_cameras),
+                lambda: [name for name in self.cameras if name not in self.recv_images],
                 "等待摄像头图像超时"
             ),
             (
                 lambda: all(
-                    any(name in key for key in recv_rotation)
+                    any(name in key for key in self.recv_rotation)
                     for name in self.follower_arms
                 ),
-                lambda: [name for name in self.follower_arms if not any(name in key for key in recv_rotation)],
+                lambda: [name for name in self.follower_arms if not any(name in key for key in self.recv_rotation)],
                 "等待旋转角度数据超时"
             ),
             (
                 lambda: all(
-                    any(name in key for key in recv_pose)
+                    any(name in key for key in self.recv_pose)
                     for name in self.follower_arms
                 ),
-                lambda: [name for name in self.follower_arms if not any(name in key for key in recv_pose)],
+                lambda: [name for name in self.follower_arms if not any(name in key for key in self.recv_pose)],
                 "等待机械臂末端位姿超时"
             ),
             (
                 lambda: all(
-                    any(name in key for key in recv_gripper)
+                    any(name in key for key in self.recv_gripper)
                     for name in self.follower_arms
                 ),
-                lambda: [name for name in self.follower_arms if not any(name in key for key in recv_gripper)],
+                lambda: [name for name in self.follower_arms if not any(name in key for key in self.recv_gripper)],
                 "等待机械臂夹爪超时"
             )
         ]
@@ -394,7 +279,7 @@ class PikaV1Manipulator:
         # 摄像头连接状态
         if conditions[0][0]():
             cam_received = [name for name in self.cameras 
-                        if name in recv_images and name not in self.connect_excluded_cameras]
+                        if name in self.recv_images and name not in self.connect_excluded_cameras]
             success_messages.append(f"摄像头: {', '.join(cam_received)}")
         
         # 机械臂数据状态
@@ -402,7 +287,7 @@ class PikaV1Manipulator:
         for i, data_type in enumerate(arm_data_types, 1):
             if conditions[i][0]():
                 arm_received = [name for name in self.follower_arms 
-                            if any(name in key for key in (recv_rotation, recv_pose, recv_gripper)[i-1])]
+                            if any(name in key for key in (self.recv_rotation, self.recv_pose, self.recv_gripper)[i-1])]
                 success_messages.append(f"{data_type}: {', '.join(arm_received)}")
         
         # 打印成功连接信息
@@ -416,10 +301,10 @@ class PikaV1Manipulator:
         while True:
             follower_pos = {}
             for name in self.follower_arms:
-                for match_name in recv_pose:
+                for match_name in self.recv_pose:
                     if name in match_name:
                         byte_array = np.zeros(3, dtype=np.float32)
-                        pose_read = recv_pose[match_name]
+                        pose_read = self.recv_pose[match_name]
 
                         byte_array[:3] = pose_read[:]
                         byte_array = np.round(byte_array, 3)
@@ -428,10 +313,10 @@ class PikaV1Manipulator:
 
             follower_rotation = {}
             for name in self.follower_arms:
-                for match_name in recv_rotation:
+                for match_name in self.recv_rotation:
                     if name in match_name:
                         byte_array = np.zeros(4, dtype=np.float32)
-                        rotation_read = recv_rotation[match_name]
+                        rotation_read = self.recv_rotation[match_name]
 
                         byte_array[:4] = rotation_read[:]
                         byte_array = np.round(byte_array, 3)
@@ -457,6 +342,29 @@ class PikaV1Manipulator:
         
         self.is_connected = True
     
+    @property
+    def sync_features(self) -> dict:
+        return self.sync.features
+
+    @property
+    def health_features(self) -> dict:
+        return {
+            FRAME_VALID_KEY: {
+                "dtype": "float32",
+                "shape": (len(self.cameras),),
+                "names": list(self.cameras),
+            }
+        }
+
+    @property
+    def frame_features(self) -> dict:
+        names = list(self.cameras)
+        return {
+            FRAME_ID_KEY: {"dtype": "int64", "shape": (len(names),), "names": names},
+            SENSOR_NS_KEY: {"dtype": "int64", "shape": (len(names),), "names": names},
+            FRAME_LATENCY_KEY: {"dtype": "float32", "shape": (len(names),), "names": names},
+        }
+
     @property
     def features(self):
         return {**self.motor_features, **self.camera_features}
@@ -527,14 +435,19 @@ class PikaV1Manipulator:
         if not record_data:
             return
 
+        # 等到每个相机都来了新的一帧再组帧，超时则沿用上一帧 (由 Daemon 计为重复帧)
+        cameras = [name for name in self.cameras if name not in self.connect_excluded_cameras]
+        self.logs["observation_fresh"] = self.recv_images.wait_newer(cameras, self.frame_versions)
+        self.sync.begin(self.recv_images, cameras)
+
         follower_pos = {}
         for name in self.follower_arms:
-            for match_name in recv_pose:
+            for match_name in self.recv_pose:
                 if name in match_name:
                     now = time.perf_counter()
 
                     byte_array = np.zeros(3, dtype=np.float32)
-                    pose_read = recv_pose[match_name]
+                    pose_read = self.sync.interpolate(f"{name}_pose", self.recv_pose, match_name)
 
                     byte_array[:3] = pose_read[:]
                     byte_array = np.round(byte_array, 3)
@@ -545,12 +458,13 @@ class PikaV1Manipulator:
 
         follower_rotation = {}
         for name in self.follower_arms:
-            for match_name in recv_rotation:
+            for match_name in self.recv_rotation:
                 if name in match_name:
                     now = time.perf_counter()
 
                     byte_array = np.zeros(4, dtype=np.float32)
-                    rotation_read = recv_rotation[match_name]
+                    # 四元数不做线性插值，取最近的样本
+                    rotation_read = self.sync.nearest(f"{name}_rotation", self.recv_rotation, match_name)
 
                     byte_array[:4] = rotation_read[:]
                     byte_array = np.round(byte_array, 3)
@@ -571,7 +485,7 @@ class PikaV1Manipulator:
                 try:
                     new_pos, new_rot, *optional = result
                     if optional and optional[0] is not None and "left" in name:
-                        recv_images["image_pika_pose"] = optional[0]
+                        self.recv_images["image_pika_pose"] = optional[0]
                     follower_pos[name] = np.asarray(new_pos, dtype=np.float32).copy()
                     follower_rotation[name] = np.asarray(new_rot, dtype=np.float32).copy()
                 except (TypeError, ValueError) as e:
@@ -584,12 +498,12 @@ class PikaV1Manipulator:
         
         follower_gripper = {}
         for name in self.follower_arms:
-            for match_name in recv_gripper:
+            for match_name in self.recv_gripper:
                 if name in match_name:
                     now = time.perf_counter()
 
                     byte_array = np.zeros(1, dtype=np.float32)
-                    gripper_read = recv_gripper[match_name]
+                    gripper_read = self.sync.interpolate(f"{name}_gripper", self.recv_gripper, match_name)
 
                     byte_array[:1] = gripper_read[:]
                     byte_array = np.round(byte_array, 3)
@@ -623,24 +537,50 @@ class PikaV1Manipulator:
         # Capture images from cameras
         
         images = {}
+        # 每个相机实际选中的那一帧的 metadata (帧号、硬件时间戳、健康状态)；本地生成的 image_pika_pose 没有 metadata
+        frame_metadata = {}
         for name in self.cameras:
             now = time.perf_counter()
             
-            images[name] = recv_images[name]
+            images[name] = self.sync.nearest(name, self.recv_images, name)
+            frame_metadata[name] = self.sync.sample_metadata(name, self.recv_images, name)
 
             # images[name] = self.cameras[name].async_read()
             images[name] = torch.from_numpy(images[name])
             # self.logs[f"read_camera_{name}_dt_s"] = self.cameras[name].logs["delta_timestamp_s"]
             self.logs[f"read_camera_{name}_dt_s"] = time.perf_counter() - now
 
+        # 各数据流的序号、丢帧和延迟统计
+        for link in (self.pika_link, self.pika_data_link, self.vive_link, self.gripper_link):
+            self.logs.update(link.logs())
+        self.logs.update(self.sync.logs())
+
         # Populate output dictionnaries and format to pytorch
         obs_dict, action_dict = {}, {}
         obs_dict["observation.state"] = state
         action_dict["action"] = action
         for name in self.cameras:
             obs_dict[f"observation.images.{name}"] = images[name]
-
-        # obs_dict["observation.images.image_pika_pose"] = torch.from_numpy(recv_images["image_pika_pose"])
+        obs_dict[SYNC_SKEW_KEY] = torch.from_numpy(self.sync.skew_vector())
+        # 相机节点给出的帧健康标记 (没有标记的相机视为有效)
+        obs_dict[FRAME_VALID_KEY] = torch.tensor(
+            [float(frame_metadata[name].get("frame_valid", True)) for name in self.cameras],
+            dtype=torch.float32,
+        )
+        # 相机驱动的帧号和硬件时间戳 (没有时为 -1)，以及组帧时距采集的延迟，供录制后分析丢帧
+        now_ns = time.time_ns()
+        obs_dict[FRAME_ID_KEY] = torch.tensor(
+            [int(frame_metadata[name].get("frame_id", -1)) for name in self.cameras], dtype=torch.int64
+        )
+        obs_dict[SENSOR_NS_KEY] = torch.tensor(
+            [int(frame_metadata[name].get("sensor_ns", -1)) for name in self.cameras], dtype=torch.int64
+        )
+        obs_dict[FRAME_LATENCY_KEY] = torch.tensor(
+            [(now_ns - frame_metadata[name].get("capture_ns", now_ns)) / 1e9 for name in self.cameras],
+            dtype=torch.float32,
+        )
+
+        # obs_dict["observation.images.image_pika_pose"] = torch.from_numpy(self.recv_images["image_pika_pose"])
         
         # print("end teleoperate record")
 
@@ -806,12 +746,10 @@ class PikaV1Manipulator:
         #     self.cameras[name].disconnect()
 
         self.is_connected = False
-        global pika_running_server
-        global vive_running_server
-        global gripper_running_server
-        pika_running_server = False
-        vive_running_server = False
-        gripper_running_server = False
+        self.pika_link.close()
+        self.pika_data_link.close()
+        self.vive_link.close()
+        self.gripper_link.close()
 
         self.pika_transferorm.close()
         
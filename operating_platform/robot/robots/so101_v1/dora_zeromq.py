@@ -1,69 +1,33 @@
-import zmq
-import threading
 import pyarrow as pa
-import time
 from dora import Node
-import numpy as np
 import queue
-import json
+
+from operating_platform.robot.transport import FloatVectorChannel, ImageChannel, Link
+from operating_platform.robot.transport.shm_ring import frame_link_hwm
 
 
 # IPC Address
 ipc_address_image = "ipc:///tmp/dora-zeromq-so101-image"
 ipc_address_joint = "ipc:///tmp/dora-zeromq-so101-joint"
 
-context = zmq.Context()
-
-socket_image = context.socket(zmq.PAIR)
-socket_image.bind(ipc_address_image)
-socket_image.setsockopt(zmq.SNDHWM, 2000)
-socket_image.setsockopt(zmq.SNDBUF, 2**25)
-socket_image.setsockopt(zmq.SNDTIMEO, 2000)
-socket_image.setsockopt(zmq.RCVTIMEO, 2000)
-socket_image.setsockopt(zmq.LINGER, 0)
-
-socket_joint = context.socket(zmq.PAIR)
-socket_joint.bind(ipc_address_joint)
-socket_joint.setsockopt(zmq.SNDHWM, 2000)
-socket_joint.setsockopt(zmq.SNDBUF, 2**25)
-socket_joint.setsockopt(zmq.SNDTIMEO, 2000)
-socket_joint.setsockopt(zmq.RCVTIMEO, 2000)
-socket_joint.setsockopt(zmq.LINGER, 0)
-
-running_server = True
-
 # 创建线程安全队列 (在全局作用域)
 output_queue = queue.Queue()
 
-def recv_server():
-    while running_server:
-        try:
-            message_parts = socket_joint.recv_multipart()
-            if message_parts and len(message_parts) >= 2:
-                event_id = message_parts[0].decode('utf-8')
-                buffer_bytes = message_parts[1]
-                
-                array = np.frombuffer(buffer_bytes, dtype=np.float32).copy()
-
-                if 'action_joint' in event_id:
-                    output_queue.put(("action_joint", array))
-                    
-        except zmq.Again:
-            print(f"Dora ZeroMQ Received Timeout")
-            time.sleep(0.01)
-            continue
-            
-        except Exception as e:
-            print("recv error:", e)
-            break
+# 通知比帧环的槽位更旧就没有意义了: 每个相机一个帧环，队列长度为槽位数 x 相机数 (环境变量 FRAME_STREAMS)
+image_link = Link(ipc_address_image, name="Dora ZeroMQ Image", bind=True, hwm=frame_link_hwm(), sndbuf=2**25)
+image_link.add(ImageChannel("image"))
 
+joint_link = Link(ipc_address_joint, name="Dora ZeroMQ", bind=True, sndbuf=2**25)
+# 仅将数据放入队列，由主线程操作 node (先于 "joint" 匹配)
+joint_link.add(FloatVectorChannel("action_joint", on_message=lambda event_id, array, _: output_queue.put(("action_joint", array.copy()))))
+joint_link.add(FloatVectorChannel("joint"))
 
 
 if __name__ == "__main__":
     node = Node()
 
-    server_thread = threading.Thread(target=recv_server)
-    server_thread.start()
+    image_link.open(receive=False)
+    joint_link.open()
 
     try:
         for event in node:
@@ -78,41 +42,18 @@ if __name__ == "__main__":
 
             if event["type"] == "INPUT":
                 event_id = event["id"]
-                buffer_bytes = event["value"].to_numpy().tobytes()
-                meta_bytes = json.dumps(event["metadata"]).encode('utf-8')
-                            
+
                 # 处理接收到的数据
                 # print(f"Send event: {event_id}")
-                # print(f"Buffer size: {len(buffer_bytes)} bytes")
 
                 if "image" in event_id:
-                    try:
-                        socket_image.send_multipart([
-                            event_id.encode('utf-8'),
-                            buffer_bytes,
-                            meta_bytes,
-                        ], flags=zmq.NOBLOCK)
-                    except zmq.Again:
-                        pass
+                    image_link.send(event_id, event["value"].to_numpy(zero_copy_only=False), event["metadata"])
                 else:
-                    try:
-                        socket_joint.send_multipart([
-                            event_id.encode('utf-8'),
-                            buffer_bytes
-                        ], flags=zmq.NOBLOCK)
-                    except zmq.Again:
-                        pass
-                
+                    joint_link.send(event_id, event["value"].to_numpy(), event["metadata"])
+
             elif event["type"] == "STOP":
                 break
-    
-    finally:
-        # Close server 
-        running_server = False
-        server_thread.join()
 
-        # Close zmq
-        socket_image.close()
-        socket_joint.close()
-
-        context.term()
+    finally:
+        image_link.close()
+        joint_link.close()
@@ -17,116 +17,27 @@ from functools import cache
 import threading
 import cv2
 
-import zmq
-
 from operating_platform.robot.robots.utils import RobotDeviceNotConnectedError
 from operating_platform.robot.robots.configs import SO101RobotConfig
 from operating_platform.robot.robots.com_configs.cameras import CameraConfig, OpenCVCameraConfig
 
 from operating_platform.robot.robots.camera import Camera
 from operating_platform.robot.robots.pika_v1.pika_trans_visual_dual import Transformer
+from operating_platform.robot.transport import (
+    FRAME_ID_KEY,
+    FRAME_LATENCY_KEY,
+    FRAME_VALID_KEY,
+    SENSOR_NS_KEY,
+    FloatVectorChannel,
+    ImageChannel,
+    Link,
+)
+from operating_platform.robot.transport.sync import SYNC_SKEW_KEY, StreamSynchronizer
 
 
 ipc_address_image = "ipc:///tmp/dora-zeromq-so101-image"
 ipc_address_joint = "ipc:///tmp/dora-zeromq-so101-joint"
 
-recv_images = {}
-recv_joint = {}
-lock = threading.Lock()  # 线程锁
-
-running_recv_image_server = True
-running_recv_joint_server = True
-
-zmq_context = zmq.Context()
-
-socket_image = zmq_context.socket(zmq.PAIR)
-socket_image.connect(ipc_address_image)
-socket_image.setsockopt(zmq.RCVTIMEO, 2000)
-
-socket_joint = zmq_context.socket(zmq.PAIR)
-socket_joint.connect(ipc_address_joint)
-socket_joint.setsockopt(zmq.RCVTIMEO, 2000)
-
-def recv_image_server():
-    """接收数据线程"""
-    while running_recv_image_server:
-        try:
-            message_parts = socket_image.recv_multipart()
-            if len(message_parts) < 2:
-                continue  # 协议错误
-
-            event_id = message_parts[0].decode('utf-8')
-            buffer_bytes = message_parts[1]
-            metadata = json.loads(message_parts[2].decode('utf-8'))
-
-            # print(f"Received event_id = {event_id}")
-            # print(f"len(message_parts) = {len(message_parts)}")
-            
-            if 'image' in event_id:
-                # 解码图像
-                img_array = np.frombuffer(buffer_bytes, dtype=np.uint8)
-                encoding = metadata["encoding"].lower()
-                width = metadata["width"]
-                height = metadata["height"]
-
-                if encoding == "bgr8":
-                    channels = 3
-                    frame = (
-                        img_array.reshape((height, width, channels))
-                        .copy()  # Copy So that we can add annotation on the image
-                    )
-                elif encoding == "rgb8":
-                    channels = 3
-                    frame = (img_array.reshape((height, width, channels)))
-                    frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-
-                elif encoding in ["jpeg", "jpg", "jpe", "bmp", "webp", "png"]:
-                    channels = 3
-                    frame = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-                
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                if frame is not None:
-                    with lock:
-                        # print(f"Received event_id = {event_id}")
-                        recv_images[event_id] = frame
-
-        except zmq.Again:
-            print(f"SO101 Image Received Timeout")
-            continue
-        except Exception as e:
-            print("recv image error:", e)
-            break
-
-
-def recv_joint_server():
-    """接收数据线程"""
-    while running_recv_joint_server:
-        try:
-            message_parts = socket_joint.recv_multipart()
-            if len(message_parts) < 2:
-                continue  # 协议错误
-
-            event_id = message_parts[0].decode('utf-8')
-            buffer_bytes = message_parts[1]
-
-            if 'joint' in event_id:
-                joint_array = np.frombuffer(buffer_bytes, dtype=np.float32)
-                if joint_array is not None:
-                    # print(f"Received pose data for event_id: {event_id}")
-                    # print(f"Pose array shape: {pose_array.shape}")
-                    # print(f"Pose array values: {pose_array}")
-                    with lock:
-                        recv_joint[event_id] = joint_array
-
-        except zmq.Again:
-            print(f"SO101 Joint Received Timeout")
-            continue
-        except Exception as e:
-            print("recv joint error:", e)
-            break
-
-
 
 class OpenCVCamera:
     def __init__(self, config: OpenCVCameraConfig):
@@ -192,11 +103,20 @@ class SO101Manipulator:
         
         self.connect_excluded_cameras = ["image_pika_pose"]
 
-        self.recv_image_thread = threading.Thread(target=recv_image_server, daemon=True)
-        self.recv_image_thread.start()
+        # socket 在 connect() 中打开; 压缩帧 (ENCODING=jpeg) 在线程池中解码，每个相机一个线程
+        self.image_link = Link(ipc_address_image, name="SO101 Image")
+        self.recv_images = self.image_link.add(ImageChannel("image", conflate=True, decode_workers=len(self.cameras)))
+
+        self.joint_link = Link(ipc_address_joint, name="SO101 Joint")
+        self.recv_joint = self.joint_link.add(FloatVectorChannel("joint", conflate=True))
 
-        self.recv_joint_thread = threading.Thread(target=recv_joint_server, daemon=True)
-        self.recv_joint_thread.start()
+        # 上一次组帧时各相机的版本号
+        self.frame_versions = {}
+
+        # 每帧把关节数据对齐到图像的采集时间
+        self.sync = StreamSynchronizer(
+            [*self.follower_arms, *self.leader_arms, *[name for name in self.cameras if name not in self.connect_excluded_cameras]]
+        )
 
         
         self.is_connected = False
@@ -249,30 +169,33 @@ class SO101Manipulator:
         }
     
     def connect(self):
+        self.image_link.open()
+        self.joint_link.open()
+
         timeout = 50  # 统一的超时时间（秒）
         start_time = time.perf_counter()
 
         # 定义所有需要等待的条件及其错误信息
         conditions = [
             (
-                lambda: all(name in recv_images for name in self.cameras if name not in self.connect_excluded_cameras),
-                lambda: [name for name in self.cameras if name not in recv_images],
+                lambda: all(name in self.recv_images for name in self.cameras if name not in self.connect_excluded_cameras),
+                lambda: [name for name in self.cameras if name not in self.recv_images],
                 "等待摄像头图像超时"
             ),
             (
                 lambda: all(
-                    any(name in key for key in recv_joint)
+                    any(name in key for key in self.recv_joint)
                     for name in self.leader_arms
                 ),
-                lambda: [name for name in self.leader_arms if not any(name in key for key in recv_joint)],
+                lambda: [name for name in self.leader_arms if not any(name in key for key in self.recv_joint)],
                 "等待主臂关节角度超时"
             ),
             (
                 lambda: all(
-                    any(name in key for key in recv_joint)
+                    any(name in key for key in self.recv_joint)
                     for name in self.follower_arms
                 ),
-                lambda: [name for name in self.follower_arms if not any(name in key for key in recv_joint)],
+                lambda: [name for name in self.follower_arms if not any(name in key for key in self.recv_joint)],
                 "等待从臂关节角度超时"
             ),
         ]
@@ -335,7 +258,7 @@ class SO101Manipulator:
         # 摄像头连接状态
         if conditions[0][0]():
             cam_received = [name for name in self.cameras 
-                        if name in recv_images and name not in self.connect_excluded_cameras]
+                        if name in self.recv_images and name not in self.connect_excluded_cameras]
             success_messages.append(f"摄像头: {', '.join(cam_received)}")
 
         # 主臂数据状态
@@ -343,7 +266,7 @@ class SO101Manipulator:
         for i, data_type in enumerate(arm_data_types, 1):
             if conditions[i][0]():
                 arm_received = [name for name in self.leader_arms 
-                            if any(name in key for key in (recv_joint,)[i-1])]
+                            if any(name in key for key in (self.recv_joint,)[i-1])]
                 success_messages.append(f"{data_type}: {', '.join(arm_received)}")
         
         # 从臂数据状态
@@ -351,7 +274,7 @@ class SO101Manipulator:
         for i, data_type in enumerate(arm_data_types, 1):
             if conditions[i][0]():
                 arm_received = [name for name in self.follower_arms 
-                            if any(name in key for key in (recv_joint,)[i-1])]
+                            if any(name in key for key in (self.recv_joint,)[i-1])]
                 success_messages.append(f"{data_type}: {', '.join(arm_received)}")
         
         # 打印成功连接信息
@@ -363,6 +286,29 @@ class SO101Manipulator:
 
         self.is_connected = True
     
+    @property
+    def sync_features(self) -> dict:
+        return self.sync.features
+
+    @property
+    def health_features(self) -> dict:
+        return {
+            FRAME_VALID_KEY: {
+                "dtype": "float32",
+                "shape": (len(self.cameras),),
+                "names": list(self.cameras),
+            }
+        }
+
+    @property
+    def frame_features(self) -> dict:
+        names = list(self.cameras)
+        return {
+            FRAME_ID_KEY: {"dtype": "int64", "shape": (len(names),), "names": names},
+            SENSOR_NS_KEY: {"dtype": "int64", "shape": (len(names),), "names": names},
+            FRAME_LATENCY_KEY: {"dtype": "float32", "shape": (len(names),), "names": names},
+        }
+
     @property
     def features(self):
         return {**self.motor_features, **self.camera_features}
@@ -387,14 +333,19 @@ class SO101Manipulator:
         if not record_data:
             return
 
+        # 等到每个相机都来了新的一帧再组帧，超时则沿用上一帧 (由 Daemon 计为重复帧)
+        cameras = [name for name in self.cameras if name not in self.connect_excluded_cameras]
+        self.logs["observation_fresh"] = self.recv_images.wait_newer(cameras, self.frame_versions)
+        self.sync.begin(self.recv_images, cameras)
+
         follower_joint = {}
         for name in self.follower_arms:
-            for match_name in recv_joint:
+            for match_name in self.recv_joint:
                 if name in match_name:
                     now = time.perf_counter()
 
                     byte_array = np.zeros(6, dtype=np.float32)
-                    pose_read = recv_joint[match_name]
+                    pose_read = self.sync.interpolate(name, self.recv_joint, match_name)
 
                     byte_array[:6] = pose_read[:]
                     byte_array = np.round(byte_array, 3)
@@ -405,12 +356,12 @@ class SO101Manipulator:
                     
         leader_joint = {}
         for name in self.leader_arms:
-            for match_name in recv_joint:
+            for match_name in self.recv_joint:
                 if name in match_name:
                     now = time.perf_counter()
 
                     byte_array = np.zeros(6, dtype=np.float32)
-                    pose_read = recv_joint[match_name]
+                    pose_read = self.sync.interpolate(name, self.recv_joint, match_name)
 
                     byte_array[:6] = pose_read[:]
                     byte_array = np.round(byte_array, 3)
@@ -435,18 +386,44 @@ class SO101Manipulator:
 
         # Capture images from cameras
         images = {}
+        # 每个相机实际选中的那一帧的 metadata (帧号、硬件时间戳、健康状态)
+        frame_metadata = {}
         for name in self.cameras:
             now = time.perf_counter()
-            images[name] = recv_images[name]
+            images[name] = self.sync.nearest(name, self.recv_images, name)
+            frame_metadata[name] = self.sync.sample_metadata(name, self.recv_images, name)
             images[name] = torch.from_numpy(images[name])
             self.logs[f"read_camera_{name}_dt_s"] = time.perf_counter() - now
 
+        # 各数据流的序号、丢帧和延迟统计
+        for link in (self.image_link, self.joint_link):
+            self.logs.update(link.logs())
+        self.logs.update(self.sync.logs())
+
         # Populate output dictionnaries and format to pytorch
         obs_dict, action_dict = {}, {}
         obs_dict["observation.state"] = state
         action_dict["action"] = action
         for name in self.cameras:
             obs_dict[f"observation.images.{name}"] = images[name]
+        obs_dict[SYNC_SKEW_KEY] = torch.from_numpy(self.sync.skew_vector())
+        # 相机节点给出的帧健康标记 (没有标记的相机视为有效)
+        obs_dict[FRAME_VALID_KEY] = torch.tensor(
+            [float(frame_metadata[name].get("frame_valid", True)) for name in self.cameras],
+            dtype=torch.float32,
+        )
+        # 相机驱动的帧号和硬件时间戳 (没有时为 -1)，以及组帧时距采集的延迟，供录制后分析丢帧
+        now_ns = time.time_ns()
+        obs_dict[FRAME_ID_KEY] = torch.tensor(
+            [int(frame_metadata[name].get("frame_id", -1)) for name in self.cameras], dtype=torch.int64
+        )
+        obs_dict[SENSOR_NS_KEY] = torch.tensor(
+            [int(frame_metadata[name].get("sensor_ns", -1)) for name in self.cameras], dtype=torch.int64
+        )
+        obs_dict[FRAME_LATENCY_KEY] = torch.tensor(
+            [(now_ns - frame_metadata[name].get("capture_ns", now_ns)) / 1e9 for name in self.cameras],
+            dtype=torch.float32,
+        )
 
         # print("end teleoperate record")
         return obs_dict, action_dict
@@ -601,13 +578,8 @@ class SO101Manipulator:
             )
 
         self.is_connected = False
-        global running_recv_image_server
-        global running_recv_joint_server
-        running_recv_image_server = False
-        running_recv_joint_server = False
-
-        self.recv_image_thread.join()
-        self.recv_joint_thread.join()
+        self.image_link.close()
+        self.joint_link.close()
         
 
     def __del__(self):
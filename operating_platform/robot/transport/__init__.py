@@ -0,0 +1,21 @@
+from operating_platform.robot.transport.channel import (
+    BUNDLE_EVENT,
+    FRAME_ID_KEY,
+    FRAME_LATENCY_KEY,
+    FRAME_VALID_KEY,
+    SENSOR_NS_KEY,
+    Channel,
+    ChannelStats,
+    FloatVectorChannel,
+    ImageChannel,
+    Link,
+    PoseChannel,
+    StreamStats,
+    invalid_streams,
+    stream_ages,
+    stream_metrics,
+)
+from operating_platform.robot.transport.bundle import Bundler
+from operating_platform.robot.transport.sender import ActionSender, ActionSenderStats
+from operating_platform.robot.transport.shm_ring import FrameRingReader, FrameRingWriter
+from operating_platform.robot.transport.sync import SYNC_SKEW_KEY, StreamSynchronizer
@@ -0,0 +1,63 @@
+"""
+桥接节点侧的按 tick 打包。
+
+开启后 (桥接节点环境变量 BUNDLE=1)，桥接节点不再逐条转发，而是先收集，一个 tick 结束时把这段时间的数据打成
+一条 multipart 消息发给机械臂进程 (格式见 channel.BUNDLE_EVENT)。机械臂进程的接收线程一次处理完整个 tick:
+- 图像、预览和深度图每个相机只保留最新一帧 (帧在打包时才写入共享内存帧环);
+- 其余数据 (关节、位姿、夹爪) 保留这段时间的全部样本，机械臂端的 StreamSynchronizer 仍然可以插值。
+
+tick 的结束由触发输入决定: `trigger` 中的每个输入都来过新数据后发送。默认触发输入是所有图像输入。
+"""
+
+from collections import deque
+from typing import Any
+
+from operating_platform.robot.transport.channel import Link
+
+
+# 每个非图像输入在一个 tick 内最多保留的样本数，相机中断时包不会无限增长
+MAX_SAMPLES_PER_TICK = 32
+# event_id 中含有这些子串的输入按帧处理 (只保留最新一帧)
+FRAME_STREAMS = ("image", "depth", "preview")
+
+
+class Bundler:
+    def __init__(self, link: Link, trigger: list[str] | None = None):
+        self.link = link
+        self.trigger = set(trigger or [])
+        # 未指定触发输入时，把见过的图像输入都当作触发输入
+        self.auto_trigger = not self.trigger
+        self.images: dict[str, tuple[Any, dict]] = {}
+        self.samples: dict[str, deque] = {}
+        self.updated: set[str] = set()
+        self.sent = 0
+        self.dropped = 0
+
+    def add(self, event_id: str, value, metadata: dict) -> bool:
+        """Adds one input. Returns True if it completed the tick and the bundle was sent."""
+        if any(stream in event_id for stream in FRAME_STREAMS):
+            self.images[event_id] = (value, metadata)
+            if self.auto_trigger:
+                self.trigger.add(event_id)
+        else:
+            samples = self.samples.get(event_id)
+            if samples is None:
+                samples = self.samples[event_id] = deque(maxlen=MAX_SAMPLES_PER_TICK)
+            samples.append((value, metadata))
+        self.updated.add(event_id)
+
+        if self.trigger and self.trigger <= self.updated:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        items = [(event_id, value, metadata) for event_id, samples in self.samples.items() for value, metadata in samples]
+        items += [(event_id, value, metadata) for event_id, (value, metadata) in self.images.items()]
+        if self.link.send_bundle(items):
+            self.sent += 1
+        else:
+            self.dropped += 1
+        self.images = {}
+        self.samples = {}
+        self.updated = set()
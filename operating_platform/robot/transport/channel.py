@@ -0,0 +1,719 @@
+"""
+ZeroMQ 桥接的统一实现，机械臂进程和 dora 桥接节点 (dora_zeromq.py) 共用。
+
+一个 `Link` 对应一个 PAIR socket，socket 上可以跑多个有类型的 `Channel`，按 event_id 中的子串路由:
+
+    link = Link("ipc:///tmp/dora-zeromq-so101-image", name="SO101 Image")
+    recv_images = link.add(ImageChannel("image"))
+    link.open()                      # 在 connect() 里调用，导入模块时不再创建 socket
+    frame = recv_images["image_top"] # 每个 event_id 只保留最新值
+
+消息格式统一为 multipart [event_id, payload, metadata_json]，收发都使用 copy=False (零拷贝)。
+图像 payload 为空，帧本身放在共享内存帧环里 (见 shm_ring.py)，metadata["shm"] 描述槽位。
+
+发送端给每条消息附加按 event_id 递增的序号 metadata["seq"] 和采集时间戳 metadata["capture_ns"]。
+conflate=True 的通道 (传感器数据) 只保留最新值: 接收线程每次把 socket 中积压的消息全部取出，
+每个 event_id 只解码最新的一条，旧消息直接丢弃，延迟不会随积压增长。
+ZMQ_CONFLATE 不支持 multipart 消息，所以在接收端实现等价的单槽位语义。
+丢弃数由序号的间隔得到 (包括发送端 zmq.Again、接收端被覆盖、解码失败)。
+接收线程同时更新每路数据的到达频率 (EWMA)、到达间隔抖动直方图、距上次更新的时间和中断次数，
+都以 recv_{event_id}_* 的形式出现在 Link.logs() 中。
+相机节点在 metadata 中给出帧健康状态 (frame_valid / frame_status，见 components/camera_health.py)，
+最新状态和无效帧数也一并统计。
+"""
+
+import bisect
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import MutableMapping
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable
+
+import numpy as np
+import zmq
+
+from operating_platform.robot.transport.shm_ring import FrameRingReader, FrameRingWriter
+
+
+DEFAULT_HWM = 2000
+DEFAULT_RECV_TIMEOUT_MS = 2000
+# 单次从 socket 中最多取出的积压消息数
+MAX_DRAIN = 1000
+# 到达频率 EWMA 的平滑系数
+RATE_EWMA_ALPHA = 0.1
+# 到达间隔抖动 (与平均间隔之差的绝对值，ms) 直方图的桶上界，最后一个桶为 "更大"
+JITTER_BUCKETS_MS = (1, 2, 5, 10, 20, 50)
+# 超过 STALL_PERIODS 个平均间隔 (且不少于 MIN_STALL_S) 没有新数据即视为中断
+STALL_PERIODS = 3
+MIN_STALL_S = 0.1
+# 一次发送多路数据的打包消息: [BUNDLE_EVENT, header_json, payload_0, payload_1, ...]，
+# header 为 [{"event_id": ..., "metadata": ...}, ...]，与后面的 payload 一一对应 (见 bundle.py)
+BUNDLE_EVENT = "__bundle__"
+# 等待一组新数据的默认超时 (秒)，超时后用已有的最新值组帧
+DEFAULT_WAIT_TIMEOUT_S = 0.5
+
+
+@dataclass
+class ChannelStats:
+    # 成功发送的消息数
+    sent: int = 0
+    # 发送队列已满 (zmq.Again) 被丢弃的消息数
+    send_dropped: int = 0
+    # 收到并解码成功的消息数
+    received: int = 0
+    # 收到但无法使用的消息数 (解码失败、共享内存槽位已被覆盖、长度不符)
+    recv_dropped: int = 0
+    # conflate 通道中被更新的消息覆盖、未解码的消息数
+    superseded: int = 0
+
+
+@dataclass
+class StreamStats:
+    """
+    Receiving-side counters of one event_id, derived from the sender's sequence numbers and the arrival times.
+    Only the link's receive thread (or a decode worker, one at a time per event_id) writes them, readers just
+    read the attributes without locking.
+    """
+
+    first_seq: int = 0
+    last_seq: int = 0
+    delivered: int = 0
+    # 最近一次交付的采集时间戳 (ns, time.time_ns())
+    capture_ns: int = 0
+    # 交付时 (now - capture_ns) 的最大值
+    max_staleness_s: float = 0.0
+    # 最近一次交付的时间 (ns, time.time_ns())
+    arrival_ns: int = 0
+    # 到达频率与到达间隔的 EWMA
+    rate_hz: float = 0.0
+    interval_s: float = 0.0
+    jitter_hist: list[int] = field(default_factory=lambda: [0] * (len(JITTER_BUCKETS_MS) + 1))
+    # 到达间隔超过中断阈值的次数
+    stalls: int = 0
+    # 最近一次交付的帧健康状态 (发送端没有给出时为空) 和 frame_valid 为 False 的交付数
+    frame_status: str = ""
+    invalid: int = 0
+
+    @property
+    def produced(self) -> int:
+        return self.last_seq - self.first_seq + 1 if self.last_seq else 0
+
+    @property
+    def dropped(self) -> int:
+        return self.produced - self.delivered
+
+    @property
+    def stall_s(self) -> float:
+        return max(STALL_PERIODS * self.interval_s, MIN_STALL_S)
+
+    def age_s(self, now_ns: int | None = None) -> float:
+        """Seconds since the last delivery (inf before the first one)."""
+        if not self.arrival_ns:
+            return float("inf")
+        return ((now_ns or time.time_ns()) - self.arrival_ns) / 1e9
+
+    def stalled(self, now_ns: int | None = None) -> bool:
+        return self.age_s(now_ns) > self.stall_s
+
+    def observe(self, seq: int | None) -> None:
+        if seq is None:  # sender without sequence numbers
+            seq = self.last_seq + 1
+        if self.last_seq == 0 or seq <= self.last_seq:
+            # first message, or the sender restarted
+            self.first_seq, self.delivered, self.max_staleness_s = seq, 0, 0.0
+        self.last_seq = seq
+
+    def deliver(self, capture_ns: int | None, metadata: dict | None = None) -> None:
+        now = time.time_ns()
+        self.delivered += 1
+        if metadata is not None and "frame_status" in metadata:
+            self.frame_status = metadata["frame_status"]
+            if not metadata.get("frame_valid", True):
+                self.invalid += 1
+        if capture_ns:
+            self.capture_ns = capture_ns
+            self.max_staleness_s = max(self.max_staleness_s, (now - capture_ns) / 1e9)
+
+        if self.arrival_ns:
+            dt_s = (now - self.arrival_ns) / 1e9
+            if dt_s > self.stall_s:
+                self.stalls += 1
+            if self.interval_s:
+                jitter_ms = abs(dt_s - self.interval_s) * 1000
+                self.jitter_hist[bisect.bisect_left(JITTER_BUCKETS_MS, jitter_ms)] += 1
+                self.interval_s += RATE_EWMA_ALPHA * (dt_s - self.interval_s)
+            else:
+                self.interval_s = dt_s
+            self.rate_hz = 1 / self.interval_s if self.interval_s > 0 else 0.0
+        self.arrival_ns = now
+
+
+class Channel(MutableMapping):
+    """
+    A typed stream on a `Link`. Messages whose event_id contains every substring in `match` are routed to it.
+    The channel behaves like a read-mostly dict of the latest decoded value per event_id, so existing code
+    that indexed the old module-global `recv_*` dicts keeps working.
+
+    With `conflate=True` only the newest pending message of every event_id is decoded, older ones are counted
+    as superseded. Leave it off for channels where every message matters (e.g. forwarded actions).
+
+    The last `history_len` delivered values are also kept per event_id together with their capture time (and
+    their metadata, see `metadata_at`), for `StreamSynchronizer` (see sync.py).
+
+    Every delivery bumps the event_id's version and wakes up `wait_newer`, so consumers can block until a new
+    set of values is available instead of polling.
+    """
+
+    kind = "raw"
+    history_len = 1
+
+    def __init__(
+        self,
+        match: str | tuple[str, ...],
+        on_message: Callable[[str, Any, dict], None] | None = None,
+        name: str | None = None,
+        conflate: bool = False,
+        history_len: int | None = None,
+    ):
+        self.match = (match,) if isinstance(match, str) else tuple(match)
+        self.on_message = on_message
+        self.name = name or "_".join(self.match)
+        self.conflate = conflate
+        if history_len is not None:
+            self.history_len = history_len
+        self.values: dict[str, Any] = {}
+        # 每个 event_id 最近的 (capture_ns, value)，按时间先后排列
+        self.history: dict[str, deque] = {}
+        # 与 history 一一对应的 metadata，用来取回同步器实际选中的那一帧的帧号、时间戳和健康状态
+        self.history_metadata: dict[str, deque] = {}
+        self.metadata: dict[str, dict] = {}
+        self.lock = threading.Lock()
+        # 每次交付时通知等待新数据的线程
+        self.updated = threading.Condition(self.lock)
+        self.versions: dict[str, int] = {}
+        self.stats = ChannelStats()
+        # 发送端: 每个 event_id 的下一个序号; 接收端: 每个 event_id 的统计
+        self.seqs: dict[str, int] = {}
+        self.streams: dict[str, StreamStats] = {}
+
+    def matches(self, event_id: str) -> bool:
+        return all(m in event_id for m in self.match)
+
+    def encode(self, event_id: str, value, metadata: dict) -> tuple[Any, dict]:
+        """Returns the payload frame (any buffer) and the metadata to send along."""
+        return value, metadata
+
+    def decode(self, event_id: str, payload: memoryview, metadata: dict):
+        """Returns the decoded value, or None to drop the message."""
+        return bytes(payload)
+
+    def stamp(self, event_id: str, metadata: dict) -> dict:
+        """Attaches the sequence number and capture timestamp to an outgoing message."""
+        seq = self.seqs.get(event_id, 0) + 1
+        self.seqs[event_id] = seq
+        metadata = dict(metadata)
+        metadata["seq"] = seq
+        metadata.setdefault("capture_ns", time.time_ns())
+        return metadata
+
+    def stream(self, event_id: str) -> StreamStats:
+        stream = self.streams.get(event_id)
+        if stream is None:
+            stream = self.streams[event_id] = StreamStats()
+        return stream
+
+    def skip(self, event_id: str, metadata: dict):
+        self.stream(event_id).observe(metadata.get("seq"))
+        self.stats.superseded += 1
+
+    def deliver(self, event_id: str, payload: memoryview, metadata: dict):
+        self.stream(event_id).observe(metadata.get("seq"))
+        value = self.decode(event_id, payload, metadata)
+        if value is None:
+            self.stats.recv_dropped += 1
+            return
+        self.store(event_id, value, metadata)
+
+    def store(self, event_id: str, value, metadata: dict):
+        """Publishes a decoded value as the latest one of `event_id`."""
+        # 发送端没有采集时间戳时用到达时间代替
+        capture_ns = metadata.setdefault("capture_ns", time.time_ns())
+        with self.lock:
+            self.values[event_id] = value
+            self.metadata[event_id] = metadata
+            history = self.history.get(event_id)
+            if history is None:
+                history = self.history[event_id] = deque(maxlen=self.history_len)
+                self.history_metadata[event_id] = deque(maxlen=self.history_len)
+            history.append((capture_ns, value))
+            self.history_metadata[event_id].append(metadata)
+            self.versions[event_id] = self.versions.get(event_id, 0) + 1
+            self.stats.received += 1
+            self.updated.notify_all()
+        # 统计只由接收线程 (或该 event_id 当前的解码线程) 写入，不必持锁，免得阻塞 wait_newer / samples 的读者
+        self.stream(event_id).deliver(capture_ns, metadata)
+        if self.on_message is not None:
+            self.on_message(event_id, value, metadata)
+
+    def wait_newer(
+        self, event_ids: list[str], seen: dict[str, int], timeout: float | None = DEFAULT_WAIT_TIMEOUT_S
+    ) -> bool:
+        """
+        Blocks until every event_id in `event_ids` delivered a value newer than the version recorded in `seen`,
+        then records the current versions in `seen`. Returns False if `timeout` expired first.
+        """
+        with self.updated:
+            fresh = self.updated.wait_for(
+                lambda: all(self.versions.get(event_id, 0) > seen.get(event_id, 0) for event_id in event_ids),
+                timeout,
+            )
+            for event_id in event_ids:
+                seen[event_id] = self.versions.get(event_id, 0)
+        return fresh
+
+    def samples(self, event_id: str) -> list[tuple[int, Any]]:
+        """Snapshot of the recent (capture_ns, value) samples of one event_id, oldest first."""
+        with self.lock:
+            return list(self.history.get(event_id, ()))
+
+    def metadata_at(self, event_id: str, capture_ns: int | None) -> dict:
+        """Metadata of the kept sample of `event_id` captured at `capture_ns`, the latest metadata if there is none."""
+        with self.lock:
+            if capture_ns is not None:
+                for metadata in reversed(self.history_metadata.get(event_id, ())):
+                    if metadata.get("capture_ns") == capture_ns:
+                        return metadata
+            return self.metadata.get(event_id, {})
+
+    def close(self):
+        pass
+
+    # MutableMapping interface over the latest values
+    def __getitem__(self, event_id: str):
+        return self.values[event_id]
+
+    def __setitem__(self, event_id: str, value):
+        with self.lock:
+            self.values[event_id] = value
+
+    def __delitem__(self, event_id: str):
+        with self.lock:
+            del self.values[event_id]
+
+    def __iter__(self):
+        # iterate over a snapshot, the receive thread may add keys meanwhile
+        return iter(list(self.values))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class FloatVectorChannel(Channel):
+    """float32 vectors (joint angles, gripper, ...). Decoded arrays are read-only views on the received frame."""
+
+    kind = "float_vector"
+    dtype = np.float32
+    # 关节等数据频率远高于相机，保留足够覆盖相机间隔的样本用于插值
+    history_len = 32
+
+    def encode(self, event_id: str, value, metadata: dict) -> tuple[Any, dict]:
+        return np.ascontiguousarray(value, dtype=self.dtype), metadata
+
+    def decode(self, event_id: str, payload: memoryview, metadata: dict):
+        if len(payload) % np.dtype(self.dtype).itemsize != 0:
+            return None
+        return np.frombuffer(payload, dtype=self.dtype)
+
+
+class PoseChannel(FloatVectorChannel):
+    """Poses (position, quaternion, end pose). `size` optionally enforces the vector length."""
+
+    kind = "pose"
+
+    def __init__(self, match: str | tuple[str, ...], size: int | None = None, **kwargs):
+        super().__init__(match, **kwargs)
+        self.size = size
+
+    def decode(self, event_id: str, payload: memoryview, metadata: dict):
+        array = super().decode(event_id, payload, metadata)
+        if array is None or (self.size is not None and array.shape[0] != self.size):
+            return None
+        return array
+
+
+class ImageChannel(Channel):
+    """
+    Camera frames. The sending side writes every frame once into a per-event shared-memory ring and only sends
+    the slot descriptor, the receiving side decodes straight from the ring into an RGB array.
+
+    With `decode_workers > 0`, compressed frames (jpeg, ...) are decoded on a thread pool instead of the link's
+    receive thread: the receive thread only copies the compressed bytes out of the slot, cv2.imdecode releases
+    the GIL so cameras decode in parallel. Each camera has at most one frame being decoded and one waiting;
+    a newer frame replaces the waiting one, so a slow decoder drops frames instead of building up latency.
+    """
+
+    kind = "image"
+    history_len = 4
+
+    def __init__(
+        self,
+        match: str | tuple[str, ...],
+        default_encoding: str | None = None,
+        decode_workers: int = 0,
+        **kwargs,
+    ):
+        super().__init__(match, **kwargs)
+        self.default_encoding = default_encoding
+        self.rings: dict[str, FrameRingWriter] = {}
+        self.ring_reader = FrameRingReader()
+        self.decode_pool = (
+            ThreadPoolExecutor(decode_workers, thread_name_prefix=f"decode-{self.name}") if decode_workers > 0 else None
+        )
+        # 解码中的 event_id，以及每个 event_id 排队等待解码的最新一帧
+        self.decoding: set[str] = set()
+        self.pending: dict[str, tuple[np.ndarray, dict]] = {}
+
+    def encode(self, event_id: str, value, metadata: dict) -> tuple[Any, dict]:
+        ring = self.rings.get(event_id)
+        if ring is None:
+            ring = self.rings[event_id] = FrameRingWriter(event_id)
+        metadata = dict(metadata)
+        metadata["shm"] = ring.write(value, metadata["capture_ns"])
+        return b"", metadata
+
+    def decode(self, event_id: str, payload: memoryview, metadata: dict):
+        # cv2 is only needed on the receiving side, the bridge nodes may run without it
+        from operating_platform.robot.transport.codec import recv_image
+
+        if self.default_encoding is not None:
+            metadata.setdefault("encoding", self.default_encoding)
+        return recv_image(self.ring_reader, payload, metadata)
+
+    def deliver(self, event_id: str, payload: memoryview, metadata: dict):
+        from operating_platform.robot.transport.codec import is_encoded, recv_encoded
+
+        if self.default_encoding is not None:
+            metadata.setdefault("encoding", self.default_encoding)
+        if self.decode_pool is None or not is_encoded(metadata):
+            return super().deliver(event_id, payload, metadata)
+
+        self.stream(event_id).observe(metadata.get("seq"))
+        # 槽位可能在解码前被覆盖，先把压缩数据拷出来 (只有几百 KB)
+        buffer = recv_encoded(self.ring_reader, payload, metadata)
+        if buffer is None:
+            self.stats.recv_dropped += 1
+            return
+        with self.lock:
+            if event_id in self.decoding:
+                if event_id in self.pending:
+                    self.stats.superseded += 1
+                self.pending[event_id] = (buffer, metadata)
+                return
+            self.decoding.add(event_id)
+        self.decode_pool.submit(self._decode_loop, event_id, buffer, metadata)
+
+    def _decode_loop(self, event_id: str, buffer: np.ndarray, metadata: dict):
+        from operating_platform.robot.transport.codec import decode_image
+
+        while True:
+            try:
+                frame = decode_image(buffer, metadata)
+            except Exception as e:
+                frame = None
+                print(f"{self.name} decode error on '{event_id}':", e)
+            if frame is None:
+                self.stats.recv_dropped += 1
+            else:
+                self.store(event_id, frame, metadata)
+
+            with self.lock:
+                if event_id not in self.pending:
+                    self.decoding.discard(event_id)
+                    return
+                buffer, metadata = self.pending.pop(event_id)
+
+    def close(self):
+        if self.decode_pool is not None:
+            self.decode_pool.shutdown(wait=True, cancel_futures=True)
+        for ring in self.rings.values():
+            ring.close()
+        self.rings = {}
+        self.ring_reader.close()
+
+
+# Link.logs() 中每路接收数据的指标名，较长的在前 (max_staleness_s 也以 _staleness_s 结尾)
+RECV_METRICS = (
+    "max_staleness_s",
+    "staleness_s",
+    "produced",
+    "delivered",
+    "dropped",
+    "rate_hz",
+    "jitter_hist",
+    "age_s",
+    "stalled",
+    "stalls",
+    "frame_status",
+    "invalid",
+)
+
+
+def stream_metrics(logs: dict) -> dict[str, dict[str, Any]]:
+    """Groups the flat `recv_{event_id}_{metric}` entries of `Link.logs()` output by event_id."""
+    metrics: dict[str, dict[str, Any]] = {}
+    for key, value in list(logs.items()):
+        if not key.startswith("recv_"):
+            continue
+        for metric in RECV_METRICS:
+            if key.endswith(f"_{metric}"):
+                event_id = key[len("recv_") : -len(metric) - 1]
+                metrics.setdefault(event_id, {})[metric] = value
+                break
+    return metrics
+
+
+def stream_ages(logs: dict) -> dict[str, float]:
+    """Last-update age of every received stream, taken from flat `Link.logs()` output."""
+    return {event_id: m["age_s"] for event_id, m in stream_metrics(logs).items() if "age_s" in m}
+
+
+# 每帧各相机图像是否有效 (1/0)，由机械臂写入数据集，录制时可以据此筛掉黑帧、冻结帧等
+FRAME_VALID_KEY = "observation.frame_valid"
+
+
+# 每帧各相机实际使用的那一帧的来源，由机械臂写入数据集，录制后用 dataset/frame_drops.py 分析丢帧:
+# - 相机驱动给出的帧号 (metadata["frame_id"]，没有时为 -1);
+# - 相机硬件时间戳 (metadata["sensor_ns"]，设备自己的时钟域，ns，没有时为 -1);
+# - 组帧时距采集时间的延迟 (秒，time.time_ns() - metadata["capture_ns"])。
+FRAME_ID_KEY = "observation.frame_id"
+SENSOR_NS_KEY = "observation.sensor_ns"
+FRAME_LATENCY_KEY = "observation.frame_latency_s"
+
+
+def invalid_streams(logs: dict) -> dict[str, str]:
+    """Streams whose latest frame was flagged by its camera (black, frozen, ...), with the frame status."""
+    return {
+        event_id: m["frame_status"]
+        for event_id, m in stream_metrics(logs).items()
+        if m.get("frame_status", "ok") not in ("", "ok")
+    }
+
+
+class Link:
+    """One ZeroMQ PAIR socket with its receive thread. The socket only exists between `open()` and `close()`."""
+
+    def __init__(
+        self,
+        address: str,
+        name: str | None = None,
+        bind: bool = False,
+        hwm: int = DEFAULT_HWM,
+        recv_timeout_ms: int = DEFAULT_RECV_TIMEOUT_MS,
+        sndbuf: int | None = None,
+    ):
+        self.address = address
+        self.name = name or address
+        self.bind = bind
+        self.hwm = hwm
+        self.recv_timeout_ms = recv_timeout_ms
+        self.sndbuf = sndbuf
+        self.channels: list[Channel] = []
+        self.socket = None
+        self.running = False
+        self.thread = None
+        self.unrouted = 0
+
+    def add(self, channel: Channel) -> Channel:
+        self.channels.append(channel)
+        return channel
+
+    def route(self, event_id: str) -> Channel | None:
+        for channel in self.channels:
+            if channel.matches(event_id):
+                return channel
+        return None
+
+    @property
+    def is_open(self) -> bool:
+        return self.socket is not None
+
+    def open(self, receive: bool = True):
+        if self.is_open:
+            return
+        socket = zmq.Context.instance().socket(zmq.PAIR)
+        socket.setsockopt(zmq.SNDHWM, self.hwm)
+        socket.setsockopt(zmq.RCVHWM, self.hwm)
+        socket.setsockopt(zmq.RCVTIMEO, self.recv_timeout_ms)
+        socket.setsockopt(zmq.SNDTIMEO, self.recv_timeout_ms)
+        socket.setsockopt(zmq.LINGER, 0)
+        if self.sndbuf is not None:
+            socket.setsockopt(zmq.SNDBUF, self.sndbuf)
+        if self.bind:
+            socket.bind(self.address)
+        else:
+            socket.connect(self.address)
+        self.socket = socket
+
+        if receive:
+            self.running = True
+            self.thread = threading.Thread(target=self._recv_loop, name=f"zmq-{self.name}", daemon=True)
+            self.thread.start()
+
+    def _encode(self, event_id: str, value, metadata: dict | None) -> tuple[Channel, Any, dict]:
+        channel = self.route(event_id)
+        if channel is None:
+            raise ValueError(f"No channel on link '{self.name}' for event '{event_id}'")
+        payload, metadata = channel.encode(event_id, value, channel.stamp(event_id, metadata or {}))
+        return channel, payload, metadata
+
+    def send(self, event_id: str, value, metadata: dict | None = None) -> bool:
+        """Non-blocking send. Returns False (and counts the drop) when the peer's queue is full."""
+        channel, payload, metadata = self._encode(event_id, value, metadata)
+        try:
+            self.socket.send_multipart(
+                [event_id.encode("utf-8"), payload, json.dumps(metadata).encode("utf-8")],
+                flags=zmq.NOBLOCK,
+                copy=False,
+            )
+        except zmq.Again:
+            channel.stats.send_dropped += 1
+            return False
+        channel.stats.sent += 1
+        return True
+
+    def send_bundle(self, items: list[tuple[str, Any, dict | None]]) -> bool:
+        """
+        Sends several (event_id, value, metadata) items as one multipart message. The receiving link delivers
+        them in order within one pass of its receive thread. Non-blocking like `send`.
+        """
+        if not items:
+            return True
+        encoded = [(event_id, *self._encode(event_id, value, metadata)) for event_id, value, metadata in items]
+        header = [{"event_id": event_id, "metadata": metadata} for event_id, _, _, metadata in encoded]
+        try:
+            self.socket.send_multipart(
+                [BUNDLE_EVENT.encode("utf-8"), json.dumps(header).encode("utf-8")]
+                + [payload for _, _, payload, _ in encoded],
+                flags=zmq.NOBLOCK,
+                copy=False,
+            )
+        except zmq.Again:
+            for _, channel, _, _ in encoded:
+                channel.stats.send_dropped += 1
+            return False
+        for _, channel, _, _ in encoded:
+            channel.stats.sent += 1
+        return True
+
+    def _recv_pending(self) -> list:
+        """Blocks for one message, then takes everything else already queued on the socket."""
+        messages = [self.socket.recv_multipart(copy=False)]
+        while len(messages) < MAX_DRAIN:
+            try:
+                messages.append(self.socket.recv_multipart(flags=zmq.NOBLOCK, copy=False))
+            except zmq.Again:
+                break
+        return messages
+
+    def _recv_loop(self):
+        while self.running:
+            try:
+                messages = self._recv_pending()
+            except zmq.Again:
+                print(f"{self.name} Received Timeout")
+                continue
+            except zmq.ZMQError as e:
+                if self.running:
+                    print(f"{self.name} recv error:", e)
+                break
+
+            # (group, event_id, channel, payload, metadata)，一条打包消息中的各部分属于同一个 group
+            parsed = []
+            for group, frames in enumerate(messages):
+                if len(frames) < 2:
+                    continue  # 协议错误
+                event_id = frames[0].bytes.decode("utf-8")
+                if event_id == BUNDLE_EVENT:
+                    parsed.extend(self._parse_bundle(group, frames))
+                    continue
+                channel = self.route(event_id)
+                if channel is None:
+                    self.unrouted += 1
+                    continue
+                try:
+                    metadata = json.loads(frames[2].bytes) if len(frames) > 2 else {}
+                except ValueError:
+                    channel.stats.recv_dropped += 1
+                    continue
+                parsed.append((group, event_id, channel, frames[1], metadata))
+
+            # conflate 通道每个 event_id 只保留最后一条消息 (打包消息则保留最后一包中的全部样本)
+            newest = {event_id: group for group, event_id, channel, _, _ in parsed if channel.conflate}
+            for group, event_id, channel, payload, metadata in parsed:
+                if channel.conflate and newest[event_id] != group:
+                    channel.skip(event_id, metadata)
+                    continue
+                try:
+                    channel.deliver(event_id, payload.buffer, metadata)
+                except Exception as e:
+                    channel.stats.recv_dropped += 1
+                    print(f"{self.name} decode error on '{event_id}':", e)
+
+    def _parse_bundle(self, group: int, frames: list) -> list:
+        try:
+            header = json.loads(frames[1].bytes)
+        except ValueError:
+            self.unrouted += 1
+            return []
+        parts = []
+        for part, payload in zip(header, frames[2:]):
+            channel = self.route(part["event_id"])
+            if channel is None:
+                self.unrouted += 1
+                continue
+            parts.append((group, part["event_id"], channel, payload, part["metadata"]))
+        return parts
+
+    def close(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+        for channel in self.channels:
+            channel.close()
+
+    def stats(self) -> dict[str, dict]:
+        return {f"{self.name}/{channel.name}": asdict(channel.stats) for channel in self.channels}
+
+    def logs(self) -> dict[str, float]:
+        """Per-stream counters in the flat `robot.logs` format."""
+        logs = {}
+        now = time.time_ns()
+        for channel in self.channels:
+            for event_id, stream in list(channel.streams.items()):
+                logs[f"recv_{event_id}_produced"] = stream.produced
+                logs[f"recv_{event_id}_delivered"] = stream.delivered
+                logs[f"recv_{event_id}_dropped"] = stream.dropped
+                logs[f"recv_{event_id}_max_staleness_s"] = stream.max_staleness_s
+                if stream.capture_ns:
+                    logs[f"recv_{event_id}_staleness_s"] = (now - stream.capture_ns) / 1e9
+                logs[f"recv_{event_id}_rate_hz"] = stream.rate_hz
+                logs[f"recv_{event_id}_jitter_hist"] = list(stream.jitter_hist)
+                if stream.arrival_ns:
+                    logs[f"recv_{event_id}_age_s"] = stream.age_s(now)
+                    logs[f"recv_{event_id}_stalled"] = int(stream.stalled(now))
+                logs[f"recv_{event_id}_stalls"] = stream.stalls
+                if stream.frame_status:
+                    logs[f"recv_{event_id}_frame_status"] = stream.frame_status
+                    logs[f"recv_{event_id}_invalid"] = stream.invalid
+            for event_id, seq in list(channel.seqs.items()):
+                logs[f"send_{event_id}_produced"] = seq
+            if channel.seqs:
+                logs[f"send_{channel.name}_dropped"] = channel.stats.send_dropped
+        return logs
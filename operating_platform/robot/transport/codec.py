@@ -0,0 +1,71 @@
+"""
+图像通知的解码: 把桥接节点发来的 (buffer, metadata) 转成 RGB 的 numpy 帧。
+深度图 (encoding 为 mono16 等) 解码为 (H, W, 1) 的 uint16 毫米，不做任何换算。
+预览帧只在显示时解码，直接转成 cv2.imshow 需要的 BGR。
+颜色转换和 JPEG 解码由 components/color_convert.py 规划: JPEG 直接解码成需要的通道顺序，实现选用本机最快的。
+"""
+
+import numpy as np
+
+from operating_platform.robot.components.color_convert import plan
+from operating_platform.robot.transport.shm_ring import FrameRingReader
+
+
+ENCODED_FORMATS = ["jpeg", "jpg", "jpe", "bmp", "webp", "png"]
+DEPTH_ENCODINGS = ["mono16", "16uc1", "z16"]
+
+
+def is_encoded(metadata: dict) -> bool:
+    return metadata.get("encoding", "").lower() in ENCODED_FORMATS
+
+
+def decode_image(buffer: np.ndarray, metadata: dict) -> np.ndarray | None:
+    """
+    Converts one raw image buffer to an RGB frame (or a uint16 depth map for DEPTH_ENCODINGS). Always returns a new array, so `buffer` may be a read-only
+    view on a shared-memory slot.
+    """
+    encoding = metadata["encoding"].lower()
+    if encoding in DEPTH_ENCODINGS:
+        depth = buffer.view(np.uint16) if buffer.dtype == np.uint8 else buffer
+        return depth.reshape((metadata["height"], metadata["width"], 1)).copy()
+
+    if encoding == "rgb8":
+        return buffer.reshape((metadata["height"], metadata["width"], 3)).copy()
+    return _convert(buffer, encoding, "rgb8", metadata)
+
+
+def _convert(buffer: np.ndarray, encoding: str, target: str, metadata: dict) -> np.ndarray | None:
+    try:
+        path = plan(encoding, target)
+    except ValueError:
+        return None
+    return path(buffer, metadata.get("width"), metadata.get("height"))
+
+
+def decode_preview(data: bytes, metadata: dict) -> np.ndarray | None:
+    """Decodes a preview frame (inline bytes, see camera_preprocess.send_preview) to BGR for display."""
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    return _convert(buffer, metadata.get("encoding", "jpeg").lower(), "bgr8", metadata)
+
+
+def recv_image(reader: FrameRingReader, buffer_bytes: bytes, metadata: dict) -> np.ndarray | None:
+    """
+    Decodes an image message: reads the frame from the shared-memory ring when the message is only a
+    notification (`metadata["shm"]`), otherwise from the inline payload. Returns None for frames that were
+    overwritten before they could be read.
+    """
+    desc = metadata.get("shm")
+    if desc is None:
+        return decode_image(np.frombuffer(buffer_bytes, dtype=np.uint8), metadata)
+    return reader.read(desc, convert=lambda view: decode_image(view, metadata))
+
+
+def recv_encoded(reader: FrameRingReader, buffer_bytes: bytes, metadata: dict) -> np.ndarray | None:
+    """
+    Copies the compressed bytes of an encoded image message, so it can be decoded later on another thread.
+    Returns None if the slot was overwritten meanwhile.
+    """
+    desc = metadata.get("shm")
+    if desc is None:
+        return np.frombuffer(buffer_bytes, dtype=np.uint8).copy()
+    return reader.read(desc)
@@ -0,0 +1,117 @@
+"""
+动作下发线程。
+
+控制循环只把每个机械臂最新的动作放进信箱 (mailbox) 就返回，不再在调用方 sleep。
+后台线程按固定频率取出所有机械臂的最新动作，在同一个 tick 内依次发出，两次下发之间至少间隔一个周期。
+一个周期内被新动作覆盖的旧动作不会发送 (计为 superseded)。
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+
+from operating_platform.robot.transport.channel import Link
+
+
+DEFAULT_ACTION_RATE_HZ = 30.0
+
+
+@dataclass
+class ActionSenderStats:
+    # 发出的动作数
+    sent: int = 0
+    # 发送失败 (对端队列已满) 的动作数
+    send_dropped: int = 0
+    # 未发出就被更新的动作覆盖的数量
+    superseded: int = 0
+    # 一个 tick 中发出的动作数的最大值 (信箱深度)
+    max_batch: int = 0
+    # 动作从放入信箱到发出的时间 (秒)
+    last_latency_s: float = 0.0
+    max_latency_s: float = 0.0
+    # 最近一次 tick 中发送调用本身的耗时 (秒)
+    last_send_dt_s: float = 0.0
+
+
+class ActionSender:
+    """Sends the latest action of every event_id on `link` from a background thread, at most `rate_hz` times a second."""
+
+    def __init__(self, link: Link, rate_hz: float = DEFAULT_ACTION_RATE_HZ, name: str = "action"):
+        self.link = link
+        self.period_s = 1 / rate_hz
+        self.name = name
+        self.mailbox: dict[str, tuple[object, float]] = {}
+        self.lock = threading.Lock()
+        self.has_mail = threading.Condition(self.lock)
+        self.stats = ActionSenderStats()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._send_loop, name=f"sender-{self.name}", daemon=True)
+        self.thread.start()
+
+    def put(self, event_id: str, value):
+        """Replaces the pending action of `event_id`. Never blocks on the link."""
+        with self.has_mail:
+            if event_id in self.mailbox:
+                self.stats.superseded += 1
+            self.mailbox[event_id] = (value, time.perf_counter())
+            self.has_mail.notify()
+
+    @property
+    def depth(self) -> int:
+        return len(self.mailbox)
+
+    def _send_loop(self):
+        last_send_t = 0.0
+        while self.running:
+            with self.has_mail:
+                if not self.has_mail.wait_for(lambda: self.mailbox or not self.running, timeout=0.5):
+                    continue
+            if not self.running:
+                break
+
+            # 两次下发之间至少间隔一个周期，期间到达的动作只保留最新的
+            delay = last_send_t + self.period_s - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            with self.lock:
+                batch, self.mailbox = self.mailbox, {}
+
+            last_send_t = time.perf_counter()
+            for event_id, (value, put_t) in batch.items():
+                if self.link.send(event_id, value):
+                    self.stats.sent += 1
+                else:
+                    self.stats.send_dropped += 1
+                latency_s = time.perf_counter() - put_t
+                self.stats.last_latency_s = latency_s
+                self.stats.max_latency_s = max(self.stats.max_latency_s, latency_s)
+            self.stats.last_send_dt_s = time.perf_counter() - last_send_t
+            self.stats.max_batch = max(self.stats.max_batch, len(batch))
+
+    def stop(self):
+        self.running = False
+        with self.has_mail:
+            self.has_mail.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def logs(self) -> dict[str, float]:
+        """Counters in the flat `robot.logs` format."""
+        return {
+            f"{self.name}_sent": self.stats.sent,
+            f"{self.name}_send_dropped": self.stats.send_dropped,
+            f"{self.name}_superseded": self.stats.superseded,
+            f"{self.name}_queue_depth": self.depth,
+            f"{self.name}_max_batch": self.stats.max_batch,
+            f"{self.name}_latency_s": self.stats.last_latency_s,
+            f"{self.name}_max_latency_s": self.stats.max_latency_s,
+            f"{self.name}_send_dt_s": self.stats.last_send_dt_s,
+        }
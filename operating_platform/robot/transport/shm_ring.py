@@ -0,0 +1,199 @@
+"""
+每个相机一块共享内存帧环 (frame ring)。
+
+桥接节点 (dora_zeromq.py) 把帧只写一次到环里的某个槽位，ZeroMQ 上只传一个很小的通知
+(共享内存名、slot、seq 和元数据)。机械臂进程按通知直接映射同一块内存读取帧，不再经过 IPC socket 拷贝整帧。
+
+每个槽位带一个 seqlock 计数器: 写入时先置为奇数，写完再加一变成偶数。
+读端在拷贝前后各检查一次 seq，与通知中的 seq 不一致说明槽位已被覆盖 (读端太慢)，该帧丢弃。
+
+只依赖标准库和 numpy，dora 桥接节点的环境里也可以直接导入。
+"""
+
+import os
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+
+SLOT_HEADER_DTYPE = np.dtype(
+    [
+        ("seq", "<u8"),
+        ("nbytes", "<u8"),
+        ("capture_ns", "<i8"),
+        ("reserved", "V40"),
+    ]
+)
+DEFAULT_NUM_SLOTS = 4
+# 一条 link 上的帧数据流 (相机、深度、预览各算一路) 数未知时的默认值
+DEFAULT_FRAME_STREAMS = 8
+
+
+def frame_link_hwm(num_streams: int | None = None, num_slots: int = DEFAULT_NUM_SLOTS) -> int:
+    """
+    Send queue length of a link carrying `num_streams` frame streams: every stream has its own ring, so it gets
+    one ring's worth of notifications. `None` reads the FRAME_STREAMS environment variable.
+    """
+    if num_streams is None:
+        num_streams = int(os.getenv("FRAME_STREAMS", str(DEFAULT_FRAME_STREAMS)))
+    return num_slots * max(num_streams, 1)
+
+
+# 本进程创建的共享内存名，读写在同一进程时不能取消写端的登记
+_created: set[str] = set()
+
+
+def _attach(name: str) -> SharedMemory:
+    """Attach to an existing segment without letting this process' resource tracker unlink it at exit."""
+    try:
+        return SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        shm = SharedMemory(name=name)
+        # resource tracker 按名字记一次，取消登记会连同写端的登记一起去掉，写端 unlink 时 tracker 报 KeyError
+        if shm._name not in _created:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class _RingLayout:
+    def __init__(self, shm: SharedMemory, num_slots: int, slot_size: int):
+        self.shm = shm
+        self.num_slots = num_slots
+        self.slot_size = slot_size
+        header_bytes = num_slots * SLOT_HEADER_DTYPE.itemsize
+        self.headers = np.ndarray((num_slots,), dtype=SLOT_HEADER_DTYPE, buffer=shm.buf)
+        self.data = np.ndarray((num_slots, slot_size), dtype=np.uint8, buffer=shm.buf, offset=header_bytes)
+
+    @staticmethod
+    def nbytes(num_slots: int, slot_size: int) -> int:
+        return num_slots * (SLOT_HEADER_DTYPE.itemsize + slot_size)
+
+    def release(self):
+        # drop the numpy views before closing, otherwise SharedMemory.close() raises BufferError
+        self.headers = None
+        self.data = None
+        self.shm.close()
+
+
+class FrameRingWriter:
+    """
+    Writer side, owned by the bridge node. The segment is created lazily on the first write and re-created
+    (with a new name) when a frame no longer fits in a slot, e.g. after a resolution change.
+    """
+
+    def __init__(self, key: str, num_slots: int = DEFAULT_NUM_SLOTS):
+        self.key = key
+        self.num_slots = num_slots
+        self.generation = 0
+        self.next_slot = 0
+        self.seq = 0
+        self.layout: _RingLayout | None = None
+
+    @property
+    def name(self) -> str | None:
+        return self.layout.shm.name if self.layout is not None else None
+
+    def _create(self, slot_size: int):
+        self.close()
+        self.generation += 1
+        name = f"dorobot_{os.getpid()}_{self.key}_{self.generation}"
+        shm = SharedMemory(name=name, create=True, size=_RingLayout.nbytes(self.num_slots, slot_size))
+        _created.add(shm._name)
+        self.layout = _RingLayout(shm, self.num_slots, slot_size)
+        self.layout.headers["seq"][:] = 0
+        self.next_slot = 0
+
+    def write(self, frame: np.ndarray, capture_ns: int = 0) -> dict:
+        """
+        Copy a frame (any contiguous buffer) into the next slot and return the notification describing it.
+        """
+        data = np.frombuffer(frame, dtype=np.uint8) if not isinstance(frame, np.ndarray) else frame.reshape(-1).view(np.uint8)
+        if self.layout is None or data.nbytes > self.layout.slot_size:
+            self._create(data.nbytes)
+
+        slot = self.next_slot
+        headers = self.layout.headers
+        self.seq += 2
+
+        headers["seq"][slot] = self.seq - 1  # odd: write in progress
+        self.layout.data[slot, : data.nbytes] = data
+        headers["nbytes"][slot] = data.nbytes
+        headers["capture_ns"][slot] = capture_ns
+        headers["seq"][slot] = self.seq  # even: slot is stable
+
+        self.next_slot = (slot + 1) % self.num_slots
+        return {
+            "key": self.key,
+            "name": self.layout.shm.name,
+            "num_slots": self.num_slots,
+            "slot_size": self.layout.slot_size,
+            "slot": slot,
+            "seq": self.seq,
+            "nbytes": int(data.nbytes),
+            "capture_ns": int(capture_ns),
+        }
+
+    def close(self):
+        if self.layout is None:
+            return
+        shm = self.layout.shm
+        self.layout.release()
+        shm.unlink()
+        _created.discard(shm._name)
+        self.layout = None
+
+
+class FrameRingReader:
+    """Reader side. Attaches lazily to every segment named in a notification."""
+
+    def __init__(self):
+        self.layouts: dict[str, _RingLayout] = {}
+        self.names: dict[str, str] = {}
+
+    def _layout(self, desc: dict) -> _RingLayout:
+        layout = self.layouts.get(desc["name"])
+        if layout is None:
+            # the writer re-created its ring, detach from the previous segment
+            old_name = self.names.get(desc["key"])
+            if old_name is not None and old_name in self.layouts:
+                self.layouts.pop(old_name).release()
+            layout = _RingLayout(_attach(desc["name"]), desc["num_slots"], desc["slot_size"])
+            self.layouts[desc["name"]] = layout
+            self.names[desc["key"]] = desc["name"]
+        return layout
+
+    def view(self, desc: dict) -> np.ndarray | None:
+        """
+        Read-only view on the slot, no copy. Only valid while `is_current(desc)` holds: callers that keep the
+        data around must copy it (or convert it, which copies anyway) and check `is_current` afterwards.
+        """
+        layout = self._layout(desc)
+        slot = desc["slot"]
+        if int(layout.headers["seq"][slot]) != desc["seq"]:
+            return None
+        view = layout.data[slot, : desc["nbytes"]]
+        view.flags.writeable = False
+        return view
+
+    def is_current(self, desc: dict) -> bool:
+        return int(self._layout(desc).headers["seq"][desc["slot"]]) == desc["seq"]
+
+    def read(self, desc: dict, convert=np.copy) -> np.ndarray | None:
+        """
+        Seqlock read: `convert` is applied to the view (default: plain copy) and the result is dropped if the
+        writer reused the slot meanwhile.
+        """
+        view = self.view(desc)
+        if view is None:
+            return None
+        out = convert(view)
+        if not self.is_current(desc):
+            return None
+        return out
+
+    def close(self):
+        for layout in self.layouts.values():
+            layout.release()
+        self.layouts = {}
+        self.names = {}
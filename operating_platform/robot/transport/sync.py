@@ -0,0 +1,104 @@
+"""
+多传感器时间同步。
+
+每个 tick 先确定一个参考时间 (各相机最新一帧采集时间中最早的那个)，然后:
+- 图像取采集时间离参考时间最近的一帧;
+- 关节、位姿等向量数据在参考时间两侧的样本之间线性插值，参考时间超出样本范围时取最近的样本
+  (插值时 skew 记为较近一侧样本与参考时间的偏差)。
+
+每路数据实际使用的样本与参考时间的偏差 (skew，秒，样本时间减参考时间) 作为
+`observation.sync_skew_s` 写入数据集，超出容差的次数计入 robot.logs。
+图像实际选中的样本的采集时间记在 sample_ns 中，用 `sample_metadata` 取回这一帧的 metadata (帧号、健康状态等)。
+"""
+
+import numpy as np
+
+from operating_platform.robot.transport.channel import Channel
+
+
+SYNC_SKEW_KEY = "observation.sync_skew_s"
+DEFAULT_TOLERANCE_S = 0.02
+
+
+class StreamSynchronizer:
+    def __init__(self, stream_names: list[str], tolerance_s: float = DEFAULT_TOLERANCE_S):
+        self.stream_names = list(stream_names)
+        self.tolerance_s = tolerance_s
+        self.ref_ns: int | None = None
+        self.skews: dict[str, float] = {}
+        # 本 tick 中 nearest() 为每路数据选中的样本的采集时间
+        self.sample_ns: dict[str, int] = {}
+        self.out_of_tolerance = {name: 0 for name in self.stream_names}
+
+    @property
+    def features(self) -> dict:
+        return {
+            SYNC_SKEW_KEY: {
+                "dtype": "float32",
+                "shape": (len(self.stream_names),),
+                "names": self.stream_names,
+            }
+        }
+
+    def begin(self, channel: Channel, event_ids: list[str]) -> int | None:
+        """Starts a tick: the reference time is the oldest of the latest captures of `event_ids`."""
+        latest = [samples[-1][0] for samples in (channel.samples(event_id) for event_id in event_ids) if samples]
+        self.ref_ns = min(latest) if latest else None
+        self.skews = {}
+        self.sample_ns = {}
+        return self.ref_ns
+
+    def _record(self, name: str, capture_ns: int):
+        skew_s = (capture_ns - self.ref_ns) / 1e9
+        self.skews[name] = skew_s
+        if abs(skew_s) > self.tolerance_s:
+            self.out_of_tolerance[name] = self.out_of_tolerance.get(name, 0) + 1
+
+    def nearest(self, name: str, channel: Channel, event_id: str):
+        """Sample of `event_id` captured closest to the reference time."""
+        samples = channel.samples(event_id)
+        if not samples:
+            return channel[event_id]
+        if self.ref_ns is None:
+            return samples[-1][1]
+
+        capture_ns, value = min(samples, key=lambda sample: abs(sample[0] - self.ref_ns))
+        self._record(name, capture_ns)
+        self.sample_ns[name] = capture_ns
+        return value
+
+    def sample_metadata(self, name: str, channel: Channel, event_id: str) -> dict:
+        """Metadata of the sample `nearest` picked for `name` in this tick (the latest one if it picked none)."""
+        return channel.metadata_at(event_id, self.sample_ns.get(name))
+
+    def interpolate(self, name: str, channel: Channel, event_id: str) -> np.ndarray:
+        """Value of a vector stream linearly interpolated at the reference time."""
+        samples = channel.samples(event_id)
+        if not samples:
+            return channel[event_id]
+        if self.ref_ns is None:
+            return samples[-1][1]
+
+        ref_ns = self.ref_ns
+        if ref_ns <= samples[0][0] or ref_ns >= samples[-1][0]:
+            # no sample on one side, fall back to the nearest one
+            return self.nearest(name, channel, event_id)
+
+        for (t0, v0), (t1, v1) in zip(samples, samples[1:]):
+            if t0 <= ref_ns <= t1:
+                break
+        alpha = (ref_ns - t0) / (t1 - t0) if t1 != t0 else 1.0
+        # the interpolated value is only as good as the closer of the two samples
+        self._record(name, t0 if alpha <= 0.5 else t1)
+        return (1 - alpha) * v0 + alpha * v1
+
+    def skew_vector(self) -> np.ndarray:
+        return np.array([self.skews.get(name, 0.0) for name in self.stream_names], dtype=np.float32)
+
+    def logs(self) -> dict[str, float]:
+        logs = {}
+        for name in self.stream_names:
+            if name in self.skews:
+                logs[f"sync_{name}_skew_s"] = self.skews[name]
+            logs[f"sync_{name}_out_of_tolerance"] = self.out_of_tolerance.get(name, 0)
+        return logs
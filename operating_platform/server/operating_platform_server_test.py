@@ -55,11 +55,15 @@ class VideoStream:
         if img is None:
             return
         
-        # 压缩图像（可选）
-        img = cv2.resize(img, (640, 480))
-        encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), 80]
-        _, jpeg = cv2.imencode('.jpg', img, encode_param)
-        compressed_frame = jpeg.tobytes()
+        if img.shape[1] <= 640 and img.shape[0] <= 480:
+            # 机器人端发来的是相机节点缩小、编码好的预览，原样保存
+            compressed_frame = bytes(frame_data)
+        else:
+            # 压缩图像（可选）
+            img = cv2.resize(img, (640, 480))
+            encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), 80]
+            _, jpeg = cv2.imencode('.jpg', img, encode_param)
+            compressed_frame = jpeg.tobytes()
 
         with self.lock:
             self.buffer_index = 1 - self.buffer_index
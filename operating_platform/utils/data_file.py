@@ -1,6 +1,10 @@
 import os
 import datetime
 import json
+import threading
+
+
+OP_MANIFEST_PATH = os.path.join("meta", "op_manifest.jsonl")
 
 
 def get_today_date():
@@ -89,7 +93,7 @@ def file_size(path, n):
 
     return 0
 
-def get_data_size(fold_path, data): # 文件大小单位(MB)
+def _scan_data_size(fold_path, data): # 文件大小单位(MB)
     try:
         size_bytes = 0
 
@@ -144,7 +148,7 @@ def get_data_size(fold_path, data): # 文件大小单位(MB)
 
 
 
-def get_data_duration(fold_path,data):  # 文件时长单位(s)
+def _scan_data_duration(fold_path,data):  # 文件时长单位(s)
     try:
         # directory_path = os.path.join(fold_path, get_today_date())
         # print(directory_path)
@@ -186,6 +190,176 @@ def get_data_duration(fold_path,data):  # 文件时长单位(s)
         print(str(e))
         return 30
 
+class EpisodeManifest:
+    """
+    每个 episode 保存时写入一条清单记录 (文件列表、字节大小、帧数、时长)，
+    并在内存中维护 episode_index -> 记录 以及 task_data_id -> episode_index 两个索引。
+    服务端查询大小/时长时直接查字典，不再扫描目录和 JSONL。
+    清单文件被其他进程重写后 (例如 compact --reindex=true)，(size, mtime) 变化，下次访问时重新加载。
+    """
+
+    def __init__(self, path):
+        self.manifest_path = os.path.join(path, OP_MANIFEST_PATH)
+        self.lock = threading.Lock()
+        self._load()
+
+    def _file_stat(self):
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _load(self):
+        self.episodes = {}
+        self.dataid_to_episode = {}
+        self.stat = self._file_stat()
+        if self.stat is not None:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self._index(json.loads(line.strip()))
+                    except (json.JSONDecodeError, KeyError) as e:
+                        print(f"解析清单失败，行内容: {line.strip()}, 错误信息: {e}")
+
+    def _refresh(self):
+        # 调用方持有 self.lock
+        if self._file_stat() != self.stat:
+            self._load()
+
+    def refresh(self):
+        """Reloads the manifest if the file changed on disk since it was last read or written by this object."""
+        with self.lock:
+            self._refresh()
+
+    def _index(self, entry):
+        episode_index = int(entry["episode_index"])
+        self.episodes[episode_index] = entry
+        if entry.get("dataid") is not None:
+            self.dataid_to_episode[str(entry["dataid"])] = episode_index
+
+    def add(self, entry):
+        with self.lock:
+            self._refresh()
+            self._index(entry)
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            with open(self.manifest_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.stat = self._file_stat()
+
+    def remove(self, episode_index):
+        with self.lock:
+            self._refresh()
+            entry = self.episodes.pop(int(episode_index), None)
+            if entry is None:
+                return
+            dataid = entry.get("dataid")
+            if dataid is not None and self.dataid_to_episode.get(str(dataid)) == int(episode_index):
+                del self.dataid_to_episode[str(dataid)]
+            with open(self.manifest_path, 'w', encoding='utf-8') as f:
+                for item in self.episodes.values():
+                    f.write(json.dumps(item, ensure_ascii=False) + '\n')
+            self.stat = self._file_stat()
+
+    def remap(self, mapping, file_sizes_for=None):
+        """
+        mapping: 旧 episode_index -> 新 episode_index，值为 None 表示删除该记录。
+        file_sizes_for: 可选，新 episode_index -> {相对文件路径: 字节数}，用于重新统计被改名文件的大小。
+        """
+        with self.lock:
+            self._refresh()
+            episodes = {}
+            for episode_index, entry in self.episodes.items():
+                new_index = mapping.get(episode_index, episode_index)
+                if new_index is None:
+                    continue
+                entry = {**entry, "episode_index": new_index}
+                if new_index != episode_index and file_sizes_for is not None:
+                    entry["files"] = file_sizes_for(new_index)
+                    entry["size_bytes"] = sum(entry["files"].values())
+                episodes[new_index] = entry
+            self.episodes, self.dataid_to_episode = {}, {}
+            for entry in episodes.values():
+                self._index(entry)
+            with open(self.manifest_path, 'w', encoding='utf-8') as f:
+                for entry in self.episodes.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.stat = self._file_stat()
+
+    def update_files(self, episode_indices, file_sizes_for):
+        """数据文件布局变化 (分片打包/拆分) 后重新统计这些 episode 的文件列表和大小，没有记录的 episode 忽略。"""
+        with self.lock:
+            self._refresh()
+            updated = False
+            for episode_index in episode_indices:
+                entry = self.episodes.get(int(episode_index))
+                if entry is None:
+                    continue
+                entry["files"] = file_sizes_for(int(episode_index))
+                entry["size_bytes"] = sum(entry["files"].values())
+                updated = True
+            if not updated:
+                return
+            with open(self.manifest_path, 'w', encoding='utf-8') as f:
+                for entry in self.episodes.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.stat = self._file_stat()
+
+    def get_by_dataid(self, task_data_id):
+        episode_index = self.dataid_to_episode.get(str(task_data_id).strip())
+        if episode_index is None:
+            return None
+        return self.episodes.get(episode_index)
+
+
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+
+def get_episode_manifest(path) -> EpisodeManifest:
+    """按数据集根目录缓存清单对象; 清单文件被其他进程改写 (size 或 mtime 变化) 时重新加载。"""
+    key = os.path.abspath(str(path))
+    with _manifests_lock:
+        manifest = _manifests.get(key)
+        if manifest is None:
+            manifest = EpisodeManifest(key)
+            _manifests[key] = manifest
+    manifest.refresh()
+    return manifest
+
+
+def update_episode_manifest(path, episode_index, data, file_sizes, length, fps):
+    """
+    保存 episode 时调用，file_sizes 为 {相对数据集根目录的文件路径: 字节数}
+    (DoRobotDatasetMetadata.get_episode_file_sizes，分片中的 episode 只计其 row group)。
+    文件大小在此处一次性统计，之后的查询不再访问文件系统。
+    """
+    entry = {
+        "episode_index": episode_index,
+        "dataid": str(data["task_data_id"]) if data is not None else None,
+        "files": file_sizes,
+        "size_bytes": sum(file_sizes.values()),
+        "length": length,
+        "duration_s": round(length / fps, 2),
+    }
+    get_episode_manifest(path).add(entry)
+    return entry
+
+
+def get_data_size(fold_path, data): # 文件大小单位(MB)
+    entry = get_episode_manifest(fold_path).get_by_dataid(data["task_data_id"])
+    if entry is None:
+        # 旧数据集没有清单，回退到目录扫描
+        return _scan_data_size(fold_path, data)
+    return round(entry["size_bytes"] / (1024 * 1024), 2)
+
+
+def get_data_duration(fold_path, data):  # 文件时长单位(s)
+    entry = get_episode_manifest(fold_path).get_by_dataid(data["task_data_id"])
+    if entry is None:
+        return _scan_data_duration(fold_path, data)
+    return entry["duration_s"]
+
 def update_dataid_json(path, episode_index, data):
     opdata_path = os.path.join(path, "meta", "op_dataid.jsonl")
 
@@ -221,6 +395,10 @@ def find_epindex_from_dataid_json(path: str, task_data_id: str) -> int:
     
     # 规范化 task_data_id 类型（确保字符串比较）
     target_id = str(task_data_id).strip()
+
+    entry = get_episode_manifest(path).get_by_dataid(target_id)
+    if entry is not None:
+        return int(entry["episode_index"])
     
     with open(opdata_path, 'r', encoding='utf-8') as f:
         for line in f:
@@ -238,6 +416,8 @@ def find_epindex_from_dataid_json(path: str, task_data_id: str) -> int:
 def delete_dataid_json(path, episode_index, data):
     opdata_path = os.path.join(path, "meta", "op_dataid.jsonl")
     
+    get_episode_manifest(path).remove(episode_index)
+
     # 构建要删除的匹配条件
     target_episode = episode_index
     target_dataid = str(data["task_data_id"])
@@ -267,6 +447,35 @@ def delete_dataid_json(path, episode_index, data):
         for entry in filtered_data:
             f.write(json.dumps(entry, ensure_ascii=False) + '\n')
 
+def remap_dataid_json(path, mapping, file_sizes_for=None):
+    """
+    数据集 compact 之后同步 op_dataid.jsonl 和清单。
+    mapping: 旧 episode_index -> 新 episode_index，值为 None 表示该 episode 已被删除。
+    """
+    opdata_path = os.path.join(path, "meta", "op_dataid.jsonl")
+    if os.path.exists(opdata_path):
+        remapped = []
+        with open(opdata_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line.strip())
+                except json.JSONDecodeError:
+                    continue
+                new_index = mapping.get(entry.get("episode_index"), entry.get("episode_index"))
+                if new_index is None:
+                    continue
+                remapped.append({**entry, "episode_index": new_index})
+        with open(opdata_path, 'w', encoding='utf-8') as f:
+            for entry in remapped:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    get_episode_manifest(path).remap(mapping, file_sizes_for)
+
+
+def update_manifest_files(path, episode_indices, file_sizes_for):
+    """parquet 布局转换后同步清单中的文件列表和大小。"""
+    get_episode_manifest(path).update_files(episode_indices, file_sizes_for)
+
 def update_common_record_json(path, data):
     opdata_path = os.path.join(path, "meta", "common_record.json")
 
@@ -2,6 +2,7 @@ import contextlib
 import importlib.resources
 import json
 import logging
+import warnings
 from collections.abc import Iterator
 from itertools import accumulate
 from pathlib import Path
@@ -13,7 +14,10 @@ import datasets
 import jsonlines
 import numpy as np
 import packaging.version
+import pyarrow as pa
+import pyarrow.compute as pc
 import torch
+from datasets.formatting import Formatter, _register_formatter
 from datasets.table import embed_table_storage
 from huggingface_hub import DatasetCard, DatasetCardData, HfApi
 
@@ -33,12 +37,19 @@ EPISODES_PATH = "meta/episodes.jsonl"
 STATS_PATH = "meta/stats.json"
 EPISODES_STATS_PATH = "meta/episodes_stats.jsonl"
 TASKS_PATH = "meta/tasks.jsonl"
+VIDEO_INFO_CACHE_PATH = "meta/video_info_cache.json"
+TOMBSTONES_PATH = "meta/tombstones.json"
+SHARD_INDEX_PATH = "meta/shard_index.json"
 
 DEFAULT_VIDEO_PATH = "videos/chunk-{episode_chunk:03d}/{video_key}/episode_{episode_index:06d}.mp4"
 DEFAULT_AUDIO_PATH = "audio/chunk-{episode_chunk:03d}/{audio_key}/episode_{episode_index:06d}.wav"
 DEFAULT_PARQUET_PATH = "data/chunk-{episode_chunk:03d}/episode_{episode_index:06d}.parquet"
+DEFAULT_SHARD_PATH = "data/shards/shard_{shard_index:06d}.parquet"
 DEFAULT_IMAGE_PATH = "images/{image_key}/episode_{episode_index:06d}/frame_{frame_index:06d}.png"
 
+# dtype "depth" 的特征: 以 uint16 毫米存成 16 位 PNG (无损，与 image 同目录结构)，读取和统计时换算成米
+DEPTH_UNIT_M = 0.001
+
 DATASET_CARD_TEMPLATE = """
 ---
 # Metadata will go there
@@ -166,6 +177,14 @@ def delete_jsonlines(index: int, fpath: Path) -> None:
         writer.write_all(data)
 
 
+def delete_jsonlines_by_episode(ep_indices: int | set[int], fpath: Path) -> None:
+    """Remove the lines whose 'episode_index' is in ep_indices (instead of deleting by line position)."""
+    if isinstance(ep_indices, int):
+        ep_indices = {ep_indices}
+    data = [item for item in load_jsonlines(fpath) if item["episode_index"] not in ep_indices]
+    write_jsonlines(data, fpath)
+
+
 def write_info(info: dict, local_dir: Path):
     write_json(info, local_dir / INFO_PATH)
 
@@ -213,8 +232,8 @@ def write_episode(episode: dict, local_dir: Path):
     append_jsonlines(episode, local_dir / EPISODES_PATH)
 
 
-def delete_episode(ep_index: int, local_dir: Path):
-    delete_jsonlines(ep_index, local_dir / EPISODES_PATH)
+def delete_episode(ep_index: int | set[int], local_dir: Path):
+    delete_jsonlines_by_episode(ep_index, local_dir / EPISODES_PATH)
 
 
 def load_episodes(local_dir: Path) -> dict:
@@ -229,8 +248,8 @@ def write_episode_stats(episode_index: int, episode_stats: dict, local_dir: Path
     append_jsonlines(episode_stats, local_dir / EPISODES_STATS_PATH)
 
 
-def delete_episode_stats(episode_index: int, local_dir: Path):
-    delete_jsonlines(episode_index, local_dir / EPISODES_STATS_PATH)
+def delete_episode_stats(episode_index: int | set[int], local_dir: Path):
+    delete_jsonlines_by_episode(episode_index, local_dir / EPISODES_STATS_PATH)
 
 
 def load_episodes_stats(local_dir: Path) -> dict:
@@ -241,6 +260,30 @@ def load_episodes_stats(local_dir: Path) -> dict:
     }
 
 
+def load_tombstones(local_dir: Path) -> set[int]:
+    fpath = local_dir / TOMBSTONES_PATH
+    if not fpath.exists():
+        return set()
+    return set(load_json(fpath)["episode_index"])
+
+
+def write_tombstones(tombstones: set[int], local_dir: Path):
+    write_json({"episode_index": sorted(tombstones)}, local_dir / TOMBSTONES_PATH)
+
+
+def load_shard_index(local_dir: Path) -> dict[int, tuple[str, int]]:
+    """episode_index -> (shard file relative to the dataset root, row group) for the sharded layout."""
+    fpath = local_dir / SHARD_INDEX_PATH
+    if not fpath.exists():
+        return {}
+    return {int(ep_idx): (fname, row_group) for ep_idx, (fname, row_group) in load_json(fpath)["episodes"].items()}
+
+
+def write_shard_index(shard_index: dict[int, tuple[str, int]], local_dir: Path):
+    episodes = {str(ep_idx): list(shard_index[ep_idx]) for ep_idx in sorted(shard_index)}
+    write_json({"episodes": episodes}, local_dir / SHARD_INDEX_PATH)
+
+
 def backward_compatible_episodes_stats(
     stats: dict[str, dict[str, np.ndarray]], episodes: list[int]
 ) -> dict[str, dict[str, np.ndarray]]:
@@ -259,6 +302,12 @@ def load_image_as_numpy(
     return img_array
 
 
+def load_depth_as_numpy(fpath: str | Path, channel_first: bool = True) -> np.ndarray:
+    """Loads a 16-bit depth PNG as float32 meters, shape (1, H, W) or (H, W, 1)."""
+    depth = np.array(PILImage.open(fpath), dtype=np.float32) * DEPTH_UNIT_M
+    return depth[None] if channel_first else depth[..., None]
+
+
 def hf_transform_to_torch(items_dict: dict[torch.Tensor | None]):
     """Get a transform function that convert items from Hugging Face dataset (pyarrow)
     to torch tensors. Importantly, images are converted from PIL, which corresponds to
@@ -277,6 +326,90 @@ def hf_transform_to_torch(items_dict: dict[torch.Tensor | None]):
     return items_dict
 
 
+def _arrow_buffer_to_torch(array: pa.Array) -> torch.Tensor:
+    try:
+        values = array.to_numpy(zero_copy_only=True)
+    except pa.ArrowInvalid:
+        # nulls or bit-packed booleans can't be viewed in place
+        values = array.to_numpy(zero_copy_only=False)
+    with warnings.catch_warnings():
+        # Arrow buffers are read-only, the tensor is a view on them and must not be written to
+        warnings.filterwarnings("ignore", message="The given NumPy array is not writable")
+        return torch.from_numpy(values)
+
+
+def _is_numeric(type_: pa.DataType) -> bool:
+    return pa.types.is_integer(type_) or pa.types.is_floating(type_) or pa.types.is_boolean(type_)
+
+
+def _uniform_list_to_torch(column: pa.ListArray | pa.LargeListArray) -> torch.Tensor:
+    """(num_rows, length) view of a variable-length list column whose rows all have the same length."""
+    if not _is_numeric(column.type.value_type):
+        raise ValueError(f"Cannot convert a list column of {column.type.value_type} to a tensor.")
+    if column.null_count:
+        raise ValueError(f"Cannot convert a list column with {column.null_count} null rows to a tensor.")
+    if len(column) == 0:
+        return _arrow_buffer_to_torch(column.flatten()).view(0, 0)
+
+    lengths = pc.min_max(pc.list_value_length(column))
+    width = lengths["min"].as_py()
+    if lengths["max"].as_py() != width:
+        raise ValueError(
+            f"Cannot convert a list column with rows of {width} to {lengths['max'].as_py()} values to a tensor, "
+            "store it as a fixed-length feature."
+        )
+    # flatten() honours the slice offset of the array, so this stays a view
+    return _arrow_buffer_to_torch(column.flatten()).view(len(column), width)
+
+
+def arrow_column_to_torch(column: pa.ChunkedArray | pa.Array) -> torch.Tensor | list:
+    """Convert an Arrow column to torch without going through Python lists.
+
+    FixedSizeList columns (e.g. `observation.state`, `action`) are viewed as a 2-D (num_rows, length)
+    array over their flat values buffer, primitive columns as a 1-D array, both without copying.
+    Variable-length numeric lists are viewed the same way when every row has the same length, and rejected
+    otherwise, so a column always becomes one tensor. Strings fall back to Python objects.
+    """
+    if isinstance(column, pa.ChunkedArray):
+        # a single chunk is the common case (one episode file / one row group); more chunks need one copy
+        column = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+
+    if pa.types.is_fixed_size_list(column.type):
+        width = column.type.list_size
+        # flatten() honours the slice offset of the array, so this stays a view
+        values = _arrow_buffer_to_torch(column.flatten())
+        return values.view(len(column), width)
+    if pa.types.is_list(column.type) or pa.types.is_large_list(column.type):
+        return _uniform_list_to_torch(column)
+    if _is_numeric(column.type):
+        return _arrow_buffer_to_torch(column)
+    if isinstance(column, pa.ExtensionArray):
+        # datasets ArrayND extension types
+        return torch.from_numpy(column.to_numpy(zero_copy_only=False))
+    return [x if isinstance(x, str) or x is None else torch.tensor(x) for x in column.to_pylist()]
+
+
+class ArrowTorchFormatter(Formatter[dict, torch.Tensor | list, dict]):
+    """datasets formatter that builds torch tensors straight from the Arrow table (see arrow_column_to_torch).
+
+    Rows are views into the batch tensors, columns and batches are returned as whole tensors.
+    """
+
+    def format_row(self, pa_table: pa.Table) -> dict:
+        batch = self.format_batch(pa_table)
+        return {key: value[0] for key, value in batch.items()}
+
+    def format_column(self, pa_table: pa.Table) -> torch.Tensor | list:
+        return arrow_column_to_torch(pa_table.column(0))
+
+    def format_batch(self, pa_table: pa.Table) -> dict:
+        return {name: arrow_column_to_torch(pa_table.column(name)) for name in pa_table.column_names}
+
+
+ARROW_TORCH_FORMAT = "dorobot_torch"
+_register_formatter(ArrowTorchFormatter, ARROW_TORCH_FORMAT)
+
+
 def is_valid_version(version: str) -> bool:
     try:
         packaging.version.parse(version)
@@ -308,6 +441,9 @@ def get_hf_features_from_features(features: dict) -> datasets.Features:
         elif ft["dtype"] == "image":
             # hf_features[key] = datasets.Image()
             continue
+        elif ft["dtype"] == "depth":
+            # stored as 16-bit PNG files next to the images
+            continue
         elif ft["shape"] == (1,):
             hf_features[key] = datasets.Value(dtype=ft["dtype"])
         elif len(ft["shape"]) == 1:
@@ -378,6 +514,8 @@ def create_empty_dataset_info(
     use_videos: bool,
     use_audios: bool,
 ) -> dict:
+    # depth frames are never encoded to video, they need the image directory in both modes
+    has_depth = any(ft["dtype"] == "depth" for ft in features.values())
     return {
         "codebase_version": codebase_version,
         "dorobot_dataset_version": dorobot_dataset_version,
@@ -391,7 +529,7 @@ def create_empty_dataset_info(
         "fps": fps,
         "splits": {},
         "data_path": DEFAULT_PARQUET_PATH,
-        "image_path": DEFAULT_IMAGE_PATH if use_videos == False else None,
+        "image_path": DEFAULT_IMAGE_PATH if use_videos == False or has_depth else None,
         "video_path": DEFAULT_VIDEO_PATH if use_videos else None,
         "audio_path": DEFAULT_AUDIO_PATH if use_audios else None,
         "features": features,
@@ -692,6 +830,8 @@ def validate_feature_dtype_and_shape(name: str, feature: dict, value: np.ndarray
         return validate_feature_numpy_array(name, expected_dtype, expected_shape, value)
     elif expected_dtype in ["image", "video"]:
         return validate_feature_image_or_video(name, expected_shape, value)
+    elif expected_dtype == "depth":
+        return validate_feature_depth(name, expected_shape, value)
     elif expected_dtype == "string":
         return validate_feature_string(name, value)
     else:
@@ -733,6 +873,20 @@ def validate_feature_image_or_video(name: str, expected_shape: list[str], value:
     return error_message
 
 
+def validate_feature_depth(name: str, expected_shape: list[int], value: np.ndarray):
+    error_message = ""
+    if isinstance(value, np.ndarray):
+        h, w, _ = expected_shape
+        if value.shape != (h, w) and value.shape != (h, w, 1):
+            error_message += f"The feature '{name}' of shape '{value.shape}' does not have the expected shape '{(h, w, 1)}' or '{(h, w)}'.\n"
+        if value.dtype != np.uint16:
+            error_message += f"The feature '{name}' of dtype '{value.dtype}' is not uint16 millimeters.\n"
+    else:
+        error_message += f"The feature '{name}' is expected to be of type 'np.ndarray', but type '{type(value)}' provided instead.\n"
+
+    return error_message
+
+
 def validate_feature_string(name: str, value: str):
     if not isinstance(value, str):
         return f"The feature '{name}' is expected to be of type 'str', but type '{type(value)}' provided instead.\n"
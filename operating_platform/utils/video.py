@@ -288,25 +288,76 @@ with warnings.catch_warnings():
     register_feature(VideoFrame, "VideoFrame")
 
 
-def get_audio_info(video_path: Path | str) -> dict:
-    ffprobe_audio_cmd = [
+_FFPROBE_STREAM_ENTRIES = (
+    "stream=index,codec_type,codec_name,r_frame_rate,width,height,pix_fmt,"
+    "channels,bit_rate,sample_rate,bits_per_raw_sample,channel_layout"
+)
+
+
+def probe_media_streams(video_path: Path | str) -> tuple[dict | None, dict | None]:
+    """
+    一次 ffprobe 调用同时取回第一个视频流和第一个音频流的信息。
+    返回 (video_stream, audio_stream)，不存在的流为 None。
+    """
+    ffprobe_cmd = [
         "ffprobe",
         "-v",
         "error",
-        "-select_streams",
-        "a:0",
         "-show_entries",
-        "stream=channels,codec_name,bit_rate,sample_rate,bit_depth,channel_layout,duration",
+        _FFPROBE_STREAM_ENTRIES,
         "-of",
         "json",
         str(video_path),
     ]
-    result = subprocess.run(ffprobe_audio_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    result = subprocess.run(ffprobe_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
     if result.returncode != 0:
         raise RuntimeError(f"Error running ffprobe: {result.stderr}")
 
-    info = json.loads(result.stdout)
-    audio_stream_info = info["streams"][0] if info.get("streams") else None
+    streams = json.loads(result.stdout).get("streams", [])
+    video_stream = next((s for s in streams if s.get("codec_type") == "video"), None)
+    audio_stream = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    return video_stream, audio_stream
+
+
+def probe_media_streams_pyav(video_path: Path | str) -> tuple[dict | None, dict | None]:
+    """
+    与 probe_media_streams 返回相同结构，但直接通过 PyAV 读取容器头，不启动子进程。
+    codec_context.name 是解码器名 (如 libdav1d)，codec_name 取与 ffprobe 一致的编码格式名 (如 av1)。
+    """
+    import av
+
+    with av.open(str(video_path)) as container:
+        video_stream = None
+        if container.streams.video:
+            stream = container.streams.video[0]
+            rate = stream.average_rate or stream.base_rate
+            video_stream = {
+                "codec_type": "video",
+                "codec_name": stream.codec_context.codec.canonical_name,
+                "r_frame_rate": f"{rate.numerator}/{rate.denominator}",
+                "width": stream.codec_context.width,
+                "height": stream.codec_context.height,
+                "pix_fmt": stream.codec_context.pix_fmt,
+            }
+
+        audio_stream = None
+        if container.streams.audio:
+            stream = container.streams.audio[0]
+            layout = stream.codec_context.layout
+            audio_stream = {
+                "codec_type": "audio",
+                "codec_name": stream.codec_context.codec.canonical_name,
+                # 新版 PyAV 去掉了 codec_context.channels，声道数从 layout 取
+                "channels": layout.nb_channels if layout is not None else None,
+                "bit_rate": stream.codec_context.bit_rate or None,
+                "sample_rate": stream.codec_context.sample_rate,
+                "channel_layout": layout.name if layout is not None else None,
+            }
+
+    return video_stream, audio_stream
+
+
+def _audio_info_from_stream(audio_stream_info: dict | None) -> dict:
     if audio_stream_info is None:
         return {"has_audio": False}
 
@@ -319,31 +370,12 @@ def get_audio_info(video_path: Path | str) -> dict:
         "audio.sample_rate": int(audio_stream_info["sample_rate"])
         if audio_stream_info.get("sample_rate")
         else None,
-        "audio.bit_depth": audio_stream_info.get("bit_depth", None),
+        "audio.bit_depth": audio_stream_info.get("bits_per_raw_sample", None),
         "audio.channel_layout": audio_stream_info.get("channel_layout", None),
     }
 
 
-def get_video_info(video_path: Path | str) -> dict:
-    ffprobe_video_cmd = [
-        "ffprobe",
-        "-v",
-        "error",
-        "-select_streams",
-        "v:0",
-        "-show_entries",
-        "stream=r_frame_rate,width,height,codec_name,nb_frames,duration,pix_fmt",
-        "-of",
-        "json",
-        str(video_path),
-    ]
-    result = subprocess.run(ffprobe_video_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    if result.returncode != 0:
-        raise RuntimeError(f"Error running ffprobe: {result.stderr}")
-
-    info = json.loads(result.stdout)
-    video_stream_info = info["streams"][0]
-
+def _video_info_from_streams(video_stream_info: dict, audio_stream_info: dict | None) -> dict:
     # Calculate fps from r_frame_rate
     r_frame_rate = video_stream_info["r_frame_rate"]
     num, denom = map(int, r_frame_rate.split("/"))
@@ -351,7 +383,7 @@ def get_video_info(video_path: Path | str) -> dict:
 
     pixel_channels = get_video_pixel_channels(video_stream_info["pix_fmt"])
 
-    video_info = {
+    return {
         "video.fps": fps,
         "video.height": video_stream_info["height"],
         "video.width": video_stream_info["width"],
@@ -359,10 +391,112 @@ def get_video_info(video_path: Path | str) -> dict:
         "video.codec": video_stream_info["codec_name"],
         "video.pix_fmt": video_stream_info["pix_fmt"],
         "video.is_depth_map": False,
-        **get_audio_info(video_path),
+        **_audio_info_from_stream(audio_stream_info),
     }
 
-    return video_info
+
+def _probe(video_path: Path | str, backend: str | None) -> tuple[dict | None, dict | None]:
+    if backend is None:
+        try:
+            return probe_media_streams_pyav(video_path)
+        except ImportError:
+            return probe_media_streams(video_path)
+    if backend == "pyav":
+        return probe_media_streams_pyav(video_path)
+    if backend == "ffprobe":
+        return probe_media_streams(video_path)
+    raise ValueError(f"Unsupported probe backend: {backend}")
+
+
+def get_audio_info(video_path: Path | str, backend: str | None = "ffprobe") -> dict:
+    _, audio_stream_info = _probe(video_path, backend)
+    return _audio_info_from_stream(audio_stream_info)
+
+
+def get_video_info(video_path: Path | str, backend: str | None = "ffprobe") -> dict:
+    """
+    backend: "ffprobe" 走单次子进程探测; "pyav" 直接读容器; None 优先 PyAV，不可用时回退 ffprobe。
+    """
+    video_stream_info, audio_stream_info = _probe(video_path, backend)
+    if video_stream_info is None:
+        raise RuntimeError(f"No video stream found in {video_path}")
+
+    return _video_info_from_streams(video_stream_info, audio_stream_info)
+
+
+# 探测结果格式变化 (如 PyAV 的 codec 名修正) 时递增，使旧缓存项失效
+VIDEO_INFO_CACHE_VERSION = 2
+
+
+class VideoInfoCache:
+    """
+    视频探测结果缓存，键为 (path, size, mtime)，内存常驻并持久化到 cache_path (JSON)。
+    文件被重写后 size 或 mtime 变化，缓存项自动失效；旧版本 (VIDEO_INFO_CACHE_VERSION 不同) 写入的缓存项同样失效。
+    默认走 ffprobe，与数据集 info.json 里已有的 video.codec 等取值保持一致。
+    """
+
+    def __init__(
+        self, cache_path: Path | str | None = None, root: Path | str | None = None, backend: str | None = "ffprobe"
+    ):
+        self.cache_path = Path(cache_path) if cache_path is not None else None
+        self.root = Path(root) if root is not None else None
+        self.backend = backend
+        self._entries: dict[str, dict] = {}
+        self._dirty = False
+
+        if self.cache_path is not None and self.cache_path.exists():
+            try:
+                with open(self.cache_path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logging.warning(f"Ignoring unreadable video info cache {self.cache_path}: {e}")
+                self._entries = {}
+
+    def _key(self, video_path: Path) -> str:
+        if self.root is not None:
+            try:
+                return str(video_path.relative_to(self.root))
+            except ValueError:
+                pass
+        return str(video_path)
+
+    def get(self, video_path: Path | str) -> dict:
+        video_path = Path(video_path)
+        stat = video_path.stat()
+        key = self._key(video_path)
+
+        entry = self._entries.get(key)
+        if (
+            entry is not None
+            and entry.get("version") == VIDEO_INFO_CACHE_VERSION
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+        ):
+            return dict(entry["info"])
+
+        info = get_video_info(video_path, backend=self.backend)
+        self._entries[key] = {
+            "version": VIDEO_INFO_CACHE_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "info": info,
+        }
+        self._dirty = True
+        return dict(info)
+
+    def invalidate(self, video_path: Path | str) -> None:
+        if self._entries.pop(self._key(Path(video_path)), None) is not None:
+            self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty or self.cache_path is None:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=4, ensure_ascii=False)
+        tmp_path.replace(self.cache_path)
+        self._dirty = False
 
 
 def get_video_pixel_channels(pix_fmt: str) -> int:
@@ -0,0 +1,138 @@
+import math
+
+import pytest
+
+from operating_platform.robot.components.capture_sync.main import (
+    MAX_PENDING_TICKS,
+    CaptureCoordinator,
+    FrameSet,
+    HealthAlerts,
+)
+
+
+MS = 1_000_000
+
+
+def test_ticks_are_numbered():
+    coordinator = CaptureCoordinator(["image_top"])
+    first = coordinator.tick()
+    second = coordinator.tick()
+
+    assert (first["tick_seq"], second["tick_seq"]) == (1, 2)
+    assert second["tick_ns"] >= first["tick_ns"]
+    assert sorted(coordinator.pending) == [1, 2]
+
+
+def test_samples_are_grouped_by_tick():
+    coordinator = CaptureCoordinator(["image_top", "image_wrist"])
+    coordinator.tick()
+    coordinator.tick()
+
+    assert coordinator.add("image_top", {"tick_seq": 1, "capture_ns": 10 * MS}) == []
+    assert coordinator.add("image_top", {"tick_seq": 2, "capture_ns": 43 * MS}) == []
+    done = coordinator.add("image_wrist", {"tick_seq": 1, "capture_ns": 12 * MS})
+
+    assert len(done) == 1
+    frame_set, complete = done[0]
+    assert complete
+    assert frame_set.tick_seq == 1
+    assert frame_set.capture_ns == {"image_top": 10 * MS, "image_wrist": 12 * MS}
+    assert frame_set.spread_s() == pytest.approx(0.002)
+    assert list(coordinator.pending) == [2]
+
+
+def test_sample_without_tick_goes_to_the_latest_tick():
+    coordinator = CaptureCoordinator(["image_top"])
+    coordinator.tick()
+    coordinator.tick()
+
+    (frame_set, complete), = coordinator.add("image_top", {"capture_ns": 1})
+    assert frame_set.tick_seq == 2
+    assert complete
+
+
+def test_incomplete_frame_set_is_sent_after_max_pending_ticks():
+    coordinator = CaptureCoordinator(["image_top", "image_wrist"])
+    coordinator.tick()
+    coordinator.add("image_top", {"tick_seq": 1, "capture_ns": 1})
+
+    for _ in range(MAX_PENDING_TICKS - 1):
+        coordinator.tick()
+        assert coordinator.add("image_top", {"tick_seq": coordinator.seq, "capture_ns": 1}) == []
+
+    coordinator.tick()
+    done = coordinator.add("image_top", {"tick_seq": coordinator.seq, "capture_ns": 1})
+    assert [(frame_set.tick_seq, complete) for frame_set, complete in done] == [(1, False)]
+    assert math.isnan(coordinator.offsets_s(done[0][0])[1])
+
+
+def test_empty_frame_sets_are_not_sent():
+    coordinator = CaptureCoordinator(["image_top"])
+    for _ in range(MAX_PENDING_TICKS + 1):
+        coordinator.tick()
+
+    done = coordinator.add("image_top", {"tick_seq": coordinator.seq, "capture_ns": 1})
+    assert [frame_set.tick_seq for frame_set, _ in done] == [coordinator.seq]
+    # the stale empty tick is discarded, the recent ones keep waiting
+    assert 1 not in coordinator.pending
+    assert sorted(coordinator.pending) == list(range(coordinator.seq - MAX_PENDING_TICKS + 1, coordinator.seq))
+
+
+def test_streams_are_learned_when_not_configured():
+    coordinator = CaptureCoordinator([])
+    coordinator.tick()
+    coordinator.add("image_top", {"tick_seq": 1, "capture_ns": 1})
+    coordinator.add("image_wrist", {"tick_seq": 1, "capture_ns": 2})
+
+    assert coordinator.streams == ["image_top", "image_wrist"]
+
+
+def test_unknown_stream_is_ignored():
+    coordinator = CaptureCoordinator(["image_top"])
+    coordinator.tick()
+
+    assert coordinator.add("joint_left", {"tick_seq": 1, "capture_ns": 1}) == []
+    assert coordinator.pending[1].capture_ns == {}
+
+
+def test_spread_uses_device_time_when_every_stream_has_it():
+    frame_set = FrameSet(1, 0, capture_ns={"a": 0, "b": 10 * MS}, device_ns={"a": 5 * MS, "b": 6 * MS})
+    assert frame_set.spread_s() == pytest.approx(0.001)
+
+    frame_set.device_ns.pop("b")
+    assert frame_set.spread_s() == pytest.approx(0.01)
+
+
+def test_offsets_follow_the_stream_order():
+    coordinator = CaptureCoordinator(["image_wrist", "image_top"])
+    frame_set = FrameSet(1, 100 * MS, capture_ns={"image_top": 103 * MS, "image_wrist": 101 * MS})
+
+    assert coordinator.offsets_s(frame_set).tolist() == pytest.approx([0.001, 0.003])
+
+
+def test_invalid_frames_are_recorded():
+    coordinator = CaptureCoordinator(["image_top"])
+    coordinator.tick()
+
+    (frame_set, complete), = coordinator.add(
+        "image_top", {"tick_seq": 1, "capture_ns": 1, "frame_valid": False, "frame_status": "frozen"}
+    )
+    assert complete
+    assert frame_set.invalid == {"image_top": "frozen"}
+
+
+def test_health_alert_is_reported_once_and_cleared():
+    alerts = HealthAlerts(after_ticks=2)
+    bad = FrameSet(1, 0, capture_ns={"image_top": 1}, invalid={"image_top": "black"})
+    good = FrameSet(2, 0, capture_ns={"image_top": 1})
+
+    assert alerts.update(["image_top"], bad) == []
+    assert alerts.update(["image_top"], bad) == [("image_top", "black")]
+    assert alerts.update(["image_top"], bad) == []
+    assert alerts.update(["image_top"], good) == [("image_top", "ok")]
+    assert alerts.update(["image_top"], good) == []
+
+
+def test_missing_stream_raises_an_alert():
+    alerts = HealthAlerts(after_ticks=1)
+    assert alerts.update(["image_top"], FrameSet(1, 0)) == [("image_top", "missing")]
@@ -0,0 +1,111 @@
+import cv2
+import numpy as np
+import pytest
+
+from operating_platform.robot.components import color_convert
+from operating_platform.robot.components.color_convert import ColorPath, JpegBackend, OpenCVJpeg, plan
+
+
+class FakeJpeg(JpegBackend):
+    """Records the channel order it is asked for, to check that no extra cvtColor is planned."""
+
+    name = "fake"
+
+    def __init__(self):
+        self.calls = []
+
+    def decode(self, data, order):
+        self.calls.append(("decode", order))
+        return np.zeros((2, 2, 3), dtype=np.uint8)
+
+    def encode(self, frame, order, quality):
+        self.calls.append(("encode", order, quality))
+        return np.zeros(4, dtype=np.uint8)
+
+
+def _frame(height: int = 16, width: int = 16) -> np.ndarray:
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    frame[..., 0] = 200
+    frame[..., 2] = 30
+    return frame
+
+
+def test_same_encoding_is_passed_through():
+    path = ColorPath("jpg", "jpeg", jpeg=FakeJpeg())
+    data = np.arange(4, dtype=np.uint8)
+
+    assert path.steps == []
+    assert path(data) is data
+    assert "passthrough" in repr(path)
+
+
+@pytest.mark.parametrize(
+    "source, target, steps",
+    [
+        ("bgr8", "rgb8", ["cvtColor bgr8 -> rgb8"]),
+        ("jpeg", "rgb8", ["fake decode -> rgb8"]),
+        ("jpeg", "bgr8", ["fake decode -> bgr8"]),
+        ("jpeg", "yuv420", ["fake decode -> bgr8", "cvtColor bgr8 -> yuv420"]),
+        ("rgb8", "jpeg", ["fake encode rgb8"]),
+        ("yuv420", "jpeg", ["cvtColor yuv420 -> rgb8", "fake encode rgb8"]),
+    ],
+)
+def test_plan(source, target, steps):
+    assert ColorPath(source, target, jpeg=FakeJpeg()).steps == steps
+
+
+def test_jpeg_uses_the_target_channel_order():
+    jpeg = FakeJpeg()
+    ColorPath("jpeg", "rgb8", jpeg=jpeg)(np.zeros(4, dtype=np.uint8))
+    ColorPath("rgb8", "jpeg", quality=80, jpeg=jpeg)(_frame())
+
+    assert jpeg.calls == [("decode", "rgb8"), ("encode", "rgb8", 80)]
+
+
+@pytest.mark.parametrize(
+    "source, target",
+    [("raw16", "rgb8"), ("rgb8", "png"), ("png", "jpeg")],
+)
+def test_unsupported_paths(source, target):
+    with pytest.raises(ValueError):
+        ColorPath(source, target, jpeg=FakeJpeg())
+
+
+def test_imdecode_formats_use_opencv():
+    path = ColorPath("png", "rgb8", jpeg=FakeJpeg())
+    assert path.jpeg.name == "opencv"
+
+    bgr = _frame()
+    _, encoded = cv2.imencode(".png", bgr)
+    assert np.array_equal(path(encoded.reshape(-1)), bgr[..., ::-1])
+
+
+def test_flat_raw_buffer_with_preallocated_output():
+    bgr = _frame(4, 6)
+    out = np.empty_like(bgr)
+    rgb = ColorPath("bgr8", "rgb8")(bgr.reshape(-1), width=6, height=4, out=out)
+
+    assert rgb is out
+    assert np.array_equal(rgb, bgr[..., ::-1])
+
+
+def test_jpeg_round_trip_is_420():
+    path = ColorPath("rgb8", "jpeg", jpeg=OpenCVJpeg())
+    encoded = path(_frame())
+    decoded = ColorPath("jpeg", "rgb8", jpeg=OpenCVJpeg())(encoded)
+
+    assert decoded.shape == (16, 16, 3)
+    assert np.abs(decoded.astype(int) - _frame()).max() < 8
+    # SOF0 component 1 sampling factor 0x22: 2x2 luma per chroma sample
+    sof = encoded.tobytes().index(b"\xff\xc0")
+    assert encoded[sof + 11] == 0x22
+
+
+def test_plan_is_cached(monkeypatch):
+    monkeypatch.setattr(color_convert, "_paths", {})
+    monkeypatch.setattr(color_convert, "_jpeg_backend", OpenCVJpeg())
+
+    path = plan("JPG", "rgb8")
+    assert plan("jpeg", "rgb8") is path
+    assert plan("jpeg", "rgb8", quality=80) is not path
+    assert path.jpeg.name == "opencv"
@@ -0,0 +1,13 @@
+from pathlib import Path
+
+import pytest
+
+from dataset_utils import write_dataset
+
+
+@pytest.fixture
+def dataset_root(tmp_path) -> Path:
+    """Root of a dataset with three episodes of 3, 4 and 5 frames."""
+    root = tmp_path / "dataset"
+    write_dataset(root, [3, 4, 5])
+    return root
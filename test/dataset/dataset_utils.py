@@ -0,0 +1,42 @@
+from pathlib import Path
+
+import datasets
+import numpy as np
+
+from operating_platform.dataset.compute_stats import compute_episode_stats
+from operating_platform.dataset.dorobot_dataset import DoRobotDatasetMetadata
+from operating_platform.utils.dataset import get_hf_features_from_features
+
+
+REPO_ID = "dorobot/test"
+FPS = 30
+TASK = "Pick apple."
+FEATURES = {
+    "observation.state": {"dtype": "float32", "shape": (2,), "names": ["joint_0", "joint_1"]},
+    "action": {"dtype": "float32", "shape": (2,), "names": ["joint_0", "joint_1"]},
+}
+
+
+def write_dataset(root: Path, lengths: list[int]) -> DoRobotDatasetMetadata:
+    """Dataset without cameras in the one-parquet-per-episode layout, every value of episode i is i."""
+    meta = DoRobotDatasetMetadata.create(REPO_ID, fps=FPS, root=root, features=FEATURES, use_videos=False)
+    meta.add_task(TASK)
+    hf_features = get_hf_features_from_features(meta.features)
+
+    index = 0
+    for ep_index, length in enumerate(lengths):
+        episode = {
+            "observation.state": np.full((length, 2), ep_index, dtype=np.float32),
+            "action": np.full((length, 2), ep_index, dtype=np.float32),
+            "timestamp": np.arange(length, dtype=np.float32) / FPS,
+            "frame_index": np.arange(length),
+            "episode_index": np.full(length, ep_index),
+            "index": np.arange(index, index + length),
+            "task_index": np.zeros(length, dtype=np.int64),
+        }
+        fpath = root / meta.get_data_file_path(ep_index)
+        fpath.parent.mkdir(parents=True, exist_ok=True)
+        datasets.Dataset.from_dict(episode, features=hf_features, split="train").to_parquet(fpath)
+        meta.save_episode(ep_index, length, [TASK], compute_episode_stats(episode, meta.features))
+        index += length
+    return meta
@@ -0,0 +1,87 @@
+import pyarrow.parquet as pq
+import pytest
+
+from operating_platform.dataset.compact import compact_dataset
+from operating_platform.dataset.dorobot_dataset import DoRobotDatasetMetadata
+
+from dataset_utils import REPO_ID
+
+
+def _read_column(meta: DoRobotDatasetMetadata, ep_index: int, key: str) -> list:
+    return pq.read_table(meta.root / meta.get_data_file_path(ep_index), columns=[key]).column(key).to_pylist()
+
+
+def test_remove_episode_only_records_a_tombstone(dataset_root):
+    meta = DoRobotDatasetMetadata(REPO_ID, dataset_root)
+    meta.remove_episode(1)
+
+    meta = DoRobotDatasetMetadata(REPO_ID, dataset_root)
+    assert meta.tombstones == {1}
+    assert meta.live_episodes == [0, 2]
+    assert meta.live_frames == 8
+    # info.json and the episode files are untouched until compaction
+    assert meta.total_episodes == 3
+    assert meta.total_frames == 12
+    assert (dataset_root / meta.get_data_file_path(1)).is_file()
+
+
+def test_remove_unknown_episode(dataset_root):
+    meta = DoRobotDatasetMetadata(REPO_ID, dataset_root)
+    with pytest.raises(IndexError):
+        meta.remove_episode(3)
+
+
+def test_compact_nothing_to_do(dataset_root):
+    assert compact_dataset(REPO_ID, root=dataset_root) == {}
+
+
+def test_compact_without_reindex_keeps_next_free_index(dataset_root):
+    meta = DoRobotDatasetMetadata(REPO_ID, dataset_root)
+    removed_path = dataset_root / meta.get_data_file_path(2)
+    meta.remove_episode(2)
+
+    assert compact_dataset(REPO_ID, root=dataset_root) == {2: None}
+
+    meta = DoRobotDatasetMetadata(REPO_ID, dataset_root)
+    assert not removed_path.exists()
+    assert meta.tombstones == set()
+    assert sorted(meta.episodes) == [0, 1]
+    assert meta.live_frames == 7
+    # the next episode and frame indices stay above every index written so far, so a new episode
+    # can't collide with the removed one's index range nor with the remaining ones
+    assert meta.total_episodes == 3
+    assert meta.total_frames == 12
+    assert max(_read_column(meta, 1, "index")) < meta.total_frames
+
+
+def test_compact_without_reindex_keeps_gaps(dataset_root):
+    meta = DoRobotDatasetMetadata(REPO_ID, dataset_root)
+    meta.remove_episode(1)
+
+    compact_dataset(REPO_ID, root=dataset_root)
+
+    meta = DoRobotDatasetMetadata(REPO_ID, dataset_root)
+    assert sorted(meta.episodes) == [0, 2]
+    assert _read_column(meta, 2, "episode_index") == [2] * 5
+    assert _read_column(meta, 2, "index") == list(range(7, 12))
+
+
+def test_compact_with_reindex(dataset_root):
+    meta = DoRobotDatasetMetadata(REPO_ID, dataset_root)
+    old_last_path = dataset_root / meta.get_data_file_path(2)
+    meta.remove_episode(0)
+
+    assert compact_dataset(REPO_ID, root=dataset_root, reindex=True) == {0: None, 1: 0, 2: 1}
+
+    meta = DoRobotDatasetMetadata(REPO_ID, dataset_root)
+    assert not old_last_path.exists()
+    assert sorted(meta.episodes) == [0, 1]
+    assert [meta.episodes[ep_index]["length"] for ep_index in (0, 1)] == [4, 5]
+    assert meta.total_episodes == 2
+    assert meta.total_frames == 9
+    assert _read_column(meta, 0, "episode_index") == [0] * 4
+    assert _read_column(meta, 0, "index") == list(range(0, 4))
+    assert _read_column(meta, 1, "episode_index") == [1] * 5
+    assert _read_column(meta, 1, "index") == list(range(4, 9))
+    # the data itself moved with the episode (episode i was written with value i)
+    assert _read_column(meta, 0, "action") == [[1.0, 1.0]] * 4
@@ -0,0 +1,56 @@
+import pyarrow.parquet as pq
+
+from operating_platform.dataset.dorobot_dataset import DoRobotDatasetMetadata
+from operating_platform.dataset.frame_drops import read_episode_table
+from operating_platform.dataset.parquet_shards import convert_to_episodes, convert_to_shards
+from operating_platform.utils.dataset import DEFAULT_SHARD_PATH
+
+from dataset_utils import REPO_ID
+
+
+def test_convert_to_shards_writes_the_index(dataset_root):
+    meta = DoRobotDatasetMetadata(REPO_ID, dataset_root)
+    episode_paths = [dataset_root / meta.get_data_file_path(ep_index) for ep_index in range(3)]
+
+    assert convert_to_shards(REPO_ID, root=dataset_root, episodes_per_shard=2) == 3
+
+    meta = DoRobotDatasetMetadata(REPO_ID, dataset_root)
+    first, second = DEFAULT_SHARD_PATH.format(shard_index=0), DEFAULT_SHARD_PATH.format(shard_index=1)
+    assert meta.shard_index == {0: (first, 0), 1: (first, 1), 2: (second, 0)}
+    assert not any(fpath.exists() for fpath in episode_paths)
+    assert str(meta.get_data_file_path(1)) == first
+    assert meta.get_data_row_group(1) == 1
+    assert pq.ParquetFile(dataset_root / first).num_row_groups == 2
+
+
+def test_row_group_holds_one_episode(dataset_root):
+    convert_to_shards(REPO_ID, root=dataset_root, episodes_per_shard=3)
+    meta = DoRobotDatasetMetadata(REPO_ID, dataset_root)
+
+    for ep_index, length in enumerate([3, 4, 5]):
+        table = read_episode_table(meta, ep_index, ["episode_index", "action"])
+        assert table.num_rows == length
+        assert table.column("episode_index").to_pylist() == [ep_index] * length
+        assert table.column("action").to_pylist() == [[float(ep_index)] * 2] * length
+
+
+def test_converting_again_packs_only_new_episodes(dataset_root):
+    convert_to_shards(REPO_ID, root=dataset_root, episodes_per_shard=2)
+    assert convert_to_shards(REPO_ID, root=dataset_root, episodes_per_shard=2) == 0
+
+
+def test_convert_back_to_episodes(dataset_root):
+    meta = DoRobotDatasetMetadata(REPO_ID, dataset_root)
+    before = {
+        ep_index: pq.read_table(dataset_root / meta.get_data_file_path(ep_index)).to_pylist() for ep_index in range(3)
+    }
+    convert_to_shards(REPO_ID, root=dataset_root, episodes_per_shard=2)
+
+    assert convert_to_episodes(REPO_ID, root=dataset_root) == 3
+
+    meta = DoRobotDatasetMetadata(REPO_ID, dataset_root)
+    assert meta.shard_index == {}
+    assert not (dataset_root / DEFAULT_SHARD_PATH.format(shard_index=0)).exists()
+    for ep_index in range(3):
+        assert meta.get_data_row_group(ep_index) is None
+        assert pq.read_table(dataset_root / meta.get_data_file_path(ep_index)).to_pylist() == before[ep_index]
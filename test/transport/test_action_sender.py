@@ -0,0 +1,105 @@
+import threading
+import time
+
+from operating_platform.robot.transport import ActionSender
+
+
+class RecordingLink:
+    """Stands in for a Link: records (time, event_id, value) of every send."""
+
+    def __init__(self, accept: bool = True, send_s: float = 0.0):
+        self.accept = accept
+        self.send_s = send_s
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send(self, event_id, value, metadata=None) -> bool:
+        if self.send_s:
+            time.sleep(self.send_s)
+        with self.lock:
+            self.sent.append((time.perf_counter(), event_id, value))
+        return self.accept
+
+
+def _wait_for(predicate, timeout_s: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return predicate()
+
+
+def test_pending_action_is_replaced():
+    sender = ActionSender(RecordingLink())
+    sender.put("action_joint_left", 1)
+    sender.put("action_joint_left", 2)
+    sender.put("action_joint_right", 3)
+
+    assert sender.depth == 2
+    assert sender.stats.superseded == 1
+    assert sender.mailbox["action_joint_left"][0] == 2
+
+
+def test_sends_are_at_least_one_period_apart():
+    link = RecordingLink()
+    sender = ActionSender(link, rate_hz=20.0)
+    sender.start()
+    puts = 0
+    try:
+        end = time.perf_counter() + 0.5
+        while time.perf_counter() < end:
+            sender.put("action_joint_left", puts)
+            puts += 1
+            time.sleep(0.002)
+    finally:
+        sender.stop()
+
+    times = [t for t, _, _ in link.sent]
+    assert len(times) >= 2
+    assert min(b - a for a, b in zip(times, times[1:])) >= sender.period_s * 0.9
+    assert len(times) <= 0.5 / sender.period_s + 2
+    # every action is either sent, replaced by a newer one or still waiting
+    assert sender.stats.sent + sender.stats.superseded + sender.depth == puts
+    # the newest action wins
+    assert link.sent[-1][2] == puts - 1 or sender.depth == 1
+
+
+def test_one_tick_sends_every_arm():
+    link = RecordingLink()
+    sender = ActionSender(link, rate_hz=10.0)
+    sender.put("action_joint_left", 1)
+    sender.put("action_joint_right", 2)
+    sender.start()
+    try:
+        assert _wait_for(lambda: sender.stats.sent == 2)
+    finally:
+        sender.stop()
+
+    assert {event_id: value for _, event_id, value in link.sent} == {"action_joint_left": 1, "action_joint_right": 2}
+    assert sender.stats.max_batch == 2
+    assert sender.logs()["action_sent"] == 2
+
+
+def test_rejected_sends_are_counted():
+    sender = ActionSender(RecordingLink(accept=False))
+    sender.start()
+    try:
+        sender.put("action_joint_left", 1)
+        assert _wait_for(lambda: sender.stats.send_dropped == 1)
+    finally:
+        sender.stop()
+    assert sender.stats.sent == 0
+
+
+def test_put_does_not_wait_for_the_link():
+    sender = ActionSender(RecordingLink(send_s=0.2))
+    sender.start()
+    try:
+        sender.put("action_joint_left", 1)
+        assert _wait_for(lambda: sender.depth == 0)
+        start = time.perf_counter()
+        sender.put("action_joint_left", 2)
+        assert time.perf_counter() - start < 0.05
+    finally:
+        sender.stop()
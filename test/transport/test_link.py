@@ -0,0 +1,126 @@
+import itertools
+import time
+
+import numpy as np
+import pytest
+
+from operating_platform.robot.transport import FloatVectorChannel, Link, stream_metrics
+
+
+_addresses = itertools.count()
+
+
+def _wait_for(predicate, timeout_s: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return predicate()
+
+
+@pytest.fixture
+def address() -> str:
+    return f"inproc://test-link-{next(_addresses)}"
+
+
+def _pair(address: str, conflate: bool):
+    sender = Link(address, name="sender")
+    sender.add(FloatVectorChannel("joint"))
+    receiver = Link(address, name="receiver", bind=True, recv_timeout_ms=100)
+    channel = receiver.add(FloatVectorChannel("joint", conflate=conflate))
+    return sender, receiver, channel
+
+
+def test_every_message_is_delivered_without_conflation(address):
+    sender, receiver, channel = _pair(address, conflate=False)
+    receiver.open()
+    sender.open(receive=False)
+    try:
+        for i in range(5):
+            assert sender.send("joint_left", np.full(2, i, dtype=np.float32))
+        assert _wait_for(lambda: channel.stats.received == 5)
+
+        assert channel["joint_left"].tolist() == [4, 4]
+        assert [value.tolist() for _, value in channel.samples("joint_left")][-5:] == [[i, i] for i in range(5)]
+        stream = channel.streams["joint_left"]
+        assert (stream.produced, stream.delivered, stream.dropped) == (5, 5, 0)
+    finally:
+        sender.close()
+        receiver.close()
+
+
+def test_conflated_channel_keeps_the_newest_value(address):
+    sender, receiver, channel = _pair(address, conflate=True)
+    # messages queue up on the sender until the receiver binds, then arrive as one backlog
+    sender.open(receive=False)
+    try:
+        for i in range(5):
+            sender.send("joint_left", np.full(2, i, dtype=np.float32))
+        receiver.open()
+        assert _wait_for(lambda: "joint_left" in channel and channel["joint_left"][0] == 4)
+
+        stream = channel.streams["joint_left"]
+        assert stream.produced == 5
+        assert stream.delivered + channel.stats.superseded == 5
+        assert stream.dropped == channel.stats.superseded
+    finally:
+        sender.close()
+        receiver.close()
+
+
+def test_sequence_gaps_count_as_dropped(address):
+    sender, receiver, channel = _pair(address, conflate=False)
+    receiver.open()
+    sender.open(receive=False)
+    try:
+        sender.send("joint_left", np.zeros(2, dtype=np.float32))
+        # lost on the way: the sender numbered them, the receiver never saw them
+        sender.channels[0].seqs["joint_left"] += 2
+        sender.send("joint_left", np.ones(2, dtype=np.float32))
+        assert _wait_for(lambda: channel.stats.received == 2)
+
+        logs = receiver.logs()
+        metrics = stream_metrics(logs)["joint_left"]
+        assert (metrics["produced"], metrics["delivered"], metrics["dropped"]) == (4, 2, 2)
+        assert logs["recv_joint_left_age_s"] >= 0
+    finally:
+        sender.close()
+        receiver.close()
+
+
+def test_full_send_queue_drops_without_blocking(address):
+    sender = Link(address, name="sender", hwm=1)
+    channel = sender.add(FloatVectorChannel("joint"))
+    # nobody receives, the queue fills up
+    sender.open(receive=False)
+    try:
+        start = time.monotonic()
+        results = [sender.send("joint_left", np.zeros(2, dtype=np.float32)) for _ in range(100)]
+        assert time.monotonic() - start < 1.0
+        assert not all(results)
+        assert channel.stats.sent + channel.stats.send_dropped == 100
+        assert channel.stats.send_dropped == results.count(False)
+        assert sender.logs()["send_joint_dropped"] == channel.stats.send_dropped
+    finally:
+        sender.close()
+
+
+def test_unrouted_events_are_counted(address):
+    sender = Link(address, name="sender")
+    sender.add(FloatVectorChannel("joint"))
+    sender.add(FloatVectorChannel("gripper"))
+    receiver = Link(address, name="receiver", bind=True, recv_timeout_ms=100)
+    channel = receiver.add(FloatVectorChannel("joint"))
+    receiver.open()
+    sender.open(receive=False)
+    try:
+        sender.send("gripper_left", np.zeros(1, dtype=np.float32))
+        sender.send("joint_left", np.zeros(2, dtype=np.float32))
+        assert _wait_for(lambda: channel.stats.received == 1)
+        assert receiver.unrouted == 1
+        with pytest.raises(ValueError):
+            sender.send("pose_left", np.zeros(3, dtype=np.float32))
+    finally:
+        sender.close()
+        receiver.close()
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from operating_platform.robot.transport.shm_ring import (
+    DEFAULT_FRAME_STREAMS,
+    DEFAULT_NUM_SLOTS,
+    FrameRingReader,
+    FrameRingWriter,
+    frame_link_hwm,
+)
+
+
+@pytest.fixture
+def ring():
+    writer = FrameRingWriter("test_image", num_slots=2)
+    reader = FrameRingReader()
+    yield writer, reader
+    reader.close()
+    writer.close()
+
+
+def _frame(value: int, size: int = 16) -> np.ndarray:
+    return np.full(size, value, dtype=np.uint8)
+
+
+def test_read_returns_a_copy_of_the_frame(ring):
+    writer, reader = ring
+    desc = writer.write(_frame(7), capture_ns=123)
+
+    frame = reader.read(desc)
+    assert frame.tolist() == [7] * 16
+    assert desc["capture_ns"] == 123
+    assert desc["seq"] % 2 == 0
+    # the copy outlives the slot
+    writer.write(_frame(8))
+    writer.write(_frame(9))
+    assert frame.tolist() == [7] * 16
+
+
+def test_overwritten_slot_is_dropped(ring):
+    writer, reader = ring
+    first = writer.write(_frame(1))
+    writer.write(_frame(2))
+    latest = writer.write(_frame(3))  # wraps around onto the first slot
+
+    assert latest["slot"] == first["slot"]
+    assert not reader.is_current(first)
+    assert reader.view(first) is None
+    assert reader.read(first) is None
+    assert reader.read(latest).tolist() == [3] * 16
+
+
+def test_slot_reused_during_the_copy_is_dropped(ring):
+    writer, reader = ring
+    desc = writer.write(_frame(1))
+
+    def slow_copy(view):
+        out = np.copy(view)
+        # the writer laps the reader while it is copying
+        writer.write(_frame(2))
+        writer.write(_frame(3))
+        return out
+
+    assert reader.read(desc, convert=slow_copy) is None
+
+
+def test_write_in_progress_is_not_read(ring):
+    writer, reader = ring
+    desc = writer.write(_frame(1))
+    # odd sequence number: the writer is in the middle of the slot
+    writer.layout.headers["seq"][desc["slot"]] = desc["seq"] + 1
+    assert reader.view(desc) is None
+
+
+def test_view_is_read_only(ring):
+    writer, reader = ring
+    view = reader.view(writer.write(_frame(1)))
+    with pytest.raises(ValueError):
+        view[0] = 0
+
+
+def test_larger_frame_recreates_the_ring(ring):
+    writer, reader = ring
+    small = writer.write(_frame(1, size=16))
+    reader.read(small)
+
+    large = writer.write(_frame(2, size=64))
+    assert large["name"] != small["name"]
+    assert large["slot_size"] == 64
+    assert reader.read(large).tolist() == [2] * 64
+    # the reader detached from the previous segment
+    assert list(reader.layouts) == [large["name"]]
+
+
+def test_frame_link_hwm(monkeypatch):
+    assert frame_link_hwm(3) == 3 * DEFAULT_NUM_SLOTS
+    assert frame_link_hwm(0) == DEFAULT_NUM_SLOTS
+    assert frame_link_hwm(2, num_slots=8) == 16
+
+    monkeypatch.delenv("FRAME_STREAMS", raising=False)
+    assert frame_link_hwm() == DEFAULT_FRAME_STREAMS * DEFAULT_NUM_SLOTS
+    monkeypatch.setenv("FRAME_STREAMS", "5")
+    assert frame_link_hwm() == 5 * DEFAULT_NUM_SLOTS
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from operating_platform.robot.transport import FloatVectorChannel, ImageChannel, StreamSynchronizer
+from operating_platform.robot.transport.sync import SYNC_SKEW_KEY
+
+
+MS = 1_000_000
+
+
+@pytest.fixture
+def images():
+    channel = ImageChannel("image")
+    yield channel
+    channel.close()
+
+
+def _store(channel, event_id: str, capture_ns: int, value, **metadata):
+    channel.store(event_id, value, {"capture_ns": capture_ns, **metadata})
+
+
+def test_reference_is_the_oldest_latest_capture(images):
+    _store(images, "image_top", 100 * MS, np.zeros(1))
+    _store(images, "image_wrist", 90 * MS, np.zeros(1))
+    sync = StreamSynchronizer(["image_top", "image_wrist"])
+
+    assert sync.begin(images, ["image_top", "image_wrist", "image_missing"]) == 90 * MS
+
+
+def test_nearest_picks_the_closest_capture(images):
+    for t in (60, 80, 100):
+        _store(images, "image_top", t * MS, np.full(1, t), frame_id=t)
+    _store(images, "image_wrist", 83 * MS, np.zeros(1))
+    sync = StreamSynchronizer(["image_top", "image_wrist"])
+    sync.begin(images, ["image_wrist"])
+
+    assert sync.nearest("image_top", images, "image_top").tolist() == [80]
+    assert sync.skews["image_top"] == pytest.approx(-0.003)
+    # metadata of the frame that was picked, not of the latest one
+    assert sync.sample_metadata("image_top", images, "image_top")["frame_id"] == 80
+
+
+def test_interpolate_between_samples(images):
+    joints = FloatVectorChannel("joint")
+    _store(joints, "joint_left", 0, np.array([0.0, 10.0], dtype=np.float32))
+    _store(joints, "joint_left", 10 * MS, np.array([1.0, 20.0], dtype=np.float32))
+    _store(images, "image_top", 4 * MS, np.zeros(1))
+    sync = StreamSynchronizer(["image_top", "joint_left"])
+    sync.begin(images, ["image_top"])
+
+    assert sync.interpolate("joint_left", joints, "joint_left") == pytest.approx([0.4, 14.0])
+    # skew of the closer sample
+    assert sync.skews["joint_left"] == pytest.approx(-0.004)
+
+
+def test_interpolate_outside_the_samples_uses_the_nearest(images):
+    joints = FloatVectorChannel("joint")
+    _store(joints, "joint_left", 0, np.array([0.0], dtype=np.float32))
+    _store(joints, "joint_left", 10 * MS, np.array([1.0], dtype=np.float32))
+    _store(images, "image_top", 50 * MS, np.zeros(1))
+    sync = StreamSynchronizer(["joint_left"], tolerance_s=0.02)
+    sync.begin(images, ["image_top"])
+
+    assert sync.interpolate("joint_left", joints, "joint_left").tolist() == [1.0]
+    assert sync.skews["joint_left"] == pytest.approx(-0.04)
+    assert sync.logs()["sync_joint_left_out_of_tolerance"] == 1
+
+
+def test_without_reference_the_latest_sample_is_used(images):
+    joints = FloatVectorChannel("joint")
+    _store(joints, "joint_left", 0, np.array([0.0], dtype=np.float32))
+    _store(joints, "joint_left", 10 * MS, np.array([1.0], dtype=np.float32))
+    sync = StreamSynchronizer(["joint_left"])
+
+    assert sync.begin(images, ["image_top"]) is None
+    assert sync.interpolate("joint_left", joints, "joint_left").tolist() == [1.0]
+    assert sync.nearest("joint_left", joints, "joint_left").tolist() == [1.0]
+
+
+def test_skew_vector_follows_the_stream_order(images):
+    _store(images, "image_top", 100 * MS, np.zeros(1))
+    _store(images, "image_wrist", 95 * MS, np.zeros(1))
+    sync = StreamSynchronizer(["image_wrist", "image_top", "joint_left"])
+    sync.begin(images, ["image_wrist"])
+    sync.nearest("image_top", images, "image_top")
+
+    assert sync.features[SYNC_SKEW_KEY]["shape"] == (3,)
+    assert sync.skew_vector() == pytest.approx([0.0, 0.005, 0.0])
@@ -0,0 +1,79 @@
+import datasets
+import numpy as np
+import pyarrow as pa
+import pytest
+import torch
+
+from operating_platform.utils.dataset import ARROW_TORCH_FORMAT, arrow_column_to_torch
+
+
+def test_fixed_size_list_column():
+    column = pa.FixedSizeListArray.from_arrays(pa.array(np.arange(6, dtype=np.float32)), 2)
+    tensor = arrow_column_to_torch(column)
+    assert tensor.dtype == torch.float32
+    assert tensor.tolist() == [[0, 1], [2, 3], [4, 5]]
+
+
+def test_sliced_fixed_size_list_column():
+    column = pa.FixedSizeListArray.from_arrays(pa.array(np.arange(8, dtype=np.int64)), 2).slice(1, 2)
+    assert arrow_column_to_torch(column).tolist() == [[2, 3], [4, 5]]
+
+
+def test_primitive_columns():
+    assert arrow_column_to_torch(pa.array([1, 2, 3], type=pa.int64())).tolist() == [1, 2, 3]
+    assert arrow_column_to_torch(pa.array([0.5, 1.5], type=pa.float32())).dtype == torch.float32
+    assert arrow_column_to_torch(pa.array([True, False])).tolist() == [True, False]
+
+
+def test_chunked_column():
+    column = pa.chunked_array([pa.array([1, 2], type=pa.int64()), pa.array([3], type=pa.int64())])
+    assert arrow_column_to_torch(column).tolist() == [1, 2, 3]
+
+
+def test_uniform_list_column_is_stacked():
+    column = pa.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]], type=pa.list_(pa.float32()))
+    tensor = arrow_column_to_torch(column)
+    assert tensor.shape == (3, 2)
+    assert tensor.tolist() == [[1, 2], [3, 4], [5, 6]]
+    assert arrow_column_to_torch(column.slice(1)).tolist() == [[3, 4], [5, 6]]
+
+
+def test_empty_list_column():
+    assert arrow_column_to_torch(pa.array([], type=pa.list_(pa.float32()))).shape == (0, 0)
+
+
+@pytest.mark.parametrize(
+    "column",
+    [
+        pa.array([[1.0, 2.0], [3.0]], type=pa.list_(pa.float32())),
+        pa.array([[1.0, 2.0], None], type=pa.list_(pa.float32())),
+        pa.array([["a"], ["b"]], type=pa.list_(pa.string())),
+    ],
+    ids=["ragged", "null", "strings"],
+)
+def test_unsupported_list_column(column):
+    with pytest.raises(ValueError):
+        arrow_column_to_torch(column)
+
+
+def test_string_column():
+    assert arrow_column_to_torch(pa.array(["a", None])) == ["a", None]
+
+
+def test_formatter():
+    features = datasets.Features(
+        {
+            "action": datasets.Sequence(length=2, feature=datasets.Value("float32")),
+            "index": datasets.Value("int64"),
+        }
+    )
+    dataset = datasets.Dataset.from_dict(
+        {"action": np.arange(8, dtype=np.float32).reshape(4, 2), "index": np.arange(4)}, features=features
+    )
+    dataset.set_format(ARROW_TORCH_FORMAT)
+
+    row = dataset[1]
+    assert row["action"].tolist() == [2, 3]
+    assert row["index"].item() == 1
+    assert dataset[1:3]["action"].shape == (2, 2)
+    assert dataset["index"].tolist() == [0, 1, 2, 3]